@@ -0,0 +1,79 @@
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from minimax.analysis import analyze_job, output_path
+from minimax.checkpoint import load_checkpoint
+from minimax.selfplay import EngineConfig, DEFAULT_WEIGHTS
+
+'''files searched for in an input directory'''
+PATTERNS = ('*.pdn', '*.fen', '*.txt')
+
+
+def input_files(paths):
+    """
+    Files of the arguments: files, glob patterns and directories. A file named twice is listed once, as two jobs
+    would write the same output file.
+    """
+    files, seen = [], set()
+    for path in paths:
+        if os.path.isdir(path):
+            found = sorted(name for pattern in PATTERNS for name in glob.glob(os.path.join(path, pattern)))
+        elif glob.has_magic(path):
+            found = sorted(glob.glob(path))
+        else:
+            found = [path]
+        for name in found:
+            if os.path.realpath(name) not in seen:
+                seen.add(os.path.realpath(name))
+                files.append(name)
+    return files
+
+
+def main(opt):
+    weights = load_checkpoint(opt.load_weights)['weights'] if opt.load_weights else opt.weights
+    engine = EngineConfig(opt.depth, weights, move_time_ms=opt.move_time_ms, tt_mb=opt.tt_mb)
+    os.makedirs(opt.output_dir, exist_ok=True)
+    jobs = [(path, output_path(opt.output_dir, path), engine, not opt.restart) for path in input_files(opt.inputs)]
+
+    total = errors = 0
+    if opt.workers == 0:
+        results = (analyze_job(job) for job in jobs)
+        executor = None
+    else:
+        # one file per job: the files are the shards, each written by one worker
+        executor = ProcessPoolExecutor(opt.workers or None)
+        results = (future.result() for future in as_completed([executor.submit(analyze_job, job) for job in jobs]))
+    try:
+        for path, positions, failed, seconds in results:
+            total += positions
+            errors += failed
+            print(f'{path}: {positions} positions in {seconds:.1f}s'
+                  + (f', {failed} games could not be replayed' if failed else ''))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    print(f'{len(jobs)} files, {total} positions analyzed, {errors} games with errors, output in {opt.output_dir}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='search every position of game record files (PDN-like games or '
+                                                 'one FEN per line, see checkers/pdn.py) and write the best move '
+                                                 'and score of each as JSON lines')
+    parser.add_argument('inputs', nargs='+', help='game record files, glob patterns or directories')
+    parser.add_argument('--output_dir', type=str, default='analysis',
+                        help='one <input name>.<path hash>.analysis.jsonl per input file')
+    parser.add_argument('--depth', type=int, default=6, help='alpha-beta depth of every position')
+    parser.add_argument('--move_time_ms', type=int, default=0,
+                        help='iterative deepening time budget per position instead of a fixed --depth')
+    parser.add_argument('--tt_mb', type=float, default=16, help='transposition table of each worker, 0 for none')
+    parser.add_argument('--weights', type=float, nargs=7, default=list(DEFAULT_WEIGHTS),
+                        help='evaluation weights of the searches')
+    parser.add_argument('--load_weights', type=str, default=None,
+                        help='take the weights from this checkpoint (file or directory)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes, each analyzing whole files; 0 analyzes in this process')
+    parser.add_argument('--restart', action='store_true',
+                        help='analyze from the start instead of continuing the existing output files')
+    main(parser.parse_args())
@@ -0,0 +1,62 @@
+"""
+Scalar evaluate() against numpy batch evaluation (minimax.batch) on a frontier of leaf positions, as used to score
+many stored positions at once.
+
+    python -m benchmarks.batch_eval --frontier 3
+
+The search evaluates leaf by leaf: the threatened piece features generate every capture of a position and cost far
+more than the dot product, so batching the leaves of a node did not make the search faster.
+"""
+import argparse
+import time
+
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from minimax.algorithm import generate_moves, apply_move
+from minimax.batch import feature_matrix, evaluate_batch
+from benchmarks.search_nodes import fixed_positions, EVALUATOR
+
+
+def frontier(board, max_player, depth):
+    """All positions depth plies below the board"""
+    boards = [board]
+    for ply in range(depth):
+        color = WHITE if (max_player ^ (ply % 2 == 1)) else RED
+        boards = [apply_move(parent, *move) for parent in boards for move in generate_moves(parent, color)]
+    return boards
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main(opt):
+    positions = fixed_positions(opt.positions, opt.seed)
+    if opt.bitboard:
+        positions = [(BitBoard.from_board(board), max_player) for board, max_player in positions]
+
+    leaves = [leaf for board, max_player in positions for leaf in frontier(board, max_player, opt.frontier)]
+    for leaf in leaves:
+        leaf.calculate_threatens()
+    weights = EVALUATOR.return_weights()
+    scalar, scalar_time = timed(lambda: [EVALUATOR.evaluate(leaf) for leaf in leaves], opt.repeat)
+    matrix, encode_time = timed(lambda: feature_matrix(leaves), opt.repeat)
+    batched, dot_time = timed(lambda: evaluate_batch(matrix, weights), opt.repeat)
+    assert max(abs(a - b) for a, b in zip(scalar, batched)) < 1e-9, 'batch values differ'
+    print(f'{len(leaves)} leaves (features already computed)')
+    print(f'  scalar evaluate : {len(leaves) / scalar_time:12.0f} leaves/s')
+    print(f'  encode + dot    : {len(leaves) / (encode_time + dot_time):12.0f} leaves/s')
+    print(f'  dot only        : {len(leaves) / dot_time:12.0f} leaves/s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frontier', type=int, default=3, help='depth of the leaf frontier that is evaluated')
+    parser.add_argument('--positions', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--bitboard', action='store_true')
+    main(parser.parse_args())
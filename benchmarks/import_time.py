@@ -0,0 +1,48 @@
+"""
+Import time and cold start of the engine without pygame, against the same with the pygame rendering layer
+loaded (which every import of the engine paid before the rendering moved to checkers/render.py).
+
+    python -m benchmarks.import_time --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RENDER = 'import checkers.render; checkers.render.get_crown(); '
+SEARCH = 'from checkers.board import Board; from minimax import minimax, Evaluator; ' \
+         'minimax(Board(), 3, False, None, Evaluator())'
+CASES = {
+    'import engine': 'import checkers.board, minimax',
+    'import engine + render': RENDER + 'import checkers.board, minimax',
+    'cold start depth 3 search': SEARCH,
+    'cold start depth 3 search + render': RENDER + SEARCH,
+}
+
+
+def run(code, runs):
+    """Median wall time of a fresh interpreter running the code"""
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1', SDL_VIDEODRIVER='dummy')
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(opt):
+    baseline = run('pass', opt.runs)
+    print(f'empty interpreter: {baseline * 1000:.1f} ms')
+    for name, code in CASES.items():
+        seconds = run(code, opt.runs)
+        print(f'{name}: {seconds * 1000:.1f} ms ({(seconds - baseline) * 1000:.1f} ms over the interpreter)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    main(parser.parse_args())
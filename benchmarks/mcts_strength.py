@@ -0,0 +1,71 @@
+"""
+MCTS throughput and strength. Playouts per second of the random and the eval playouts from the start position,
+then of the root parallel search at several worker counts, then a match of MCTS against iterative deepening
+alpha-beta at the same time per move (colours alternate, every game opens with a few random moves).
+
+    python -m benchmarks.mcts_strength --seconds 2 --games 20 --move_time_ms 100
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers.bitboard import BitBoard
+from checkers.constants import WHITE
+from minimax.mcts import mcts, MonteCarloTree, PLAYOUTS
+from minimax.selfplay import EngineConfig, play_game, DEFAULT_WEIGHTS
+from minimax.stats import SearchStats
+from benchmarks.search_nodes import EVALUATOR
+from tournament import elo_difference
+
+
+def playouts_per_second(playout, seconds, executor=None, workers=1):
+    stats = SearchStats()
+    start = time.perf_counter()
+    mcts(BitBoard.start(), False, None, EVALUATOR, 0, int(seconds * 1000), MonteCarloTree(playout=playout, seed=0),
+         executor, workers, stats)
+    return stats.leaves / (time.perf_counter() - start)
+
+
+def match_game(args):
+    """Worker side: one game, MCTS takes white in the even games; returns MCTS's score"""
+    index, move_time_ms, random_plies, playout = args
+    searcher = EngineConfig(weights=DEFAULT_WEIGHTS, move_time_ms=move_time_ms, engine='mcts', playout=playout)
+    minimax = EngineConfig(weights=DEFAULT_WEIGHTS, move_time_ms=move_time_ms)
+    mcts_white = index % 2 == 0
+    white, red = (searcher, minimax) if mcts_white else (minimax, searcher)
+    result = play_game(white, red, random_plies, seed=index // 2)
+    if result.winner is None:
+        return 0.5
+    return 1.0 if (result.winner == WHITE) == mcts_white else 0.0
+
+
+def main(opt):
+    for playout in PLAYOUTS:
+        print(f'{playout:6} playouts: {playouts_per_second(playout, opt.seconds):9.0f} playouts/s')
+    for workers in opt.workers:
+        with ProcessPoolExecutor(workers) as executor:
+            # the first search starts the worker processes
+            playouts_per_second('eval', 0.1, executor, workers)
+            rate = playouts_per_second('eval', opt.seconds, executor, workers)
+        print(f'root parallel, {workers} workers: {rate:9.0f} eval playouts/s')
+
+    if opt.games:
+        jobs = [(index, opt.move_time_ms, opt.random_plies, opt.playout) for index in range(opt.games)]
+        with ProcessPoolExecutor(opt.match_workers or None) as executor:
+            scores = list(executor.map(match_game, jobs))
+        wins, draws = scores.count(1.0), scores.count(0.5)
+        score = sum(scores) / len(scores)
+        print(f'mcts ({opt.playout}) vs alpha-beta at {opt.move_time_ms}ms/move: +{wins} ={draws} '
+              f'-{len(scores) - wins - draws} score={score:.3f} elo={elo_difference(score):+.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=2, help='search time of each throughput measurement')
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4], help='root parallel worker counts')
+    parser.add_argument('--games', type=int, default=20, help='games of the match, 0 skips it')
+    parser.add_argument('--move_time_ms', type=int, default=100, help='time per move of both engines in the match')
+    parser.add_argument('--playout', type=str, default='eval', choices=PLAYOUTS, help='playouts of MCTS in the match')
+    parser.add_argument('--random_plies', type=int, default=4)
+    parser.add_argument('--match_workers', type=int, default=0, help='game processes, 0 uses every cpu')
+    main(parser.parse_args())
@@ -0,0 +1,154 @@
+"""
+Table driven Board.get_valid_moves against the arithmetic generator it replaced. Both must return the same
+moves, in the same order and with the same captured pieces, on a corpus of random positions.
+
+    python -m benchmarks.move_tables --positions 2000
+"""
+import argparse
+import random
+import time
+
+from checkers.board import Board
+from checkers.bitboard import BitBoard
+from checkers.constants import ROWS, COLS, RED, WHITE
+from checkers.piece import Piece
+from minimax.algorithm import generate_moves
+
+
+def legacy_valid_moves(board, piece):
+    """The generator before the move tables: neighbours computed arithmetically, chains by recursion"""
+    moves = {}
+    left = piece.col - 1
+    right = piece.col + 1
+    row = piece.row
+
+    if piece.color == RED or piece.king:
+        moves.update(_traverse_left(board, row - 1, max(row - 3, -1), -1, piece.color, left))
+        moves.update(_traverse_right(board, row - 1, max(row - 3, -1), -1, piece.color, right))
+    if piece.color == WHITE or piece.king:
+        moves.update(_traverse_left(board, row + 1, min(row + 3, ROWS), 1, piece.color, left))
+        moves.update(_traverse_right(board, row + 1, min(row + 3, ROWS), 1, piece.color, right))
+    return moves
+
+
+def _traverse_left(board, start, stop, step, color, left, skipped=None):
+    skipped = skipped or []
+    moves = {}
+    last = []
+    for r in range(start, stop, step):
+        if left < 0:
+            break
+        current = board.board[r][left]
+        if current == 0:
+            if skipped and not last:
+                break
+            moves[(r, left)] = last + skipped if skipped else last
+            if last:
+                row = max(r - 3, 0) if step == -1 else min(r + 3, ROWS)
+                moves.update(_traverse_left(board, r + step, row, step, color, left - 1, skipped=last))
+                moves.update(_traverse_right(board, r + step, row, step, color, left + 1, skipped=last))
+            break
+        elif current.color == color:
+            break
+        else:
+            last = [current]
+        left -= 1
+    return moves
+
+
+def _traverse_right(board, start, stop, step, color, right, skipped=None):
+    skipped = skipped or []
+    moves = {}
+    last = []
+    for r in range(start, stop, step):
+        if right >= COLS:
+            break
+        current = board.board[r][right]
+        if current == 0:
+            if skipped and not last:
+                break
+            moves[(r, right)] = last + skipped if skipped else last
+            if last:
+                row = max(r - 3, 0) if step == -1 else min(r + 3, ROWS)
+                moves.update(_traverse_left(board, r + step, row, step, color, right - 1, skipped=last))
+                moves.update(_traverse_right(board, r + step, row, step, color, right + 1, skipped=last))
+            break
+        elif current.color == color:
+            break
+        else:
+            last = [current]
+        right += 1
+    return moves
+
+
+def random_position(rng):
+    """Any mix of men and kings on the dark squares, so long capture chains show up often"""
+    board = Board()
+    board.board = [[0] * COLS for _ in range(ROWS)]
+    density = rng.uniform(0.2, 0.8)
+    for row in range(ROWS):
+        for col in range((row + 1) % 2, COLS, 2):
+            if rng.random() < density:
+                piece = Piece(row, col, rng.choice((RED, WHITE)))
+                if rng.random() < 0.3:
+                    piece.make_king()
+                board.board[row][col] = piece
+    return board
+
+
+def played_position(rng):
+    """A position of random play from the start"""
+    board = Board()
+    max_player = False
+    for _ in range(rng.randint(0, 60)):
+        moves = generate_moves(board, WHITE if max_player else RED)
+        if not moves:
+            break
+        board.make_move(*rng.choice(moves))
+        max_player = not max_player
+    return board
+
+
+def check(boards):
+    """Compare both generators, and the bitboard, on every piece of every board"""
+    for board in boards:
+        bitboard = BitBoard.from_board(board)
+        for piece in board.get_all_pieces(RED) + board.get_all_pieces(WHITE):
+            expected = legacy_valid_moves(board, piece)
+            moves = board.get_valid_moves(piece)
+            assert list(moves.items()) == list(expected.items()), f'{piece}: {moves} != {expected}'
+            masks = bitboard.get_valid_moves(piece.row * 4 + piece.col // 2)
+            assert [(row * 4 + col // 2, sum(1 << (p.row * 4 + p.col // 2) for p in skip))
+                    for (row, col), skip in moves.items()] == list(masks.items()), f'{piece}: bitboard differs'
+
+
+def moves_per_second(generate, boards, repeat):
+    pieces = [(board, piece) for board in boards for piece in board.get_all_pieces(RED) + board.get_all_pieces(WHITE)]
+    moves = sum(len(generate(board, piece)) for board, piece in pieces)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for board, piece in pieces:
+            generate(board, piece)
+        best = min(best, time.perf_counter() - start)
+    return moves / best
+
+
+def main(opt):
+    rng = random.Random(opt.seed)
+    boards = [random_position(rng) if i % 2 else played_position(rng) for i in range(opt.positions)]
+    check(boards)
+    print(f'{opt.positions} positions: table and legacy generators agree')
+
+    legacy = moves_per_second(legacy_valid_moves, boards, opt.repeat)
+    tables = moves_per_second(Board.get_valid_moves, boards, opt.repeat)
+    print(f'legacy arithmetic : {legacy:10.0f} moves/s')
+    print(f'move tables       : {tables:10.0f} moves/s ({tables / legacy:.2f}x)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--positions', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,47 @@
+"""
+Speedup of the parallel root search at 1, 2, 4 and 8 workers on the fixed positions of search_nodes.
+
+    python -m benchmarks.parallel_scaling --depth 5
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minimax import minimax, parallel_minimax
+from benchmarks.search_nodes import fixed_positions, EVALUATOR
+
+
+def main(opt):
+    positions = fixed_positions(opt.positions, opt.seed)
+
+    start = time.perf_counter()
+    # the workers search bitboards, so the sequential baseline does too
+    expected = [minimax(board, opt.depth, max_player, None, EVALUATOR, bitboard=True, alpha_beta=opt.alpha_beta)[0]
+                for board, max_player in positions]
+    sequential = time.perf_counter() - start
+    print(f'cpus={os.cpu_count()} depth={opt.depth} sequential: {sequential:.2f}s')
+
+    base = None
+    for workers in opt.workers:
+        with ProcessPoolExecutor(workers) as executor:
+            # start the workers before timing
+            list(executor.map(abs, range(workers)))
+            start = time.perf_counter()
+            values = [parallel_minimax(board, opt.depth, max_player, None, EVALUATOR, executor,
+                                       alpha_beta=opt.alpha_beta)[0] for board, max_player in positions]
+            seconds = time.perf_counter() - start
+        assert all(abs(a - b) < 1e-9 for a, b in zip(values, expected)), 'parallel values differ'
+        base = base or seconds
+        print(f'workers={workers}: {seconds:.2f}s speedup={base / seconds:.2f}x vs 1 worker, '
+              f'{sequential / seconds:.2f}x vs sequential')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--positions', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--alpha_beta', action='store_true')
+    main(parser.parse_args())
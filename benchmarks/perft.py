@@ -0,0 +1,165 @@
+"""
+Perft: count the leaf nodes of the full move tree to a fixed depth and check them against the counts recorded
+in perft_positions.json. Any change of Board.get_valid_moves, Board.move/remove, make/unmake_move or
+get_all_moves that changes the rules shows up as a wrong count.
+
+Every move generation backend is counted and timed, followed by minimax searches at fixed depths, and the
+peak memory of each run is measured. --json writes everything as one JSON document (- for stdout) to compare
+between releases; the exit status is 1 when a count is wrong.
+
+    python -m benchmarks.perft --depth 6 --json perft.json
+    python -m benchmarks.perft --record --depth 7      # after an intended rules change
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from minimax import minimax, SearchStats
+from minimax.algorithm import generate_moves, get_all_moves
+from benchmarks.search_nodes import EVALUATOR
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+POSITIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perft_positions.json')
+BACKENDS = ('board', 'bitboard', 'copy')
+
+
+def perft(board, depth, max_player):
+    """Leaf nodes of the move tree of a Board or BitBoard, searched in place with make_move/unmake_move"""
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in generate_moves(board, WHITE if max_player else RED):
+        record = board.make_move(*move)
+        nodes += perft(board, depth - 1, not max_player)
+        board.unmake_move(record)
+    return nodes
+
+
+def perft_copy(board, depth, max_player):
+    """Leaf nodes of the move tree of a Board, built with get_all_moves (a deepcopy per child)"""
+    if depth == 0:
+        return 1
+    return sum(perft_copy(child, depth - 1, not max_player)
+               for child in get_all_moves(board, WHITE if max_player else RED, None))
+
+
+def load_positions(path=POSITIONS):
+    with open(path) as file:
+        return json.load(file)['positions']
+
+
+def make_board(position, backend):
+    bitboard = BitBoard(int(position['red'], 16), int(position['white'], 16), int(position['kings'], 16))
+    return bitboard if backend == 'bitboard' else bitboard.to_board()
+
+
+def run_perft(position, backend, depth):
+    """Count the position to depth, then count it again under tracemalloc for the peak memory"""
+    count = perft_copy if backend == 'copy' else perft
+    max_player = position['to_move'] == 'white'
+    board = make_board(position, backend)
+    start = time.perf_counter()
+    nodes = count(board, depth, max_player)
+    seconds = time.perf_counter() - start
+
+    board = make_board(position, backend)
+    tracemalloc.start()
+    count(board, depth, max_player)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return nodes, seconds, peak
+
+
+def run_search(position, depth, alpha_beta):
+    board = make_board(position, 'board')
+    stats = SearchStats()
+    start = time.perf_counter()
+    value = minimax(board, depth, position['to_move'] == 'white', None, EVALUATOR, alpha_beta=alpha_beta,
+                    stats=stats)[0]
+    return value, stats, time.perf_counter() - start
+
+
+def record(opt, positions):
+    """Store the counts of every position to --depth, from the in place Board backend"""
+    for position in positions:
+        position['counts'] = [perft(make_board(position, 'board'), depth, position['to_move'] == 'white')
+                              for depth in range(1, opt.depth + 1)]
+        print(f"{position['name']:12} {position['counts']}")
+    with open(opt.positions, 'w') as file:
+        # one position per line keeps the file easy to diff
+        lines = [' ' + json.dumps(position) for position in positions]
+        file.write('{"positions": [\n' + ',\n'.join(lines) + '\n]}\n')
+
+
+def main(opt):
+    positions = load_positions(opt.positions)
+    if opt.record:
+        record(opt, positions)
+        return 0
+
+    report = {'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'platform': platform.platform(), 'perft': [], 'search': []}
+    failures = 0
+    for position in positions:
+        for backend in opt.backends:
+            max_depth = min(opt.depth if backend != 'copy' else opt.copy_depth, len(position['counts']))
+            for depth in range(1, max_depth + 1):
+                nodes, seconds, peak = run_perft(position, backend, depth)
+                expected = position['counts'][depth - 1]
+                failures += nodes != expected
+                report['perft'].append({'position': position['name'], 'backend': backend, 'depth': depth,
+                                        'nodes': nodes, 'expected': expected, 'ok': nodes == expected,
+                                        'seconds': seconds, 'nodes_per_second': nodes / max(seconds, 1e-9),
+                                        'peak_memory_bytes': peak})
+            entry = report['perft'][-1]
+            print(f"perft {position['name']:12} {backend:8} depth={entry['depth']} nodes={entry['nodes']:9d} "
+                  f"{'ok' if entry['ok'] else 'WRONG, expected ' + str(entry['expected'])} "
+                  f"{entry['nodes_per_second']:10.0f} nodes/s peak={entry['peak_memory_bytes'] / 1024:.0f}kB",
+                  file=sys.stderr)
+
+        for depth in opt.search_depths:
+            for alpha_beta in (False, True):
+                value, stats, seconds = run_search(position, depth, alpha_beta)
+                report['search'].append({'position': position['name'], 'depth': depth, 'alpha_beta': alpha_beta,
+                                         'value': value, 'nodes': stats.nodes, 'seconds': seconds,
+                                         'nodes_per_second': stats.nodes / max(seconds, 1e-9)})
+                print(f"search {position['name']:12} depth={depth} alpha_beta={alpha_beta!s:5} "
+                      f"nodes={stats.nodes:8d} {stats.nodes / max(seconds, 1e-9):10.0f} nodes/s", file=sys.stderr)
+
+    if resource is not None:
+        # kilobytes on Linux, bytes on macOS
+        report['max_rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report['failures'] = failures
+    if opt.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif opt.json:
+        with open(opt.json, 'w') as file:
+            json.dump(report, file, indent=2)
+    print(f'{failures} wrong counts', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, default=5, help='perft depth of the board and bitboard backends')
+    parser.add_argument('--copy_depth', type=int, default=4, help='perft depth of the slower get_all_moves backend')
+    parser.add_argument('--backends', type=str, nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--search_depths', type=int, nargs='*', default=[3, 4],
+                        help='fixed minimax depths whose throughput is measured')
+    parser.add_argument('--positions', type=str, default=POSITIONS, help='JSON file of positions and counts')
+    parser.add_argument('--json', type=str, default=None, help='write the report to this file, - for stdout')
+    parser.add_argument('--record', action='store_true',
+                        help='recount every position to --depth and store the counts instead of checking them')
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+"""
+Memory of a Board and its pieces, the cost of copying it and the speed of move generation on it.
+
+    python -m benchmarks.piece_memory
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+
+from checkers.board import Board
+from checkers.constants import RED, WHITE
+from minimax.algorithm import generate_moves, get_all_moves
+from benchmarks.search_nodes import fixed_positions
+
+
+def piece_size(piece):
+    """Bytes of one piece object, with its attribute dict when it has one"""
+    size = sys.getsizeof(piece)
+    if hasattr(piece, '__dict__'):
+        size += sys.getsizeof(piece.__dict__)
+    return size
+
+
+def board_memory(count):
+    """Bytes allocated per start position Board"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    boards = [Board() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return allocated / len(boards)
+
+
+def rate(function, items, repeat):
+    """Items per second of calling function on every item, best of repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+def main(opt):
+    positions = fixed_positions(opt.positions, opt.seed)
+    piece = Board().get_all_pieces(RED)[0]
+    print(f'piece          : {piece_size(piece)} bytes')
+    print(f'board          : {board_memory(opt.boards):.0f} bytes allocated per start position')
+
+    boards = [board for board, max_player in positions]
+    print(f'deepcopy       : {rate(deepcopy, boards, opt.repeat):10.0f} boards/s')
+
+    moves = sum(len(generate_moves(board, color)) for board in boards for color in (RED, WHITE))
+    per_board = rate(lambda board: (generate_moves(board, RED), generate_moves(board, WHITE)), boards, opt.repeat)
+    print(f'generate_moves : {per_board * moves / len(boards):10.0f} moves/s')
+    per_board = rate(lambda board: (get_all_moves(board, RED, None), get_all_moves(board, WHITE, None)), boards,
+                     opt.repeat)
+    print(f'get_all_moves  : {per_board * moves / len(boards):10.0f} child boards/s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--positions', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--boards', type=int, default=1000, help='boards allocated for the memory measurement')
+    parser.add_argument('--repeat', type=int, default=5)
+    main(parser.parse_args())
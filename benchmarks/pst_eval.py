@@ -0,0 +1,117 @@
+"""
+Piece-square evaluator (minimax.pst) against the linear Evaluator: the incremental table sums against a full
+recount, the evaluation cost and search speed at the same depth on both backends, then a match of trained
+piece-square weights against the default material weights at the same depth.
+
+    python -m benchmarks.pst_eval --depth 4 --load_weights checkpoints/ --games 40
+
+It exits with status 1 when an incremental sum differs from the recount.
+"""
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from minimax import minimax, SearchStats
+from minimax.algorithm import generate_moves
+from minimax.checkpoint import load_checkpoint
+from minimax.evaluator import make_evaluator
+from minimax.pst import FEATURES
+from minimax.selfplay import EngineConfig, play_game, DEFAULT_WEIGHTS
+from benchmarks.search_nodes import fixed_positions
+from tournament import elo_difference
+
+
+def check_incremental(games, seed):
+    """
+    Play random moves, taking some back, with random table weights and compare the running sums of both backends
+    with a recount on a fresh board.
+    :return: (positions checked, largest difference)
+    """
+    rng = random.Random(seed)
+    evaluator = make_evaluator([rng.gauss(0, 1) for _ in range(FEATURES)])
+    checked, worst = 0, 0.0
+    for board, _ in fixed_positions(games, seed):
+        for position in (board, BitBoard.from_board(board)):
+            max_player, records = False, []
+            for _ in range(100):
+                fresh = BitBoard.from_board(position) if not isinstance(position, BitBoard) else (
+                    BitBoard(position.red, position.white, position.kings))
+                worst = max(worst, abs(evaluator.evaluate(position) - evaluator.evaluate(fresh)))
+                checked += 1
+                moves = generate_moves(position, WHITE if max_player else RED)
+                if not moves or position.winner() is not None:
+                    break
+                if records and rng.random() < 0.3:
+                    position.unmake_move(records.pop())
+                else:
+                    records.append(position.make_move(*rng.choice(moves)))
+                max_player = not max_player
+    return checked, worst
+
+
+def search_speed(evaluator, positions, depth):
+    stats = SearchStats(timed=True)
+    for board, max_player in positions:
+        minimax(board, depth, max_player, None, evaluator, alpha_beta=True, stats=stats)
+    return stats
+
+
+def match_game(args):
+    """Worker side: one game at equal depth, the piece-square engine takes white in the even games; its score"""
+    index, weights, depth, random_plies = args
+    tables = EngineConfig(depth, weights, name='pst')
+    linear = EngineConfig(depth, DEFAULT_WEIGHTS, name='linear')
+    tables_white = index % 2 == 0
+    white, red = (tables, linear) if tables_white else (linear, tables)
+    result = play_game(white, red, random_plies, seed=index // 2)
+    if result.winner is None:
+        return 0.5
+    return 1.0 if (result.winner == WHITE) == tables_white else 0.0
+
+
+def main(opt):
+    checked, worst = check_incremental(opt.positions, opt.seed)
+    print(f'incremental table sums: {checked} positions, largest difference to a recount {worst:.2e}')
+
+    weights = load_checkpoint(opt.load_weights)['weights'] if opt.load_weights else None
+    evaluators = {'linear': make_evaluator(DEFAULT_WEIGHTS), 'pst': make_evaluator(weights, 'pst')}
+    for backend in ('board', 'bitboard'):
+        positions = fixed_positions(opt.positions, opt.seed)
+        if backend == 'bitboard':
+            positions = [(BitBoard.from_board(board), max_player) for board, max_player in positions]
+        for name, evaluator in evaluators.items():
+            stats = search_speed(evaluator, positions, opt.depth)
+            print(f'{backend:8} {name:6} depth={opt.depth}: {stats.nodes_per_second:8.0f} nodes/s '
+                  f'{stats.eval_seconds / max(stats.leaves, 1) * 1e6:6.1f}us/evaluation '
+                  f'eval share {stats.eval_seconds / stats.seconds:.0%}')
+
+    if opt.games and weights is None:
+        print('no match: give --load_weights with trained piece-square weights')
+    elif opt.games:
+        jobs = [(index, weights, opt.depth, opt.random_plies) for index in range(opt.games)]
+        start = time.perf_counter()
+        with ProcessPoolExecutor(opt.workers or None) as executor:
+            scores = list(executor.map(match_game, jobs))
+        wins, draws = scores.count(1.0), scores.count(0.5)
+        score = sum(scores) / len(scores)
+        print(f'pst vs linear at depth {opt.depth}: +{wins} ={draws} -{len(scores) - wins - draws} '
+              f'score={score:.3f} elo={elo_difference(score):+.1f} ({time.perf_counter() - start:.0f}s)')
+    if worst > 1e-9:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, default=4, help='search depth of the speed test and the match')
+    parser.add_argument('--positions', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--load_weights', type=str, default=None,
+                        help='checkpoint (file or directory) with trained piece-square weights')
+    parser.add_argument('--games', type=int, default=40, help='games of the match, 0 skips it')
+    parser.add_argument('--random_plies', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=0, help='game processes, 0 uses every cpu')
+    main(parser.parse_args())
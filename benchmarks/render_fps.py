@@ -0,0 +1,98 @@
+"""
+Frames per second and CPU time per frame of the full redraw (draw_board, draw_valid_moves and a whole display
+update every frame, as Game.update did) against the dirty rectangle Renderer. Both first draw the frames of a
+random game and must leave the same pixels in the window.
+
+The board changes every --change_every frames, as in a game where a move is played now and then: 1 is a move every
+frame (ai2ai self-play), 0 a board that never changes (a person thinking).
+
+    python -m benchmarks.render_fps --frames 600 --change_every 30
+    python -m benchmarks.render_fps --headless      # without a screen, SDL's dummy video driver
+"""
+import argparse
+import os
+import random
+import time
+
+from checkers.board import Board
+from checkers.constants import WIDTH, HEIGHT, RED, WHITE
+from minimax.algorithm import generate_moves, apply_move
+
+
+def game_frames(count, seed):
+    """(board, valid move markers) of the positions of a random game, the markers of a randomly selected piece"""
+    rng = random.Random(seed)
+    board = Board()
+    max_player = False
+    frames = []
+    while len(frames) < count:
+        moves = generate_moves(board, WHITE if max_player else RED)
+        if not moves:
+            board, max_player = Board(), False
+            continue
+        piece = rng.choice(moves)[0]
+        frames.append((board, dict(board.get_valid_moves(piece))))
+        board = apply_move(board, *rng.choice(moves))
+        max_player = not max_player
+    return frames
+
+
+def full_redraw(render, win):
+    def draw(board, valid_moves):
+        render.draw_board(win, board)
+        render.draw_valid_moves(win, valid_moves)
+        render.update_display()
+    return draw
+
+
+def check(render, pygame, win, frames):
+    """Both ways of drawing give the same window after every frame"""
+    renderer = render.Renderer(win)
+    reference = pygame.Surface((WIDTH, HEIGHT))
+    draw = full_redraw(render, reference)
+    for index, (board, valid_moves) in enumerate(frames):
+        draw(board, valid_moves)
+        renderer.draw(board, valid_moves)
+        assert pygame.image.tostring(win, 'RGB') == pygame.image.tostring(reference, 'RGB'), f'frame {index} differs'
+
+
+def run(draw, frames, count, change_every):
+    """Wall and CPU seconds of drawing count frames"""
+    start, cpu = time.perf_counter(), time.process_time()
+    for index in range(count):
+        position = index // change_every if change_every > 0 else 0
+        draw(*frames[position % len(frames)])
+    return time.perf_counter() - start, time.process_time() - cpu
+
+
+def main(opt):
+    if opt.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    import pygame
+    from checkers import render
+
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    frames = game_frames(max(opt.frames // max(opt.change_every, 1) + 1, opt.check_frames), opt.seed)
+    check(render, pygame, win, frames[:opt.check_frames])
+    print(f'{opt.check_frames} frames: full redraw and renderer draw the same pixels')
+
+    results = {}
+    for name, draw in (('full redraw', full_redraw(render, win)), ('dirty rects', render.Renderer(win).draw)):
+        seconds, cpu = run(draw, frames, opt.frames, opt.change_every)
+        results[name] = seconds
+        print(f'{name:12}: {opt.frames / seconds:9.0f} frames/s, {cpu / opt.frames * 1000:7.3f} ms CPU/frame')
+    print(f"speedup {results['full redraw'] / results['dirty rects']:.1f}x")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--change_every', type=int, default=30,
+                        help='frames between two moves, 1 moves every frame and 0 never changes the board')
+    parser.add_argument('--check_frames', type=int, default=200, help='frames compared pixel by pixel')
+    parser.add_argument('--headless', action='store_true', help='use the dummy video driver, no window appears')
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,69 @@
+"""
+Compare plain minimax with alpha-beta on a fixed set of positions.
+Checks that both return the same value and reports how many nodes each one visits.
+
+    python -m benchmarks.search_nodes --depth 4
+"""
+import argparse
+import random
+import time
+
+from checkers.board import Board
+from checkers.constants import RED, WHITE
+from minimax import minimax, SearchStats, Evaluator
+from minimax.algorithm import generate_moves
+from minimax.transposition import TranspositionTable
+
+WEIGHTS = [0.1, -1.0, 1.0, -0.5, 0.5, 0.3, -0.3]
+EVALUATOR = Evaluator(WEIGHTS)
+
+
+def fixed_positions(count=12, seed=0):
+    """Positions reached by seeded random play from the start position, searched with the EVALUATOR weights."""
+    rng = random.Random(seed)
+    positions = []
+    for i in range(count):
+        board = Board()
+        max_player = False
+        for _ in range(rng.randint(0, 30)):
+            moves = generate_moves(board, WHITE if max_player else RED)
+            if not moves or board.winner() is not None:
+                break
+            board.make_move(*rng.choice(moves))
+            max_player = not max_player
+        positions.append((board, max_player))
+    return positions
+
+
+def main(opt):
+    totals = {False: [0, 0.0], True: [0, 0.0]}
+    for index, (board, max_player) in enumerate(fixed_positions(opt.positions, opt.seed)):
+        values = {}
+        for alpha_beta in (False, True):
+            stats = SearchStats()
+            table = TranspositionTable(opt.tt_mb, opt.tt_policy) if alpha_beta and opt.tt_mb > 0 else None
+            start = time.perf_counter()
+            values[alpha_beta] = minimax(board, opt.depth, max_player, None, EVALUATOR, bitboard=opt.bitboard,
+                                         alpha_beta=alpha_beta, stats=stats, table=table)[0]
+            totals[alpha_beta][0] += stats.nodes
+            totals[alpha_beta][1] += time.perf_counter() - start
+            print(f'position {index:2d} alpha_beta={alpha_beta!s:5} value={values[alpha_beta]: .4f} {stats} '
+                  f'{table if table is not None else ""}')
+        assert abs(values[False] - values[True]) < 1e-9, f'position {index}: values differ'
+
+    nodes, seconds = totals[False]
+    pruned_nodes, pruned_seconds = totals[True]
+    print(f'minimax   : {nodes} nodes in {seconds:.2f}s')
+    print(f'alphabeta : {pruned_nodes} nodes in {pruned_seconds:.2f}s '
+          f'({nodes / max(pruned_nodes, 1):.1f}x fewer nodes)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--positions', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bitboard', action='store_true')
+    parser.add_argument('--tt_mb', type=float, default=0, help='give the alpha-beta search a transposition table')
+    parser.add_argument('--tt_policy', type=str, default='depth')
+    main(parser.parse_args())
@@ -0,0 +1,27 @@
+import argparse
+
+from minimax.book import build_book
+from minimax.checkpoint import load_checkpoint
+from minimax.selfplay import DEFAULT_WEIGHTS
+
+
+def main(opt):
+    weights = load_checkpoint(opt.load_weights)['weights'] if opt.load_weights else opt.weights
+    build_book(opt.output, opt.plies, opt.depth, weights, opt.max_pieces, opt.workers)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the opening book and endgame file of main.py --book')
+    parser.add_argument('--output', type=str, default='book.bin')
+    parser.add_argument('--plies', type=int, default=4,
+                        help='search every position up to this many moves from the start, 0 for no openings')
+    parser.add_argument('--depth', type=int, default=6, help='alpha-beta depth of the opening searches')
+    parser.add_argument('--weights', type=float, nargs=7, default=list(DEFAULT_WEIGHTS),
+                        help='evaluation weights of the opening searches')
+    parser.add_argument('--load_weights', type=str, default=None,
+                        help='take the weights of the opening searches from this checkpoint (file or directory)')
+    parser.add_argument('--max_pieces', type=int, default=3,
+                        help='solve every endgame with at most this many pieces, 0 for no endgames')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes of the opening searches, 0 searches in this process')
+    main(parser.parse_args())
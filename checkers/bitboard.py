@@ -0,0 +1,261 @@
+from .constants import ROWS, COLS, RED, WHITE
+from .tables import SQUARES, UP, DOWN, NEIGHBOURS, JUMPS, RED_MAN, WHITE_MAN, square_to_row_col
+
+'''Bit n of a mask is set when square n (see checkers.tables) holds a piece.'''
+BACK_RANKS = 0xF000000F
+'''white starts on the first three rows, red on the last three'''
+START_WHITE = 0x00000FFF
+START_RED = 0xFFF00000
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+class BitBoard:
+    """
+    Compact board: three 32 bit masks for the red pieces, the white pieces and the kings.
+    It follows the rules of checkers.board.Board move for move, so both backends search the same tree.
+    """
+    __slots__ = ('red', 'white', 'kings', '_threaten_reds', '_threaten_whites', '_threats_stale', '_pst',
+                 '_pst_score')
+
+    def __init__(self, red=0, white=0, kings=0):
+        self.red = red
+        self.white = white
+        self.kings = kings
+        self._threaten_reds = self._threaten_whites = 0
+        self._threats_stale = True
+        '''piece-square table the running _pst_score belongs to, see pst_score'''
+        self._pst = None
+        self._pst_score = 0.0
+
+    @classmethod
+    def start(cls):
+        """The start position of Board.create_board"""
+        return cls(START_RED, START_WHITE, 0)
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Build a bitboard from a checkers.board.Board
+        :param board:
+        :return:
+        """
+        return cls(*board.masks())
+
+    def to_board(self):
+        """
+        Build a checkers.board.Board holding the same position
+        :return:
+        """
+        from .board import Board
+        from .piece import Piece
+
+        board = Board()
+        board.board = [[0] * COLS for _ in range(ROWS)]
+        for square in range(SQUARES):
+            bit = 1 << square
+            if (self.red | self.white) & bit:
+                row, col = square_to_row_col(square)
+                piece = Piece(row, col, RED if self.red & bit else WHITE)
+                if self.kings & bit:
+                    piece.make_king()
+                board.board[row][col] = piece
+        board.red_left, board.white_left = self.red_left, self.white_left
+        board.red_kings, board.white_kings = self.red_kings, self.white_kings
+        return board
+
+    def copy(self):
+        bitboard = BitBoard(self.red, self.white, self.kings)
+        bitboard._threaten_reds = self._threaten_reds
+        bitboard._threaten_whites = self._threaten_whites
+        bitboard._threats_stale = self._threats_stale
+        bitboard._pst = self._pst
+        bitboard._pst_score = self._pst_score
+        return bitboard
+
+    @property
+    def threaten_reds(self):
+        """Number of red pieces white can capture with its next move"""
+        if self._threats_stale:
+            self.calculate_threatens()
+        return self._threaten_reds
+
+    @property
+    def threaten_whites(self):
+        """Number of white pieces red can capture with its next move"""
+        if self._threats_stale:
+            self.calculate_threatens()
+        return self._threaten_whites
+
+    @property
+    def red_left(self):
+        return popcount(self.red)
+
+    @property
+    def white_left(self):
+        return popcount(self.white)
+
+    @property
+    def red_kings(self):
+        return popcount(self.red & self.kings)
+
+    @property
+    def white_kings(self):
+        return popcount(self.white & self.kings)
+
+    def pst_score(self, table):
+        """
+        Sum of table[kind][square] over the pieces (kinds of checkers.tables). It is computed once, then move and
+        remove keep it up to date until another table is asked for, so it costs O(1) per position of a search.
+        :param table: tuple of 4 tuples of 32 values, compared by identity
+        :return:
+        """
+        if self._pst is not table:
+            self._pst = table
+            self._pst_score = sum(table[self._kind(1 << square)][square] for square in range(SQUARES)
+                                  if (self.red | self.white) >> square & 1)
+        return self._pst_score
+
+    def _kind(self, bit):
+        return (RED_MAN if self.red & bit else WHITE_MAN) + bool(self.kings & bit)
+
+    def get_all_pieces(self, color):
+        """Return the squares of all pieces of the color"""
+        mask = self.red if color == RED else self.white
+        return [square for square in range(SQUARES) if mask >> square & 1]
+
+    def move(self, square, target):
+        """Move the piece on square to target and check the king condition."""
+        bit, target_bit = 1 << square, 1 << target
+        if self._pst is not None:
+            kind = self._kind(bit)
+            crowned = kind | 1 if target_bit & BACK_RANKS else kind
+            self._pst_score += self._pst[crowned][target] - self._pst[kind][square]
+        if self.red & bit:
+            self.red ^= bit | target_bit
+        else:
+            self.white ^= bit | target_bit
+        if self.kings & bit or target_bit & BACK_RANKS:
+            self.kings = (self.kings & ~bit) | target_bit
+        self._threats_stale = True
+
+    def remove(self, captured):
+        """Remove the pieces of the captured mask"""
+        if self._pst is not None:
+            mask = captured & (self.red | self.white)
+            while mask:
+                bit = mask & -mask
+                self._pst_score -= self._pst[self._kind(bit)][bit.bit_length() - 1]
+                mask ^= bit
+        self.red &= ~captured
+        self.white &= ~captured
+        self.kings &= ~captured
+        self._threats_stale = True
+
+    def make_move(self, square, target, skip):
+        """
+        Play the move in place and return the record unmake_move needs to take it back.
+        :param square:
+        :param target:
+        :param skip: mask of the captured pieces
+        :return:
+        """
+        record = (self.red, self.white, self.kings, self._threaten_reds, self._threaten_whites, self._threats_stale,
+                  self._pst, self._pst_score)
+        self.move(square, target)
+        if skip:
+            self.remove(skip)
+        return record
+
+    def unmake_move(self, record):
+        (self.red, self.white, self.kings, self._threaten_reds, self._threaten_whites, self._threats_stale,
+         self._pst, self._pst_score) = record
+
+    def winner(self):
+        if not self.red:
+            return WHITE
+        elif not self.white:
+            return RED
+        return None
+
+    def get_valid_moves(self, square):
+        """
+        Return a dict mapping every target square of the piece to the mask of pieces it captures.
+        :param square:
+        :return:
+        """
+        bit = 1 << square
+        if self.red & bit:
+            own, other = self.red, self.white
+            directions = UP + DOWN if self.kings & bit else UP
+        else:
+            own, other = self.white, self.red
+            directions = UP + DOWN if self.kings & bit else DOWN
+
+        occupied = own | other
+        moves = {}
+        for direction in directions:
+            over = NEIGHBOURS[square][direction]
+            if over < 0:
+                continue
+            over_bit = 1 << over
+            if not occupied & over_bit:
+                moves[over] = 0
+            elif other & over_bit and JUMPS[square][direction] is not None:
+                landing = JUMPS[square][direction][1]
+                if not occupied >> landing & 1:
+                    self._add_jumps(moves, landing, over_bit, other, occupied, UP if direction in UP else DOWN)
+        return moves
+
+    def _add_jumps(self, moves, landing, captured, other, occupied, directions):
+        """
+        Add a capture landing on the landing square and the chains that continue from it, depth first.
+        As in Board, a chain never turns around, a later jump only records the last two captured pieces and
+        an upward chain can not land on the first row.
+        """
+        stack = [(landing, captured, captured)]
+        while stack:
+            square, skipped, last = stack.pop()
+            moves[square] = skipped
+            chains = []
+            for direction in directions:
+                jump = JUMPS[square][direction]
+                if jump is None or (directions is UP and jump[1] < 4):
+                    continue
+                over, landing = jump
+                if other >> over & 1 and not occupied >> landing & 1:
+                    chains.append((landing, 1 << over | last, 1 << over))
+            stack.extend(reversed(chains))
+
+    def calculate_threatens(self):
+        red_skips = white_skips = 0
+        for color in (RED, WHITE):
+            for square in self.get_all_pieces(color):
+                for skip in self.get_valid_moves(square).values():
+                    if color == RED:
+                        white_skips |= skip
+                    else:
+                        red_skips |= skip
+
+        self._threaten_whites = popcount(white_skips)
+        self._threaten_reds = popcount(red_skips)
+        self._threats_stale = False
+
+    def children(self, color):
+        """
+        Return the boards after every valid move of the color, in the same order as
+        minimax.algorithm.get_all_moves generates them for a Board.
+        :param color:
+        :return:
+        """
+        boards = []
+        for square in self.get_all_pieces(color):
+            for target, skip in self.get_valid_moves(square).items():
+                board = self.copy()
+                board.move(square, target)
+                if skip:
+                    board.remove(skip)
+                boards.append(board)
+        return boards
@@ -1,8 +1,10 @@
-import pygame
-from .constants import BLACK, ROWS, RED, SQUARE_SIZE, COLS, WHITE
+from .constants import ROWS, RED, COLS, WHITE
 from .piece import Piece
-import random
-from minimax import optimizer
+from .tables import UP, DOWN, NEIGHBOURS, JUMPS, POSITIONS, piece_kind, row_col_to_square
+from collections import namedtuple
+
+'''everything unmake_move needs to take a move back'''
+MoveRecord = namedtuple('MoveRecord', ['piece', 'row', 'col', 'skipped', 'promoted', 'counters'])
 
 
 class Board:
@@ -10,42 +12,17 @@ class Board:
         self.board = []
         self.red_left = self.white_left = 12
         self.red_kings = self.white_kings = 0
-        self.threaten_reds = self.threaten_whites = 0
-
-        '''weights for optimizing the evaluate function'''
-        self.bias = random.gauss(0, 1)
-        self.weight_red = random.gauss(0, 1)
-        self.weight_white = random.gauss(0, 1)
-        self.weight_white_king = random.gauss(0, 1)
-        self.weight_red_king = random.gauss(0, 1)
-        self.weight_threaten_red = random.gauss(0, 1)
-        self.weight_threaten_white = random.gauss(0, 1)
+        '''threatened piece counts, only computed when they are read after the position changed'''
+        self._threaten_reds = self._threaten_whites = 0
+        self._threats_stale = True
+        '''piece-square table the running _pst_score belongs to, see pst_score'''
+        self._pst = None
+        self._pst_score = 0.0
+        '''(red, white, kings) masks once masks() was asked for, then kept up to date like _pst_score'''
+        self._masks = None
 
         self.create_board()
 
-    def draw_squares(self, win):
-        """
-        Draw squares in the game window.
-        :param win:
-        :return:
-        """
-        win.fill(BLACK)
-
-        for row in range(ROWS):
-            for col in range(row % 2, ROWS, 2):
-                pygame.draw.rect(win, RED, (row * SQUARE_SIZE, col * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-    def evaluate(self):
-        """
-        Evaluation function for AI player!
-        :return:
-        """
-        # return self.white_left - self.red_left + (self.white_kings * 0.5 - self.red_kings * 0.5)
-        return self.bias + (self.weight_red * self.red_left) + (self.weight_white * self.white_left) + (
-                self.weight_red_king * self.red_kings) + (self.weight_white_king * self.white_kings) + (
-                       self.weight_threaten_red * self.threaten_reds) + (
-                       self.weight_threaten_white * self.threaten_whites)
-
     def get_all_pieces(self, color):
         """Return all pieces"""
         pieces = []
@@ -57,15 +34,67 @@ class Board:
 
     def move(self, piece, row, col):
         """Move the piece to the new row and column and check the king condition."""
+        table = self._pst
+        square = row_col_to_square(piece.row, piece.col)
+        if table is not None:
+            self._pst_score -= table[piece_kind(piece.color, piece.king)][square]
         self.board[piece.row][piece.col], self.board[row][col] = self.board[row][col], self.board[piece.row][piece.col]
         piece.move(row, col)
+        self._threats_stale = True
 
-        if row == ROWS - 1 or row == 0:
+        if (row == ROWS - 1 or row == 0) and not piece.king:
             piece.make_king()
             if piece.color == WHITE:
                 self.white_kings += 1
             else:
                 self.red_kings += 1
+        target = row_col_to_square(row, col)
+        if table is not None:
+            self._pst_score += table[piece_kind(piece.color, piece.king)][target]
+        if self._masks is not None:
+            red, white, kings = self._masks
+            if piece.color == RED:
+                red ^= 1 << square | 1 << target
+            else:
+                white ^= 1 << square | 1 << target
+            if piece.king:
+                kings = kings & ~(1 << square) | 1 << target
+            self._masks = red, white, kings
+
+    def make_move(self, piece, move, skip):
+        """
+        Play the move in place and return the MoveRecord unmake_move needs to take it back.
+        :param piece:
+        :param move: (row, col) of the target square
+        :param skip: captured pieces
+        :return:
+        """
+        row, col = move
+        record = MoveRecord(piece, piece.row, piece.col, skip, not piece.king and (row == ROWS - 1 or row == 0),
+                            (self.red_left, self.white_left, self.red_kings, self.white_kings,
+                             self._threaten_reds, self._threaten_whites, self._threats_stale, self._pst,
+                             self._pst_score, self._masks))
+        self.move(piece, row, col)
+        if skip:
+            self.remove(skip)
+        return record
+
+    def unmake_move(self, record):
+        """
+        Take back the move of the record, restoring captured pieces, the king flag and the counters.
+        :param record:
+        :return:
+        """
+        piece = record.piece
+        self.board[piece.row][piece.col], self.board[record.row][record.col] = 0, piece
+        piece.move(record.row, record.col)
+        if record.promoted:
+            piece.king = False
+        for captured in record.skipped:
+            self.board[captured.row][captured.col] = captured
+        (self.red_left, self.white_left, self.red_kings, self.white_kings,
+         self._threaten_reds, self._threaten_whites, self._threats_stale, self._pst,
+         self._pst_score, self._masks) = record.counters
 
     def get_piece(self, row, col):
         """
@@ -91,23 +120,62 @@ class Board:
                 else:
                     self.board[row].append(0)
 
-    def draw(self, win):
-        """Draw all pieces on the board Game!"""
-        self.draw_squares(win)
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece != 0:
-                    piece.draw(win)
-
     def remove(self, pieces):
+        self._threats_stale = True
+        table = self._pst
         for piece in pieces:
             self.board[piece.row][piece.col] = 0
             if piece != 0:
+                square = row_col_to_square(piece.row, piece.col)
+                if table is not None:
+                    self._pst_score -= table[piece_kind(piece.color, piece.king)][square]
+                if self._masks is not None:
+                    self._masks = tuple(mask & ~(1 << square) for mask in self._masks)
                 if piece.color == RED:
                     self.red_left -= 1
+                    self.red_kings -= piece.king
                 else:
                     self.white_left -= 1
+                    self.white_kings -= piece.king
+
+    def masks(self):
+        """
+        (red, white, kings) masks of the position, bit n set for a piece on square n as in BitBoard. They are
+        computed once, then move and remove keep them up to date, so they cost O(1) per position of a search.
+        :return:
+        """
+        if self._masks is None:
+            self._masks = self.scan_masks()
+        return self._masks
+
+    def scan_masks(self):
+        """masks() computed from the squares"""
+        red = white = kings = 0
+        board = self.board
+        for square, (row, col) in enumerate(POSITIONS):
+            piece = board[row][col]
+            if piece != 0:
+                bit = 1 << square
+                if piece.color == RED:
+                    red |= bit
+                else:
+                    white |= bit
+                if piece.king:
+                    kings |= bit
+        return red, white, kings
+
+    def pst_score(self, table):
+        """
+        Sum of table[kind][square] over the pieces (kinds of checkers.tables). It is computed once, then move and
+        remove keep it up to date until another table is asked for, so it costs O(1) per position of a search.
+        :param table: tuple of 4 tuples of 32 values, compared by identity
+        :return:
+        """
+        if self._pst is not table:
+            self._pst = table
+            self._pst_score = sum(table[piece_kind(piece.color, piece.king)][row_col_to_square(piece.row, piece.col)]
+                                  for row in self.board for piece in row if piece != 0)
+        return self._pst_score
 
     def winner(self):
         if self.red_left <= 0:
@@ -117,91 +185,76 @@ class Board:
         return None
 
     def get_valid_moves(self, piece):
-        moves = {}
-        left = piece.col - 1
-        right = piece.col + 1
-        row = piece.row
-
-        if piece.color == RED or piece.king:
-            moves.update(self._traverse_left(row - 1, max(row - 3, -1), -1, piece.color, left))
-            moves.update(self._traverse_right(row - 1, max(row - 3, -1), -1, piece.color, right))
-        if piece.color == WHITE or piece.king:
-            moves.update(self._traverse_left(row + 1, min(row + 3, ROWS), 1, piece.color, left))
-            moves.update(self._traverse_right(row + 1, min(row + 3, ROWS), 1, piece.color, right))
-
-        return moves
+        """
+        Return a dict mapping every (row, col) the piece can move to to the list of pieces it captures there.
+        Jumps are not forced, a capture chain never turns around and only records the last two captured
+        pieces, and an upward chain can not land on the first row.
+        :param piece:
+        :return:
+        """
+        board = self.board
+        square = row_col_to_square(piece.row, piece.col)
+        if piece.king:
+            directions = UP + DOWN
+        else:
+            directions = UP if piece.color == RED else DOWN
 
-    def _traverse_left(self, start, stop, step, color, left, skipped=None):
-        if skipped is None:
-            skipped = []
         moves = {}
-        last = []
-        for r in range(start, stop, step):
-            if left < 0:
-                break
-
-            current = self.board[r][left]
-            if current == 0:  # if we found empty square
-                if skipped and not last:
-                    break
-                elif skipped:
-                    moves[(r, left)] = last + skipped
-                else:
-                    moves[(r, left)] = last
-
-                if last:
-                    if step == -1:
-                        row = max(r - 3, 0)
-                    else:
-                        row = min(r + 3, ROWS)
-
-                    moves.update(self._traverse_left(r + step, row, step, color, left - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, left + 1, skipped=last))
-                break
-            elif current.color == color:
-                break
-            else:
-                last = [current]
-
-            left -= 1
+        for direction in directions:
+            target = NEIGHBOURS[square][direction]
+            if target < 0:
+                continue
+            row, col = POSITIONS[target]
+            current = board[row][col]
+            if current == 0:
+                moves[(row, col)] = []
+            elif current.color != piece.color and JUMPS[square][direction] is not None:
+                landing = JUMPS[square][direction][1]
+                row, col = POSITIONS[landing]
+                if board[row][col] == 0:
+                    self._add_jumps(moves, landing, current, piece.color, UP if direction in UP else DOWN)
         return moves
 
-    def _traverse_right(self, start, stop, step, color, right, skipped=[]):
-        moves = {}
-        last = []
-        for r in range(start, stop, step):
-            if right >= COLS:
-                break
-
-            current = self.board[r][right]
-            if current == 0:  # if we found empty square
-                if skipped and not last:
-                    break
-                elif skipped:
-                    moves[(r, right)] = last + skipped
-                else:
-                    moves[(r, right)] = last
-
-                if last:
-                    if step == -1:
-                        row = max(r - 3, 0)
-                    else:
-                        row = min(r + 3, ROWS)
-
-                    moves.update(self._traverse_left(r + step, row, step, color, right - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, right + 1, skipped=last))
-                break
-            elif current.color == color:
-                break
-            else:
-                last = [current]
-
-            right += 1
-        return moves
+    def _add_jumps(self, moves, landing, captured, color, directions):
+        """
+        Add a capture landing on the landing square and every chain that continues from it, depth first
+        in the order of the directions.
+        """
+        board = self.board
+        stack = [(landing, [captured], captured)]
+        while stack:
+            square, skipped, last = stack.pop()
+            moves[POSITIONS[square]] = skipped
+            chains = []
+            for direction in directions:
+                jump = JUMPS[square][direction]
+                if jump is None or (directions is UP and jump[1] < 4):
+                    continue
+                over, landing = jump
+                row, col = POSITIONS[over]
+                current = board[row][col]
+                if current == 0 or current.color == color:
+                    continue
+                row, col = POSITIONS[landing]
+                if board[row][col] == 0:
+                    chains.append((landing, [current, last], current))
+            stack.extend(reversed(chains))
+
+    @property
+    def threaten_reds(self):
+        """Number of red pieces white can capture with its next move"""
+        if self._threats_stale:
+            self.calculate_threatens()
+        return self._threaten_reds
+
+    @property
+    def threaten_whites(self):
+        """Number of white pieces red can capture with its next move"""
+        if self._threats_stale:
+            self.calculate_threatens()
+        return self._threaten_whites
 
     def calculate_threatens(self):
-        self.threaten_reds = 0
-        self.threaten_whites = 0
         red_skips = []
         white_skips = []
 
@@ -215,28 +268,6 @@ class Board:
                     elif color == WHITE:
                         red_skips += skip
 
-        self.threaten_whites = len(set(white_skips))
-        self.threaten_reds = len(set(red_skips))
-
-    def optimize_weights(self, loss, lr):
-        self.bias = self.bias + lr * 1 * loss
-        self.weight_red = self.weight_red + lr * self.red_left * loss
-        self.weight_white = self.weight_white + lr * self.white_left * loss
-        self.weight_red_king = self.weight_red_king + lr * self.red_kings * loss
-        self.weight_white_king = self.weight_white_king + lr * self.white_kings * loss
-        self.weight_threaten_red = self.weight_threaten_red + lr * self.threaten_reds * loss
-        self.weight_threaten_white = self.weight_threaten_white + lr * self.threaten_whites * loss
-
-    def apply_weights(self, weights):
-
-        self.bias = weights[0]
-        self.weight_red = weights[1]
-        self.weight_white = weights[2]
-        self.weight_red_king = weights[3]
-        self.weight_white_king = weights[4]
-        self.weight_threaten_red = weights[5]
-        self.weight_threaten_white = weights[6]
-
-    def return_weights(self):
-        return [self.bias, self.weight_red, self.weight_white, self.weight_red_king, self.weight_white_king,
-                        self.weight_threaten_red, self.weight_threaten_white]
+        self._threaten_whites = len(set(white_skips))
+        self._threaten_reds = len(set(red_skips))
+        self._threats_stale = False
@@ -1,15 +1,14 @@
-import pygame
-
 WIDTH, HEIGHT = 800, 800
 ROWS, COLS = 8, 8
 SQUARE_SIZE = WIDTH // COLS
 
+'''colours of the players: small ints, so comparing them in the move generation is cheap'''
+RED, WHITE = 1, 2
+COLOR_NAMES = {RED: 'red', WHITE: 'white'}
+
 # RGB
-RED = (255, 0, 0)
-WHITE = (255, 255, 255)
+RED_RGB = (255, 0, 0)
+WHITE_RGB = (255, 255, 255)
 BLACK = (0, 0, 0)
 BLUE = (0, 0, 255)
 GREY = (128, 128, 128)
-
-CROWN = pygame.transform.scale(pygame.image.load('checkers/assets/crown.png'), (44, 25))
-
@@ -1,17 +1,24 @@
-import pygame
 from .board import Board
-from .constants import RED, WHITE, BLUE, SQUARE_SIZE
+from .constants import RED, WHITE
 
 
 class Game:
     def __init__(self, win):
         self._init()
         self.win = win
+        self.reset_listeners = []
+        self.renderer = None
 
     def update(self):
-        self.board.draw(self.win)
-        self.draw_valid_moves(self.valid_moves)
-        pygame.display.update()
+        """
+        Draw the squares that changed since the last update
+        :return:
+        """
+        if self.renderer is None:
+            from . import render
+
+            self.renderer = render.Renderer(self.win)
+        self.renderer.draw(self.board, self.valid_moves)
 
     def _init(self):
         """
@@ -25,10 +32,20 @@ class Game:
 
     def reset(self):
         """
-        Reset the initial values and restart the game
+        Reset the initial values and restart the game, then call the reset listeners
         :return:
         """
         self._init()
+        for listener in self.reset_listeners:
+            listener()
+
+    def on_reset(self, listener):
+        """
+        Call listener() after every reset, e.g. to cancel a search of the old position
+        :param listener:
+        :return:
+        """
+        self.reset_listeners.append(listener)
 
     def select(self, row, col):
         if self.selected:
@@ -62,11 +79,12 @@ class Game:
         :param moves:
         :return:
         """
-        for move in moves:
-            row, col = move
-            pygame.draw.circle(self.win, BLUE,
-                               (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2),
-                               15)
+        from . import render
+
+        render.draw_valid_moves(self.win, moves)
+        if self.renderer is not None:
+            # drawn behind the renderer's back, so it redraws everything next time
+            self.renderer.invalidate()
 
     def change_turn(self):
         self.valid_moves = {}
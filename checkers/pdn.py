@@ -0,0 +1,196 @@
+"""
+Text notation of positions, moves and game records, in the style of PDN (portable draughts notation).
+
+The dark squares are numbered 1 to 32 row by row from the top, four per row (square index + 1 of checkers.tables),
+so white starts on 1-12 and red, which moves first, on 21-32.
+
+Position (FEN), the side to move and the squares of each colour, K before a king:
+
+    R:W1,2,3,K10:R21,22,30
+
+Move: the squares of the path joined by '-' for a move and 'x' for a capture, e.g. 22-18 or 25x18x11. Only the
+first and the last square are needed to find the move.
+
+Game record: tag pairs, then the moves with optional move numbers and {comments}, ended by a result
+(1-0 red won, 0-1 white won, 1/2-1/2, *). A [FEN "..."] tag sets the start position. A line holding only a
+FEN outside of a game is a record of its own, without moves, which is the format the analysis writes.
+
+    [Event "club night"]
+    1. 22-18 11-15 2. 18x11 8x15 *
+"""
+import re
+from collections import namedtuple
+
+from .bitboard import BitBoard
+from .board import Board
+from .constants import RED, WHITE
+from .tables import SQUARES, POSITIONS, row_col_to_square
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+_TAG = re.compile(r'\[\s*(\w+)\s+"([^"]*)"\s*\]')
+_FEN = re.compile(r'^[RW]:[RW][K\d,]*:[RW][K\d,]*$')
+_MOVE = re.compile(r'^\d+(?:[-x]\d+)+$')
+_MOVE_NUMBER = re.compile(r'^\d+\.+$')
+
+'''one record of a file: byte offset of its first line, tags, start position (FEN or None) and move texts'''
+GameRecord = namedtuple('GameRecord', ['offset', 'tags', 'fen', 'moves'])
+
+
+class NotationError(ValueError):
+    """A position, move or game record that can not be read or played."""
+
+
+def square_number(row, col):
+    return row_col_to_square(row, col) + 1
+
+
+def square_position(number):
+    if not 1 <= number <= SQUARES:
+        raise NotationError(f'no square {number}')
+    return POSITIONS[number - 1]
+
+
+def to_fen(board, max_player):
+    """
+    Position text of a Board or BitBoard.
+    :param board:
+    :param max_player: True when white is to move
+    :return:
+    """
+    bitboard = board if isinstance(board, BitBoard) else BitBoard.from_board(board)
+    fields = []
+    for letter, mask in (('W', bitboard.white), ('R', bitboard.red)):
+        squares = [('K' if bitboard.kings >> square & 1 else '') + str(square + 1)
+                   for square in range(SQUARES) if mask >> square & 1]
+        fields.append(letter + ','.join(squares))
+    return ('W' if max_player else 'R') + ':' + ':'.join(fields)
+
+
+def from_fen(text):
+    """
+    Board and side to move of a position text.
+    :param text:
+    :return: (Board, max_player)
+    """
+    text = text.strip()
+    if not _FEN.match(text):
+        raise NotationError(f'not a position: {text!r}')
+    turn, *fields = text.split(':')
+    masks = {'R': 0, 'W': 0}
+    kings = 0
+    for field in fields:
+        for square in filter(None, field[1:].split(',')):
+            king = square.startswith('K')
+            bit = 1 << row_col_to_square(*square_position(int(square.lstrip('K'))))
+            masks[field[0]] |= bit
+            kings |= bit if king else 0
+    if masks['R'] & masks['W']:
+        raise NotationError(f'a square holds both colours: {text!r}')
+    return BitBoard(masks['R'], masks['W'], kings).to_board(), turn == 'W'
+
+
+def move_text(piece, move, skip):
+    """
+    Text of a (piece, move, skip) of a Board, or (square, target, mask) of a BitBoard.
+    :return:
+    """
+    if isinstance(piece, int):
+        start, target, captures = piece + 1, move + 1, skip
+    else:
+        start, target, captures = square_number(piece.row, piece.col), square_number(*move), skip
+    return f"{start}{'x' if captures else '-'}{target}"
+
+
+def play_move(board, text, color):
+    """
+    Find the move of the text among the moves of color and play it with Board.move and Board.remove.
+    :param board: Board, changed in place
+    :param text: e.g. 22-18 or 25x18x11
+    :param color: RED or WHITE, the side to move
+    :return: (piece, (row, col), skipped pieces) of the move that was played
+    """
+    if not _MOVE.match(text):
+        raise NotationError(f'not a move: {text!r}')
+    squares = [int(square) for square in re.split('[-x]', text)]
+    row, col = square_position(squares[0])
+    target = square_position(squares[-1])
+    piece = board.get_piece(row, col)
+    if piece == 0 or piece.color != color:
+        raise NotationError(f'{text}: no piece of the side to move on {squares[0]}')
+    moves = board.get_valid_moves(piece)
+    if target not in moves:
+        raise NotationError(f'{text}: illegal move')
+    skip = moves[target]
+    board.move(piece, *target)
+    if skip:
+        board.remove(skip)
+    return piece, target, skip
+
+
+def read_records(file, offset=0):
+    """
+    Stream the game records of a file opened in binary mode, one at a time, so files of any size are read with
+    flat memory.
+    :param file: binary file object
+    :param offset: byte offset of a record to start at, e.g. GameRecord.offset of an earlier run
+    :return: generator of GameRecord
+    """
+    file.seek(offset)
+    start, tags, moves, in_game = offset, {}, [], False
+    comment = False
+    while True:
+        position = file.tell()
+        raw = file.readline()
+        if not raw:
+            break
+        line = raw.decode('utf-8', 'replace').strip()
+        if not in_game and not line:
+            start = file.tell()
+            continue
+        if not in_game and _FEN.match(line):
+            yield GameRecord(position, {}, line, [])
+            start = file.tell()
+            continue
+        if line.startswith('['):
+            if moves:
+                # tags after moves without a result: the next game starts here
+                yield GameRecord(start, tags, tags.get('FEN'), moves)
+                start, tags, moves = position, {}, []
+            match = _TAG.match(line)
+            if match:
+                tags[match.group(1)] = match.group(2)
+            in_game = True
+            continue
+        in_game = in_game or bool(line)
+        for token in line.split():
+            if comment or token.startswith('{'):
+                comment = not token.endswith('}')
+                continue
+            if token in RESULTS:
+                yield GameRecord(start, tags, tags.get('FEN'), moves)
+                start, tags, moves, in_game = file.tell(), {}, [], False
+                break
+            if _MOVE_NUMBER.match(token):
+                continue
+            # a move number glued to its move, e.g. 1.22-18
+            moves.append(token.split('.')[-1])
+    if moves or tags:
+        yield GameRecord(start, tags, tags.get('FEN'), moves)
+
+
+def replay(record):
+    """
+    Positions of a game record: the start position, then the position after every move.
+    :param record: GameRecord
+    :return: generator of (ply, Board, max_player, text of the move played from it or None). The Board is the
+        same object, changed in place by the next move, so copy it to keep it
+    """
+    if record.fen:
+        board, max_player = from_fen(record.fen)
+    else:
+        board, max_player = Board(), False
+    for ply, text in enumerate(record.moves):
+        yield ply, board, max_player, text
+        play_move(board, text, WHITE if max_player else RED)
+        max_player = not max_player
+    yield len(record.moves), board, max_player, None
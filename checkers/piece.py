@@ -1,44 +1,27 @@
-from .constants import RED, GREY, SQUARE_SIZE, CROWN
-import pygame
+from .constants import COLOR_NAMES
 
 
 class Piece:
-    PADDING = 20
-    OUTLINE = 5
+    """
+    A piece on the board. It only holds game state: the pixel position is computed by checkers.render when the
+    piece is drawn, so moving pieces inside the search costs nothing extra.
+    """
+    __slots__ = ('row', 'col', 'color', 'king')
 
     def __init__(self, row, col, color):
+        """
+        :param row:
+        :param col:
+        :param color: RED or WHITE, small ints
+        """
         self.row = row
         self.col = col
         self.color = color
         self.king = False
 
-        self.x = 0
-        self.y = 0
-        self.calc_pos()
-
-    def calc_pos(self):
-        """
-        Calculate the position of the piece
-        :return:
-        """
-        self.x = SQUARE_SIZE * self.col + SQUARE_SIZE // 2
-        self.y = SQUARE_SIZE * self.row + SQUARE_SIZE // 2
-
     def make_king(self):
         self.king = True
 
-    def draw(self, win):
-        """
-        Draw the piece on the game window.
-        :param win:
-        :return:
-        """
-        radius = SQUARE_SIZE // 2 - self.PADDING
-        pygame.draw.circle(win, GREY, (self.x, self.y), radius + self.OUTLINE)
-        pygame.draw.circle(win, self.color, (self.x, self.y), radius)
-        if self.king:
-            win.blit(CROWN, (self.x - CROWN.get_width() // 2, self.y - CROWN.get_height() // 2))
-
     def move(self, row, col):
         """
         Move the piece to the desired row and col
@@ -48,7 +31,13 @@ class Piece:
         """
         self.row = row
         self.col = col
-        self.calc_pos()
+
+    def __deepcopy__(self, memo):
+        # every field is an int or a bool, a flat copy is a deep one; the memo keeps a piece referred to twice one copy
+        piece = Piece(self.row, self.col, self.color)
+        piece.king = self.king
+        memo[id(self)] = piece
+        return piece
 
     def __repr__(self):
-        return f'<({self.color})({self.row}, {self.col})>'
+        return f'<({COLOR_NAMES[self.color]})({self.row}, {self.col})>'
@@ -0,0 +1,169 @@
+"""
+Drawing of the game with pygame. Only the window code imports this module, the rules and the search never need it.
+"""
+import os
+
+import pygame
+
+from .constants import BLACK, RED, WHITE, RED_RGB, WHITE_RGB, GREY, BLUE, ROWS, COLS, SQUARE_SIZE
+from .tables import POSITIONS
+
+CROWN_PATH = os.path.join(os.path.dirname(__file__), 'assets', 'crown.png')
+PADDING = 20
+OUTLINE = 5
+MARKER_RADIUS = 15
+PIECE_RGB = {RED: RED_RGB, WHITE: WHITE_RGB}
+'''contents of a dark square for Renderer: empty, a valid move marker, or a piece as (color, king)'''
+EMPTY, MARKER = 0, 1
+_crown = None
+
+
+def get_crown():
+    """Load the crown image on first use"""
+    global _crown
+    if _crown is None:
+        _crown = pygame.transform.scale(pygame.image.load(CROWN_PATH), (44, 25))
+    return _crown
+
+
+def square_center(row, col):
+    """Pixel position of the center of a square"""
+    return SQUARE_SIZE * col + SQUARE_SIZE // 2, SQUARE_SIZE * row + SQUARE_SIZE // 2
+
+
+def draw_squares(win):
+    """
+    Draw squares in the game window.
+    :param win:
+    :return:
+    """
+    win.fill(BLACK)
+
+    for row in range(ROWS):
+        for col in range(row % 2, ROWS, 2):
+            pygame.draw.rect(win, RED_RGB, (row * SQUARE_SIZE, col * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+
+
+def draw_piece(win, piece):
+    """
+    Draw the piece on the game window.
+    :param win:
+    :param piece:
+    :return:
+    """
+    _draw_piece_at(win, square_center(piece.row, piece.col), piece.color, piece.king)
+
+
+def _draw_piece_at(win, center, color, king):
+    radius = SQUARE_SIZE // 2 - PADDING
+    x, y = center
+    pygame.draw.circle(win, GREY, (x, y), radius + OUTLINE)
+    pygame.draw.circle(win, PIECE_RGB[color], (x, y), radius)
+    if king:
+        crown = get_crown()
+        win.blit(crown, (x - crown.get_width() // 2, y - crown.get_height() // 2))
+
+
+def draw_board(win, board):
+    """Draw all pieces on the board Game!"""
+    draw_squares(win)
+    for row in range(ROWS):
+        for col in range(COLS):
+            piece = board.get_piece(row, col)
+            if piece != 0:
+                draw_piece(win, piece)
+
+
+def draw_valid_moves(win, moves):
+    """
+    Draw valid moves on the board with blue color
+    :param win:
+    :param moves:
+    :return:
+    """
+    for move in moves:
+        row, col = move
+        pygame.draw.circle(win, BLUE, square_center(row, col), MARKER_RADIUS)
+
+
+def update_display():
+    pygame.display.update()
+
+
+class Renderer:
+    """
+    Draws the game like draw_board and draw_valid_moves, pixel for pixel, but only what changed. The light squares
+    are drawn once and every dark square is a pre-rendered tile (empty, move marker or one of the 4 pieces) that is
+    blitted when its contents change. Only the rectangles of those squares go to the display, and nothing at all
+    when the board and the markers are unchanged.
+    """
+
+    def __init__(self, win):
+        self.win = win
+        self.tiles = {EMPTY: self._tile(), MARKER: self._tile()}
+        center = (SQUARE_SIZE // 2, SQUARE_SIZE // 2)
+        pygame.draw.circle(self.tiles[MARKER], BLUE, center, MARKER_RADIUS)
+        for color in (RED, WHITE):
+            for king in (False, True):
+                tile = self.tiles[color, king] = self._tile()
+                _draw_piece_at(tile, center, color, king)
+        self.rects = [pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+                      for row, col in POSITIONS]
+        '''contents of the 32 dark squares on the screen, None until the first full draw'''
+        self.shown = None
+
+    @staticmethod
+    def _tile():
+        tile = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE))
+        tile.fill(BLACK)
+        return tile
+
+    def invalidate(self):
+        """Redraw the whole window on the next draw, e.g. after other code drew on it"""
+        self.shown = None
+
+    def draw(self, board, valid_moves=()):
+        """
+        Bring the window up to date with the board and the valid move markers.
+        :param board:
+        :param valid_moves: (row, col) of the move markers
+        :return: number of squares drawn, 0 when nothing changed
+        """
+        rows = board.board
+        contents = [EMPTY] * len(POSITIONS)
+        for square, (row, col) in enumerate(POSITIONS):
+            piece = rows[row][col]
+            if piece != 0:
+                contents[square] = piece.color, piece.king
+        for row, col in valid_moves:
+            square = row * 4 + col // 2
+            if contents[square] == EMPTY:
+                contents[square] = MARKER
+
+        shown = self.shown
+        if shown is None:
+            draw_squares(self.win)
+            dirty = range(len(POSITIONS))
+        else:
+            dirty = [square for square, content in enumerate(contents) if content != shown[square]]
+            if not dirty:
+                return 0
+        tiles, rects, blit = self.tiles, self.rects, self.win.blit
+        for square in dirty:
+            blit(tiles[contents[square]], rects[square])
+        self.shown = contents
+        if shown is None:
+            pygame.display.update()
+        else:
+            pygame.display.update([rects[square] for square in dirty])
+        return len(dirty)
+
+
+def draw_moves(game, board, piece):
+    """Debug helper: show the moves of a piece the search is looking at"""
+    valid_moves = board.get_valid_moves(piece)
+    draw_board(game.win, board)
+    pygame.draw.circle(game.win, (0, 255, 0), square_center(piece.row, piece.col), 50, 5)
+    draw_valid_moves(game.win, valid_moves.keys())
+    pygame.display.update()
+    # pygame.time.delay(100)
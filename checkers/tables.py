@@ -0,0 +1,44 @@
+"""
+Move tables of the 32 dark squares, built once at import time and shared by Board and BitBoard.
+The squares are numbered row by row, four per row: square = row * 4 + col // 2.
+"""
+from .constants import ROWS, COLS, WHITE
+
+SQUARES = 32
+'''directions: red moves up (towards row 0), white moves down, kings both ways'''
+UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT = range(4)
+UP = (UP_LEFT, UP_RIGHT)
+DOWN = (DOWN_LEFT, DOWN_RIGHT)
+_DELTAS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def square_to_row_col(square):
+    row = square // 4
+    return row, (square % 4) * 2 + (row + 1) % 2
+
+
+def row_col_to_square(row, col):
+    return row * 4 + col // 2
+
+
+def _target(square, direction, distance):
+    row, col = square_to_row_col(square)
+    d_row, d_col = _DELTAS[direction]
+    row, col = row + d_row * distance, col + d_col * distance
+    return row_col_to_square(row, col) if 0 <= row < ROWS and 0 <= col < COLS else -1
+
+
+'''(row, col) of every square'''
+POSITIONS = tuple(square_to_row_col(square) for square in range(SQUARES))
+'''NEIGHBOURS[square][direction]: the square one step away, -1 off the board'''
+NEIGHBOURS = tuple(tuple(_target(square, direction, 1) for direction in range(4)) for square in range(SQUARES))
+'''JUMPS[square][direction]: (jumped square, landing square) of a capture, None when it leaves the board'''
+JUMPS = tuple(tuple((NEIGHBOURS[square][direction], _target(square, direction, 2))
+                    if _target(square, direction, 2) >= 0 else None for direction in range(4))
+              for square in range(SQUARES))
+'''piece kinds, the rows of a piece-square table: table[kind][square]'''
+RED_MAN, RED_KING, WHITE_MAN, WHITE_KING = range(4)
+
+
+def piece_kind(color, king):
+    return (WHITE_MAN if color == WHITE else RED_MAN) + bool(king)
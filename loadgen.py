@@ -0,0 +1,155 @@
+"""
+Load generator of server.py: for every --sessions level that many clients play at the same time, each on its own
+connection, random legal moves against the ai. A finished game is replaced by a new one, so the load stays constant.
+
+It prints the moves per second and the move latency percentiles (from sending a move to the ai's answer, busy
+retries included) of every level, then the capacity: the most concurrent sessions whose p99 stays under --slo_ms.
+
+    python loadgen.py --start_server --workers 4 --sessions 1 4 16 64
+    python loadgen.py --port 8765 --sessions 8 --moves 50      # against a running server
+"""
+import argparse
+import asyncio
+import json
+import random
+import signal
+import subprocess
+import sys
+import time
+
+from minimax.stats import percentiles
+
+
+class Client:
+    """One connection to the server; call sends a request and waits for its response."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def call(self, **request):
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError('the server closed the connection')
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def play(opt, rng, results):
+    """One client: plays --moves moves of random games and records the latency of each"""
+    client = await Client.connect(opt.host, opt.port)
+    try:
+        state = None
+        played = 0
+        while played < opt.moves:
+            if state is None:
+                state = await client.call(op='new', move_time_ms=opt.move_time_ms, depth=opt.depth)
+                if not state['ok']:
+                    results['errors'].append(state['error'])
+                    return
+            moves = (await client.call(op='moves', session=state['session']))['moves']
+            if not moves:
+                await client.call(op='close', session=state['session'])
+                state = None
+                results['games'] += 1
+                continue
+            move = rng.choice(moves)
+            start = time.perf_counter()
+            while True:
+                response = await client.call(op='move', session=state['session'], **{'from': move['from'],
+                                                                                    'to': move['to']})
+                if response['ok'] or response['error'] != 'busy':
+                    break
+                results['busy'] += 1
+                await asyncio.sleep(opt.retry_ms / 1000)
+            if not response['ok']:
+                results['errors'].append(response['error'])
+                return
+            results['latencies'].append((time.perf_counter() - start) * 1000)
+            played += 1
+        if state is not None:
+            await client.call(op='close', session=state['session'])
+    finally:
+        await client.close()
+
+
+async def run_level(opt, sessions):
+    results = {'latencies': [], 'busy': 0, 'errors': [], 'games': 0}
+    rng = random.Random(opt.seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(play(opt, random.Random(rng.getrandbits(32)), results) for _ in range(sessions)))
+    results['seconds'] = time.perf_counter() - start
+    return results
+
+
+async def server_stats(opt):
+    client = await Client.connect(opt.host, opt.port)
+    try:
+        return await client.call(op='stats')
+    finally:
+        await client.close()
+
+
+async def main(opt):
+    capacity = 0
+    for sessions in opt.sessions:
+        results = await run_level(opt, sessions)
+        latency = percentiles(results['latencies'])
+        moves = len(results['latencies'])
+        print(f"{sessions:5d} sessions: {moves / results['seconds']:8.1f} moves/s  p50={latency.get(50, 0):7.1f}ms "
+              f"p90={latency.get(90, 0):7.1f}ms p99={latency.get(99, 0):7.1f}ms max={latency.get('max', 0):7.1f}ms "
+              f"busy={results['busy']} errors={len(results['errors'])}")
+        if not results['errors'] and moves and latency[99] <= opt.slo_ms:
+            capacity = max(capacity, sessions)
+    print(f'capacity: {capacity} concurrent sessions with p99 <= {opt.slo_ms:g}ms')
+    stats = await server_stats(opt)
+    print('server:', json.dumps({key: stats[key] for key in ('peak_sessions', 'rejected', 'searches', 'search_ms')}))
+
+
+def start_server(opt):
+    """Run server.py on --port and wait until it listens"""
+    process = subprocess.Popen([sys.executable, 'server.py', '--host', opt.host, '--port', str(opt.port),
+                                '--workers', str(opt.workers), '--max_pending', str(opt.max_pending),
+                                '--max_move_time_ms', str(max(opt.move_time_ms, 1)), '--report_every', '0'],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('listening'):
+        process.kill()
+        raise RuntimeError(f'server.py did not start: {line!r}')
+    return process
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='exercise server.py with many concurrent random players')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 16, 64],
+                        help='concurrent sessions of each level')
+    parser.add_argument('--moves', type=int, default=20, help='moves each client plays per level')
+    parser.add_argument('--move_time_ms', type=int, default=50, help='ai time budget the sessions ask for')
+    parser.add_argument('--depth', type=int, default=4, help='ai depth when --move_time_ms is 0')
+    parser.add_argument('--retry_ms', type=float, default=20, help='wait before retrying a busy move')
+    parser.add_argument('--slo_ms', type=float, default=500, help='p99 move latency a level must stay under')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start_server', action='store_true', help='run server.py for the duration of the test')
+    parser.add_argument('--workers', type=int, default=0, help='--start_server: search processes, 0 every cpu')
+    parser.add_argument('--max_pending', type=int, default=64, help='--start_server: searches before busy')
+    opt = parser.parse_args()
+
+    server = start_server(opt) if opt.start_server else None
+    try:
+        asyncio.run(main(opt))
+    finally:
+        if server is not None:
+            # like Ctrl-C: the server stops its process pool and exits
+            server.send_signal(signal.SIGINT)
+            server.wait()
@@ -1,11 +1,21 @@
 import pygame
 import argparse
-from checkers.constants import WIDTH, HEIGHT, SQUARE_SIZE, RED, WHITE
+import contextlib
+import random
+from concurrent.futures import ProcessPoolExecutor
+from checkers.constants import WIDTH, HEIGHT, SQUARE_SIZE, RED, WHITE, COLOR_NAMES
 from checkers.game import Game
-from minimax import minimax, criterion
+from minimax import minimax, iterative_deepening, parallel_minimax, criterion, SearchStats
+from minimax.evaluator import make_evaluator, EVALUATORS
+from minimax.stats import StatsLog
+from minimax.profiling import SearchProfiler, PROFILERS
+from minimax.background import BackgroundSearch, PONDER_REPLIES
+from minimax.mcts import mcts, MonteCarloTree, PLAYOUTS
+from minimax.transposition import TranspositionTable, POLICIES
+from minimax.checkpoint import CheckpointManager, load_checkpoint
+from minimax.optim import LR, BATCH_LR
+from minimax.book import PositionBook
 
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Checkers')
 FPS = 60
 
 
@@ -16,17 +26,94 @@ def get_row_col_from_mouse(pos):
     return row, col
 
 
+def create_window():
+    """Open the game window"""
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('Checkers')
+    return win
+
+
+def ai_search(board, max_player, opt, evaluator, table=None, executor=None, book=None, log=None, profiler=None,
+              stop=None, stats=None):
+    """Search one ai move; with a StatsLog its timed stats are written as one JSON line, with a profiler it is
+    profiled. Setting stop cancels it, except the parallel search. With --engine mcts the table is the tree.
+    Given stats are filled instead of new ones"""
+    if stats is None:
+        stats = SearchStats(timed=log is not None)
+    with profiler if profiler is not None else contextlib.nullcontext():
+        if opt.engine == 'mcts':
+            value, new_board = mcts(board, max_player, None, evaluator, 0 if opt.move_time_ms else opt.mcts_iterations,
+                                    opt.move_time_ms, tree=table, executor=executor, workers=opt.workers,
+                                    stats=stats, book=book, stop=stop)
+        elif opt.move_time_ms > 0:
+            value, new_board = iterative_deepening(board, max_player, None, evaluator, opt.move_time_ms,
+                                                   bitboard=opt.bitboard, stats=stats, table=table, book=book,
+                                                   stop=stop)
+        elif executor is not None:
+            value, new_board = parallel_minimax(board, opt.minimax_depth, max_player, None, evaluator, executor,
+                                                alpha_beta=opt.alpha_beta, stats=stats, book=book)
+        else:
+            value, new_board = minimax(board, opt.minimax_depth, max_player, None, evaluator, bitboard=opt.bitboard,
+                                       alpha_beta=opt.alpha_beta, stats=stats, table=table, book=book, stop=stop)
+    if log is not None:
+        log_search(log, opt, stats, max_player, value)
+    return value, new_board
+
+
+def log_search(log, opt, stats, max_player, value):
+    """Write the stats of a search played by the max_player side as one line of the StatsLog"""
+    log.write(stats, mode=opt.game_mode, player=COLOR_NAMES[WHITE if max_player else RED], value=value)
+
+
+def train_value(value):
+    """ai2ai_ml: search values beyond a won game (solved endgames, a side without moves) count as a win"""
+    return max(-24, min(24, value))
+
+
+def load_evaluator(opt):
+    """Evaluator with the weights of --load_weights when it is given, a new --evaluator otherwise"""
+    return make_evaluator(load_checkpoint(opt.load_weights)['weights'] if opt.load_weights else None, opt.evaluator)
+
+
+def batch_train(opt, checkpoints=None):
+    """ai2ai_ml without a window: vectorized TD(lambda) training on batches of self-play games"""
+    from minimax.train import train
+
+    weights = load_checkpoint(opt.load_weights)['weights'] if opt.load_weights else None
+    trainer = train(opt.epochs, opt.games_per_epoch, depth=opt.minimax_depth, lr=opt.lr, td_lambda=opt.td_lambda,
+                    batch_size=opt.batch_size, workers=opt.workers, weights=weights, seed=opt.seed,
+                    dataset=opt.dataset, checkpoints=checkpoints, resume=opt.resume, evaluator=opt.evaluator)
+    return trainer.return_weights()
+
+
 def main(opt):
+    if opt.seed is not None:
+        random.seed(opt.seed)
+    checkpoints = CheckpointManager(opt.checkpoint_dir, opt.checkpoint_every) if opt.checkpoint_dir else None
+    if opt.game_mode == 'ai2ai_ml' and opt.batch_train:
+        batch_train(opt, checkpoints)
+        return
+
+    if opt.engine == 'mcts':
+        table = MonteCarloTree(opt.mcts_exploration, opt.mcts_playout, opt.mcts_playout_depth, opt.seed)
+    else:
+        table = TranspositionTable(opt.tt_mb, opt.tt_policy) if opt.tt_mb > 0 else None
+    executor = ProcessPoolExecutor(opt.workers) if opt.workers > 0 else None
+    book = PositionBook(opt.book) if opt.book else None
+    log = StatsLog(opt.stats_jsonl) if opt.stats_jsonl else None
+    profiler = SearchProfiler(opt.profile, opt.profile_interval_ms) if opt.profile else None
+    win = create_window()
+
     if opt.game_mode == 'person2person':
         run = True
         clock = pygame.time.Clock()
-        game = Game(WIN)
+        game = Game(win)
 
         while run:
             clock.tick(FPS)
 
             if game.winner() is not None:
-                print(game.winner())
+                print(COLOR_NAMES[game.winner()])
                 run = False
 
             for event in pygame.event.get():
@@ -41,40 +128,68 @@ def main(opt):
     elif opt.game_mode == 'person2ai':
         run = True
         clock = pygame.time.Clock()
-        game = Game(WIN)
+        game = Game(win)
+        evaluator = load_evaluator(opt)
+
+        def think(board, max_player, stop):
+            """Search of the thinker, with its stats: they are logged when its move is played, so the searches of
+            pondered replies the person did not play are left out"""
+            stats = SearchStats(timed=log is not None)
+            value, new_board = ai_search(board, max_player, opt, evaluator, table, executor, book, None, profiler,
+                                         stop, stats)
+            return value, new_board, stats
+
+        # the ai thinks on a worker thread; parallel searches run in other processes and cannot be stopped, so
+        # they are not pondered
+        thinker = BackgroundSearch(think, evaluator, opt.ponder if executor is None else 0)
+        game.on_reset(thinker.cancel)
 
         while run:
             clock.tick(FPS)
-            if game.turn == WHITE:
-                value, new_board = minimax(game.get_board(), opt.minimax_depth, WHITE, game)
-                game.ai_move(new_board)
+            if game.turn == WHITE and game.winner() is None:
+                if not thinker.thinking:
+                    thinker.start(game.get_board(), True)
+                result = thinker.poll()
+                if result is not None:
+                    value, new_board, stats = result
+                    if log is not None:
+                        log_search(log, opt, stats, True, value)
+                    game.ai_move(new_board)
+                    if game.winner() is None:
+                        thinker.ponder(game.get_board(), False)
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     run = False
-                if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.type == pygame.MOUSEBUTTONDOWN and game.turn == RED:
                     pos = pygame.mouse.get_pos()
                     row, col = get_row_col_from_mouse(pos)
                     game.select(row, col)
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    game.reset()
             game.update()
+        thinker.close()
 
     elif opt.game_mode == 'ai2ai':
         run = True
         clock = pygame.time.Clock()
-        game = Game(WIN)
+        game = Game(win)
+        evaluator = load_evaluator(opt)
 
         while run:
             clock.tick(FPS)
 
             if game.winner() is not None:
-                print("The winner is: ", game.winner())
+                print("The winner is: ", COLOR_NAMES[game.winner()])
                 run = False
 
             if game.turn == WHITE:
-                value, new_board = minimax(game.get_board(), opt.minimax_depth, WHITE, game)
+                value, new_board = ai_search(game.get_board(), WHITE, opt, evaluator, table, executor, book,
+                                             log, profiler)
                 game.ai_move(new_board)
             elif game.turn == RED:
-                value, new_board = minimax(game.get_board(), opt.minimax_depth, False, game)
+                value, new_board = ai_search(game.get_board(), False, opt, evaluator, table, executor, book,
+                                             log, profiler)
                 game.ai_move(new_board)
 
             for event in pygame.event.get():
@@ -87,32 +202,43 @@ def main(opt):
     elif opt.game_mode == 'person2ai_ml':
         pass
     elif opt.game_mode == 'ai2ai_ml':
-        weights = None
+        weights = load_checkpoint(opt.load_weights)['weights'] if opt.load_weights else None
+        first_epoch = 0
+        checkpoint = checkpoints.load_latest() if checkpoints is not None and opt.resume else None
+        if checkpoint is not None:
+            weights = checkpoint['weights']
+            first_epoch = checkpoint['epoch'] + 1
+            if checkpoint['rng_state'] is not None:
+                random.setstate(checkpoint['rng_state'])
+            print('Resuming from epoch {}'.format(first_epoch))
+        evaluator = make_evaluator(weights, opt.evaluator)
 
-        for epoch in range(opt.epochs):
+        for epoch in range(first_epoch, opt.epochs):
             print("Epoch : {}".format(epoch))
             run = True
             clock = pygame.time.Clock()
-            game = Game(WIN)
+            game = Game(win)
             red = white = False
-            if weights is not None:
-                game.board.apply_weights(weights.copy())
 
-            print(game.board.return_weights())
+            print(evaluator.return_weights())
 
             iter = 0
             while iter < 100 and run:
                 clock.tick(FPS)
 
                 if game.turn == WHITE:
-                    white_value, new_board = minimax(game.get_board(), opt.minimax_depth, True, game)
+                    white_value, new_board = ai_search(game.get_board(), True, opt, evaluator, table, executor, book,
+                                                       log, profiler)
+                    white_value = train_value(white_value)
                     situation = game.ai_move(new_board)
                     if situation: # if we can't move any further
                         print('Can\'t move any further')
                         break
                     white = True
                 elif game.turn == RED:
-                    red_value, new_board = minimax(game.get_board(), opt.minimax_depth, False, game)
+                    red_value, new_board = ai_search(game.get_board(), False, opt, evaluator, table, executor, book,
+                                                     log, profiler)
+                    red_value = train_value(red_value)
                     situation = game.ai_move(new_board)
                     if situation:
                         print('Can\'t move any further')
@@ -121,26 +247,28 @@ def main(opt):
 
                 if red and white:
                     loss = criterion(white_value, red_value)
-                    game.board.optimize_weights(loss, 0.01)
+                    evaluator.optimize_weights(game.board, loss, opt.lr)
+                    if table is not None:
+                        table.clear()
                     red = white = False
-                    try:
-                        weights = game.board.return_weights()
-                    except AttributeError:
-                        pass
                     # print(loss)
                     if game.winner() is not None:
                         if game.winner() == WHITE:
                             loss = criterion(24, white_value)
-                            game.board.optimize_weights(loss, 0.01)
+                            evaluator.optimize_weights(game.board, loss, opt.lr)
+                            if table is not None:
+                                table.clear()
                             print('White is the winner and the loss is : ', loss)
-                            # weights = game.board.return_weights()
+                            # weights = evaluator.return_weights()
                             break
 
                         elif game.winner() == RED:
                             loss = criterion(-24, red_value)
-                            game.board.optimize_weights(loss, 0.01)
+                            evaluator.optimize_weights(game.board, loss, opt.lr)
+                            if table is not None:
+                                table.clear()
                             print('Red is the winner and the loss is : ', loss)
-                            # weights = game.board.return_weights()
+                            # weights = evaluator.return_weights()
                             break
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
@@ -148,13 +276,23 @@ def main(opt):
 
                 game.update()
                 iter += 1
-            try:
-                weights = game.board.return_weights()
-            except AttributeError:
-                pass
             print(loss)
-        # print(game.board.weights)
+            if checkpoints is not None:
+                checkpoints.save(epoch, evaluator.return_weights(), opt.seed, {'lr': opt.lr}, random.getstate(),
+                                 force=epoch == opt.epochs - 1)
+        # print(evaluator.return_weights())
 
+    if executor is not None:
+        executor.shutdown()
+    if book is not None:
+        book.close()
+    if log is not None:
+        log.close()
+    if profiler is not None:
+        profiler.close()
+        print(profiler.report())
+        if opt.profile_out:
+            profiler.dump(opt.profile_out)
     pygame.quit()
 
 
@@ -173,8 +311,82 @@ if __name__ == '__main__':
     parser.add_argument('--minimax_depth', type=int, default=3,
                         help='minimax tree depth')
 
+    parser.add_argument('--engine', type=str, default='minimax', choices=['minimax', 'mcts'],
+                        help='minimax: alpha-beta / minimax search (the options below)\n'
+                             'mcts: Monte Carlo tree search for --mcts_iterations or --move_time_ms, its tree is '
+                             'kept between moves and --workers grows one tree per process')
+    parser.add_argument('--mcts_iterations', type=int, default=2000, help='mcts iterations per move')
+    parser.add_argument('--mcts_playout', type=str, default='eval', choices=PLAYOUTS,
+                        help='random: play random moves to the end of the game; eval: score the position with the '
+                             'evaluation function after --mcts_playout_depth random moves')
+    parser.add_argument('--mcts_playout_depth', type=int, default=2)
+    parser.add_argument('--mcts_exploration', type=float, default=1.4, help='UCB1 exploration constant')
+
+    parser.add_argument('--evaluator', type=str, default='linear', choices=EVALUATORS,
+                        help='linear: material and threatened pieces\n'
+                             'pst: piece-square tables of every piece kind and square with mobility and home row '
+                             'terms, updated incrementally by the boards. Weights loaded with --load_weights '
+                             'choose their own evaluator')
+    parser.add_argument('--move_time_ms', type=int, default=0,
+                        help='search each ai move by iterative deepening alpha-beta for this many milliseconds '
+                             'instead of to a fixed --minimax_depth, 0 disables it')
+
+    parser.add_argument('--workers', type=int, default=0,
+                        help='split the root moves of the fixed depth search (or the self-play games of '
+                             '--batch_train) across this many processes, 0 runs everything in this process')
+
+    parser.add_argument('--bitboard', action='store_true',
+                        help='run the minimax search on the compact bitboard backend')
+
+    parser.add_argument('--alpha_beta', action='store_true',
+                        help='use alpha-beta pruning with move ordering (same values, fewer nodes)')
+
+    parser.add_argument('--tt_mb', type=float, default=0,
+                        help='memory budget in MB of the alpha-beta transposition table, 0 disables it')
+    parser.add_argument('--book', type=str, default=None,
+                        help='opening book and solved endgames built by build_book.py: book positions are played '
+                             'without a search and endgames are searched exactly')
+    parser.add_argument('--stats_jsonl', type=str, default=None,
+                        help='append the timed search stats of every ai move (nodes, cutoffs, transposition '
+                             'hits, branching factor, time in move generation, make/copy and evaluation) to this '
+                             'file, one JSON object per line')
+    parser.add_argument('--profile', type=str, default=None, choices=PROFILERS,
+                        help='profile the ai searches with cProfile or a low overhead sampling profiler and print '
+                             'the top functions at exit')
+    parser.add_argument('--profile_interval_ms', type=float, default=1.0, help='--profile sample: sampling interval')
+    parser.add_argument('--profile_out', type=str, default=None,
+                        help='--profile: save the profile here (pstats file, or collapsed stacks when sampling)')
+    parser.add_argument('--ponder', type=int, default=PONDER_REPLIES,
+                        help='person2ai: search the answers to this many likely moves of the person while they '
+                             'think, 0 disables it. The ai always thinks on a worker thread and R restarts the game')
+    parser.add_argument('--tt_policy', type=str, default='depth', choices=POLICIES,
+                        help='transposition table replacement: keep the deeper entry or always the newest')
+
     parser.add_argument('--epochs', type=int, default=10)
-    parser.add_argument('--lr', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=None, help='seed of the random weights and games')
+    parser.add_argument('--checkpoint_dir', type=str, default=None,
+                        help='ai2ai_ml: save the weights, optimizer settings, epoch and random state here')
+    parser.add_argument('--checkpoint_every', type=int, default=1, help='epochs between two checkpoints')
+    parser.add_argument('--resume', action='store_true',
+                        help='ai2ai_ml: continue from the latest checkpoint of --checkpoint_dir')
+    parser.add_argument('--load_weights', type=str, default=None,
+                        help='checkpoint file (or directory, for its latest checkpoint) whose weights the ai uses')
+    parser.add_argument('--lr', type=float, default=None,
+                        help=f'learning rate of the evaluation weights, {LR} by default, {BATCH_LR} with --batch_train')
+    parser.add_argument('--batch_train', action='store_true',
+                        help='ai2ai_ml: train on minibatches of self-play positions without a window. '
+                             'The step is normalized, so use 0 < lr < 2')
+    parser.add_argument('--games_per_epoch', type=int, default=32, help='--batch_train self-play games per epoch')
+    parser.add_argument('--td_lambda', type=float, default=0.7,
+                        help='--batch_train TD(lambda): 1 trains on game results, 0 on the next search value')
+    parser.add_argument('--dataset', type=str, default=None,
+                        help='--batch_train: append every self-play position to this binary dataset file')
+    parser.add_argument('--batch_size', type=int, default=256, help='--batch_train minibatch size')
 
     opt = parser.parse_args()
+    if opt.lr is None:
+        # the --batch_train step is normalized, so its scale is not the one of the per position step
+        opt.lr = BATCH_LR if opt.batch_train else LR
+    if opt.engine == 'mcts' and opt.game_mode == 'ai2ai_ml':
+        parser.error('ai2ai_ml trains on minimax search values, use --engine minimax')
     main(opt)
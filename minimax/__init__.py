@@ -1,2 +1,6 @@
-from .algorithm import minimax
-from .optim import optimizer, criterion
\ No newline at end of file
+from .algorithm import minimax, iterative_deepening
+from .evaluator import Evaluator, make_evaluator
+from .pst import PieceSquareEvaluator
+from .optim import optimizer, criterion
+from .stats import SearchStats
+from .parallel import parallel_minimax
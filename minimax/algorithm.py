@@ -1,47 +1,344 @@
 from copy import deepcopy
-import pygame
+import time
 from checkers.constants import RED, WHITE
+from checkers.bitboard import BitBoard
+from .ordering import MoveOrderer, move_key
+from .stats import SearchStats
+from .transposition import EXACT, LOWER, UPPER, NO_MOVE
+from .zobrist import hash_board, move_hash
 
+MAX_DEPTH = 64
+'''nodes between two clock reads of a timed search'''
+CHECK_EVERY = 128
+
+
+class SearchTimeout(Exception):
+    """Raised inside a timed search when its deadline has passed."""
 
-def minimax(position, depth, max_player, game):
-    if depth == 0 or position.winner() is not None:
-        return position.evaluate(), position
 
-    if max_player:
-        maxEval = float('-inf')
-        best_move = None
-        for move in get_all_moves(position, WHITE, game):
-            evaluation = minimax(move, depth - 1, False, game)[0]
-            maxEval = max(maxEval, evaluation)
-            if maxEval == evaluation:
-                best_move = move
+class SearchCancelled(Exception):
+    """Raised out of a search whose stop event was set, e.g. because the game was reset."""
 
-        return maxEval, best_move
 
+def minimax(position, depth, max_player, game, evaluator, bitboard=False, alpha_beta=False, stats=None, table=None,
+            book=None, stop=None):
+    """
+    Search the position in place with make_move/unmake_move and only build a new board for the move it returns.
+    :param position: Board or BitBoard, left unchanged
+    :param depth:
+    :param max_player: True when white (the maximizing player) is to move
+    :param game:
+    :param evaluator: Evaluator that scores the leaves
+    :param bitboard: search on a BitBoard copy of the position
+    :param alpha_beta: use alpha-beta pruning with move ordering, the value is the same as plain minimax
+    :param stats: SearchStats that receives the node counts and timings
+    :param table: TranspositionTable used by the alpha-beta search, it can be kept between moves
+    :param book: PositionBook; a book move is played without a search and solved endgames are exact
+    :param stop: threading.Event, the search raises SearchCancelled soon after it is set
+    :return: (value, board after the best move)
+    """
+    if bitboard and not isinstance(position, BitBoard):
+        # search on the compact bitboard and hand back a normal Board
+        value, best_move = minimax(BitBoard.from_board(position), depth, max_player, game, evaluator,
+                                   alpha_beta=alpha_beta, stats=stats, table=table, book=book, stop=stop)
+        return value, best_move.to_board() if best_move is not None else None
+
+    if depth == 0 or position.winner() is not None:
+        return evaluator.evaluate(position), position
+
+    if stats is None:
+        stats = SearchStats()
+    start = time.perf_counter()
+    hit = book.best_move(position, max_player) if book is not None else None
+    if hit is not None:
+        stats.book_hits += 1
+        value, best_move = hit
+    elif alpha_beta:
+        context = SearchContext(stats, MoveOrderer(), evaluator, table, book=book, stop=stop)
+        key = hash_board(position, max_player) if table is not None else None
+        value, best_move = _alphabeta(position, depth, float('-inf'), float('inf'), max_player, 0, key, context)
+        stats.depth = depth
     else:
-        minEval = float('inf')
-        best_move = None
-        for move in get_all_moves(position, RED, game):
-            evaluation = minimax(move, depth - 1, True, game)[0]
-            minEval = min(minEval, evaluation)
-            if minEval == evaluation:
-                best_move = move
+        value, best_move = _minimax(position, depth, max_player, evaluator, stats, book, stop)
+        stats.depth = depth
+    new_board = _apply(position, best_move, game, stats)
+    stats.seconds += time.perf_counter() - start
+    return value, new_board
+
+
+def iterative_deepening(position, max_player, game, evaluator, move_time_ms, max_depth=MAX_DEPTH, bitboard=False,
+                        stats=None, table=None, book=None, stop=None):
+    """
+    Run alpha-beta searches of depth 1, 2, 3, ... until the time budget runs out and return the result of
+    the deepest search that finished. Depth 1 always finishes, so there is always a move.
+    :param position: Board or BitBoard, left unchanged
+    :param max_player: True when white is to move
+    :param game:
+    :param evaluator: Evaluator that scores the leaves
+    :param move_time_ms: time budget of the move in milliseconds
+    :param max_depth: stop after this depth even if there is time left
+    :param bitboard: search on a BitBoard copy of the position
+    :param stats: SearchStats, its depth is set to the deepest finished search and it counts every iteration
+    :param table: TranspositionTable shared by the iterations
+    :param book: PositionBook consulted before the search
+    :param stop: threading.Event, the search raises SearchCancelled soon after it is set, even in depth 1
+    :return: (value, board after the best move)
+    """
+    if bitboard and not isinstance(position, BitBoard):
+        value, best_move = iterative_deepening(BitBoard.from_board(position), max_player, game, evaluator,
+                                               move_time_ms, max_depth, stats=stats, table=table, book=book,
+                                               stop=stop)
+        return value, best_move.to_board() if best_move is not None else None
+
+    if position.winner() is not None:
+        return evaluator.evaluate(position), position
+
+    if stats is None:
+        stats = SearchStats()
+    start = time.perf_counter()
+    if book is not None:
+        hit = book.best_move(position, max_player)
+        if hit is not None:
+            stats.book_hits += 1
+            new_board = _apply(position, hit[1], game, stats)
+            stats.seconds += time.perf_counter() - start
+            return hit[0], new_board
+    deadline = start + move_time_ms / 1000
+    context = SearchContext(stats, MoveOrderer(), evaluator, table, book=book, stop=stop)
+    key = hash_board(position, max_player) if table is not None else None
+    value, best_move = None, None
+    for depth in range(1, max_depth + 1):
+        try:
+            result = _alphabeta(position, depth, float('-inf'), float('inf'), max_player, 0, key, context)
+        except SearchTimeout:
+            break
+        value, best_move = result
+        stats.depth = depth
+        if best_move is None:
+            break
+        # the next iteration tries the best move of this one first
+        context.root_move = move_key(*best_move[:2])
+        context.deadline = deadline
+        if time.perf_counter() >= deadline:
+            break
+
+    new_board = _apply(position, best_move, game, stats)
+    stats.seconds += time.perf_counter() - start
+    return value, new_board
+
 
-        return minEval, best_move
+def _minimax(board, depth, max_player, evaluator, stats, book=None, stop=None):
+    stats.nodes += 1
+    if stop is not None and stats.nodes % CHECK_EVERY == 0 and stop.is_set():
+        raise SearchCancelled()
+    if book is not None:
+        value = book.probe(board, max_player)
+        if value is not None:
+            stats.leaves += 1
+            stats.book_hits += 1
+            return value, None
+    if depth == 0 or board.winner() is not None:
+        stats.leaves += 1
+        return _evaluate(evaluator, board, stats), None
+
+    best_value = float('-inf') if max_player else float('inf')
+    best_move = None
+    for move in _generate(board, WHITE if max_player else RED, stats):
+        record = _make(board, move, stats)
+        evaluation = _minimax(board, depth - 1, not max_player, evaluator, stats, book, stop)[0]
+        _unmake(board, record, stats)
+
+        if (evaluation >= best_value) if max_player else (evaluation <= best_value):
+            best_value = evaluation
+            best_move = move
+
+    return best_value, best_move
+
+
+class SearchContext:
+    """State shared by all nodes of one alpha-beta search."""
+
+    def __init__(self, stats, orderer, evaluator, table=None, deadline=None, book=None, stop=None):
+        self.stats = stats
+        self.orderer = orderer
+        self.evaluator = evaluator
+        self.table = table
+        self.deadline = deadline
+        self.book = book
+        self.stop = stop
+        self.root_move = None
+
+
+def _alphabeta(board, depth, alpha, beta, max_player, ply, key, context):
+    stats = context.stats
+    stats.nodes += 1
+    if stats.nodes % CHECK_EVERY == 0:
+        if context.stop is not None and context.stop.is_set():
+            raise SearchCancelled()
+        if context.deadline is not None and time.perf_counter() > context.deadline:
+            raise SearchTimeout()
+    book = context.book
+    if book is not None and ply > 0:
+        value = book.probe(board, max_player)
+        if value is not None:
+            stats.leaves += 1
+            stats.book_hits += 1
+            return value, None
+    if depth == 0 or board.winner() is not None:
+        stats.leaves += 1
+        return _evaluate(context.evaluator, board, stats), None
+
+    table = context.table
+    alpha_start, beta_start = alpha, beta
+    first = None
+    if table is not None:
+        entry = table.probe(key)
+        if entry is not None:
+            stats.tt_hits += 1
+            entry_depth, value, flag, first = entry
+            # the root always searches, it has to return a move
+            if ply > 0 and entry_depth >= depth:
+                if flag == EXACT:
+                    return value, None
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value, None
+    if ply == 0 and context.root_move is not None:
+        first = context.root_move
+
+    best_value = float('-inf') if max_player else float('inf')
+    best_move = None
+    # children are only built when the loop reaches them, a cutoff skips the rest
+    for move in context.orderer.order(_generate(board, WHITE if max_player else RED, stats), ply, first):
+        child_key = move_hash(key, board, *move) if table is not None else None
+        record = _make(board, move, stats)
+        try:
+            evaluation = _alphabeta(board, depth - 1, alpha, beta, not max_player, ply + 1, child_key, context)[0]
+        finally:
+            # a timeout unwinds through here and leaves the board as it was
+            _unmake(board, record, stats)
+
+        if max_player:
+            if best_move is None or evaluation > best_value:
+                best_value, best_move = evaluation, move
+            alpha = max(alpha, evaluation)
+        else:
+            if best_move is None or evaluation < best_value:
+                best_value, best_move = evaluation, move
+            beta = min(beta, evaluation)
+
+        if alpha >= beta:
+            stats.cutoffs += 1
+            context.orderer.cutoff(move, depth, ply)
+            break
+
+    if table is not None:
+        if best_value <= alpha_start:
+            flag = UPPER
+        elif best_value >= beta_start:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table.store(key, depth, best_value, flag, NO_MOVE if best_move is None else move_key(*best_move[:2]))
+    return best_value, best_move
+
+
+def _generate(board, color, stats):
+    """generate_moves, timed when the stats ask for it"""
+    if not stats.timed:
+        return generate_moves(board, color)
+    start = time.perf_counter()
+    moves = generate_moves(board, color)
+    stats.movegen_seconds += time.perf_counter() - start
+    return moves
+
+
+def _make(board, move, stats):
+    if not stats.timed:
+        return board.make_move(*move)
+    start = time.perf_counter()
+    record = board.make_move(*move)
+    stats.make_seconds += time.perf_counter() - start
+    return record
+
+
+def _unmake(board, record, stats):
+    if not stats.timed:
+        return board.unmake_move(record)
+    start = time.perf_counter()
+    board.unmake_move(record)
+    stats.make_seconds += time.perf_counter() - start
+
+
+def _evaluate(evaluator, board, stats):
+    if not stats.timed:
+        return evaluator.evaluate(board)
+    start = time.perf_counter()
+    value = evaluator.evaluate(board)
+    stats.eval_seconds += time.perf_counter() - start
+    return value
+
+
+def _apply(position, move, game, stats):
+    """Copy the position with the chosen move played on it, the copy counts as make time"""
+    if move is None:
+        return None
+    if not stats.timed:
+        return apply_move(position, *move, game)
+    start = time.perf_counter()
+    new_board = apply_move(position, *move, game)
+    stats.make_seconds += time.perf_counter() - start
+    return new_board
+
+
+def generate_moves(board, color):
+    """
+    Return every (piece, move, skip) of the color, in the same order as get_all_moves.
+    :param board:
+    :param color:
+    :return:
+    """
+    return [(piece, move, skip) for piece in board.get_all_pieces(color)
+            for move, skip in board.get_valid_moves(piece).items()]
+
+
+def apply_move(board, piece, move, skip, game=None):
+    """
+    Return a copy of the board with the move played on it.
+    :param board:
+    :param piece: piece (or square of a BitBoard) on the original board
+    :param move:
+    :param skip:
+    :param game:
+    :return:
+    """
+    if isinstance(board, BitBoard):
+        new_board = board.copy()
+    else:
+        new_board = deepcopy(board)
+        piece = new_board.get_piece(piece.row, piece.col)
+        skip = [new_board.get_piece(skipped.row, skipped.col) for skipped in skip]
+    new_board.make_move(piece, move, skip)
+    return new_board
 
 
 def get_all_moves(board, color, game):
+    if isinstance(board, BitBoard):
+        return board.children(color)
+
     moves = []
 
     for piece in board.get_all_pieces(color):
         valid_moves = board.get_valid_moves(piece)
         if valid_moves is not None:
             for move, skip in valid_moves.items():
-                # draw_moves(game, board, piece)
+                # checkers.render.draw_moves(game, board, piece)
                 temp_board = deepcopy(board)
                 temp_piece = temp_board.get_piece(piece.row, piece.col)
                 new_board = simulate_move(temp_piece, move, temp_board, game, skip)
-                new_board.calculate_threatens()
                 moves.append(new_board)
         else:
             moves = []
@@ -55,11 +352,3 @@ def simulate_move(piece, move, board, game, skip):
         board.remove(skip)
     return board
 
-
-def draw_moves(game, board, piece):
-    valid_moves = board.get_valid_moves(piece)
-    board.draw(game.win)
-    pygame.draw.circle(game.win, (0, 255, 0), (piece.x, piece.y), 50, 5)
-    game.draw_valid_moves(valid_moves.keys())
-    pygame.display.update()
-    # pygame.time.delay(100)
@@ -0,0 +1,130 @@
+"""
+Bulk analysis of game record files (see checkers.pdn): every position of every game is searched and its best move
+and score are appended to a JSON lines file as soon as they are known, one output file per input file.
+
+Each output line holds the byte offset of its game in the input and its ply, so an interrupted run continues after
+the last complete line: the input is read from that game on and its positions up to that ply are skipped. Games are
+read one at a time, so memory stays flat whatever the size of the archive.
+"""
+import hashlib
+import json
+import os
+import time
+
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from checkers.pdn import read_records, replay, to_fen, move_text, NotationError
+from .algorithm import generate_moves, apply_move
+from .stats import SearchStats
+
+'''bytes read at a time from the end of an output file to find its last line'''
+TAIL_BLOCK = 4096
+
+
+def output_path(directory, path):
+    """
+    Output file of an input file: <input name>.<hash>.analysis.jsonl, the hash of the absolute input path keeps
+    inputs of the same name in different directories apart and gives the same name again to resume.
+    :param directory: output directory
+    :param path: input file
+    :return:
+    """
+    digest = hashlib.sha1(os.path.realpath(path).encode()).hexdigest()[:8]
+    return os.path.join(directory, f'{os.path.basename(path)}.{digest}.analysis.jsonl')
+
+
+def resume_point(path):
+    """
+    Where the analysis of an output file continues. A partly written last line, left by a crash, is cut off.
+    :param path: output file
+    :return: (offset, ply) of the last complete line: the game at offset continues after ply, and ply is None
+        when that game is done. (0, -1) when there is no output yet
+    """
+    if not os.path.exists(path):
+        return 0, -1
+    with open(path, 'rb+') as file:
+        position = file.seek(0, os.SEEK_END)
+        tail = b''
+        last = before = -1
+        # read blocks from the end until tail holds the newlines around the last complete line
+        while position > 0 and before < 0:
+            step = min(TAIL_BLOCK, position)
+            position -= step
+            file.seek(position)
+            tail = file.read(step) + tail
+            last = tail.rfind(b'\n')
+            before = tail.rfind(b'\n', 0, last) if last > 0 else -1
+        if last + 1 < len(tail):
+            file.truncate(position + last + 1)
+    if last < 0:
+        return 0, -1
+    record = json.loads(tail[before + 1:last])
+    return record['offset'], record.get('ply')
+
+
+def analyze_position(engine, board, max_player, table=None):
+    """
+    Search a position.
+    :param engine: EngineConfig
+    :param board: Board
+    :param max_player: True when white is to move
+    :param table: TranspositionTable of the engine, kept between positions
+    :return: (value, text of the best move, SearchStats), None when the game is over
+    """
+    bitboard = BitBoard.from_board(board)
+    moves = generate_moves(bitboard, WHITE if max_player else RED)
+    if not moves or bitboard.winner() is not None:
+        return None
+    stats = SearchStats()
+    value, after = engine.search(bitboard, max_player, stats, table)
+    for move in moves:
+        child = apply_move(bitboard, *move)
+        if (child.red, child.white, child.kings) == (after.red, after.white, after.kings):
+            return value, move_text(*move), stats
+    raise AssertionError('the search returned a position no move leads to')
+
+
+def analyze_file(path, output, engine, resume=True):
+    """
+    Analyze every position of a game record file, appending one JSON line per position to output:
+    offset and ply of the position, its FEN, the move played, the best move, its score (positive is good for
+    white), the search depth and nodes. A game that can not be replayed gets a line with its offset and error.
+    :param path: game record file
+    :param output: JSON lines file
+    :param engine: EngineConfig of the searches
+    :param resume: continue an existing output after its last line, otherwise start it again
+    :return: (positions analyzed, games that could not be replayed, seconds)
+    """
+    offset, last_ply = resume_point(output) if resume else (0, -1)
+    table = engine.make_table()
+    positions = errors = 0
+    start = time.perf_counter()
+    with open(path, 'rb') as source, open(output, 'a' if resume else 'w') as out:
+        for record in read_records(source, offset):
+            resumed = record.offset == offset
+            if resumed and last_ply is None:
+                continue
+            try:
+                for ply, board, max_player, played in replay(record):
+                    if resumed and ply <= last_ply:
+                        continue
+                    result = analyze_position(engine, board, max_player, table)
+                    if result is None:
+                        continue
+                    value, best, stats = result
+                    out.write(json.dumps({'offset': record.offset, 'ply': ply, 'fen': to_fen(board, max_player),
+                                          'played': played, 'best': best, 'score': value, 'depth': stats.depth,
+                                          'nodes': stats.nodes}) + '\n')
+                    positions += 1
+            except NotationError as error:
+                out.write(json.dumps({'offset': record.offset, 'ply': None, 'error': str(error)}) + '\n')
+                errors += 1
+            # flushed after every game: a crash loses little, and resume_point cuts off a torn last line
+            out.flush()
+    return positions, errors, time.perf_counter() - start
+
+
+def analyze_job(args):
+    """Worker side: analyze_file of one (path, output, engine, resume)"""
+    path = args[0]
+    return (path, *analyze_file(*args))
@@ -0,0 +1,107 @@
+"""
+Ai searches of a windowed game on a worker thread. The frame loop starts a search, polls it once per frame and keeps
+drawing and handling events in between, so the window stays responsive at any depth.
+
+While the person thinks, the thread ponders: it searches the ai's answer to the person's most likely replies, one
+after the other. When the person plays one of them the answer is ready, or its search simply goes on; any other move
+cancels the pondering and starts a new search.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+
+from checkers.constants import RED, WHITE
+from .algorithm import generate_moves, apply_move
+from .zobrist import hash_board
+
+'''replies of the person whose answers are searched ahead'''
+PONDER_REPLIES = 3
+
+
+class BackgroundSearch:
+    """Runs one search at a time on a worker thread; every search gets its own stop event."""
+
+    def __init__(self, search, evaluator=None, ponder_replies=PONDER_REPLIES):
+        """
+        :param search: search(board, max_player, stop) -> its result, e.g. (value, board after the best move). It
+            gets a private copy of the board and should raise SearchCancelled soon after the threading.Event stop is
+            set
+        :param evaluator: ranks the replies of the person to ponder on, best for the person first. Without it the
+            replies are pondered in move generation order
+        :param ponder_replies: number of replies pondered on, 0 disables pondering
+        """
+        self.search = search
+        self.evaluator = evaluator
+        self.ponder_replies = ponder_replies
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix='ai-search')
+        '''hash of the position -> (future, stop) of every submitted search, pondered or requested'''
+        self.jobs = {}
+        self.request = None
+
+    def _submit(self, board, max_player):
+        stop = threading.Event()
+        future = self.executor.submit(self.search, board, max_player, stop)
+        self.jobs[hash_board(board, max_player)] = future, stop
+        return future
+
+    def _cancel_except(self, key=None):
+        for other, (future, stop) in list(self.jobs.items()):
+            if other != key:
+                stop.set()
+                future.cancel()
+                del self.jobs[other]
+
+    def start(self, board, max_player):
+        """
+        Ask for the move of max_player in the position, see poll. The position may have been pondered on.
+        :param board: Board of the game, it is copied
+        :param max_player: True when white is to move
+        :return:
+        """
+        key = hash_board(board, max_player)
+        self._cancel_except(key)
+        job = self.jobs.get(key)
+        self.request = job[0] if job is not None else self._submit(deepcopy(board), max_player)
+
+    def ponder(self, board, max_player):
+        """
+        Search the answers to the most likely moves of the person, max_player, until start is called.
+        :param board: Board after the ai move, with the person to move
+        :param max_player: True when white (the person) is to move
+        :return:
+        """
+        self._cancel_except()
+        if self.ponder_replies <= 0:
+            return
+        replies = [apply_move(board, *move) for move in generate_moves(board, WHITE if max_player else RED)]
+        if self.evaluator is not None:
+            replies.sort(key=self.evaluator.evaluate, reverse=max_player)
+        for reply in replies[:self.ponder_replies]:
+            if reply.winner() is None:
+                self._submit(reply, not max_player)
+
+    def poll(self):
+        """
+        Result of the requested search once it is done, None while it runs or when nothing was requested.
+        An exception of the search is raised here.
+        :return: the result of search or None
+        """
+        if self.request is None or not self.request.done():
+            return None
+        result = self.request.result()
+        self.request = None
+        return result
+
+    @property
+    def thinking(self):
+        """True while the requested search runs"""
+        return self.request is not None
+
+    def cancel(self):
+        """Stop every search and drop its result, e.g. when the game is reset"""
+        self._cancel_except()
+        self.request = None
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown()
@@ -0,0 +1,42 @@
+"""
+Batch evaluation: encode many positions into a feature matrix and evaluate them with one dot product against
+the weights of Evaluator.return_weights().
+"""
+'''bias, red, white, red kings, white kings, threatened red, threatened white; same order as the weights'''
+FEATURES = 7
+
+
+def features(board):
+    """Feature row of a Board or BitBoard, Evaluator.evaluate() is the dot product of it with the weights"""
+    return (1.0, board.red_left, board.white_left, board.red_kings, board.white_kings, board.threaten_reds,
+            board.threaten_whites)
+
+
+def feature_matrix(boards):
+    """
+    Encode positions into a (len(boards), FEATURES) matrix.
+    :param boards:
+    :return:
+    """
+    np = _require_numpy()
+    return np.array([features(board) for board in boards], dtype=np.float64).reshape(-1, FEATURES)
+
+
+def evaluate_batch(matrix, weights):
+    """
+    Evaluate every row of a feature matrix at once.
+    :param matrix:
+    :param weights: the 7 weights of Evaluator.return_weights()
+    :return: array of values
+    """
+    np = _require_numpy()
+    return matrix @ np.asarray(weights, dtype=np.float64)
+
+
+def _require_numpy():
+    """numpy on first use, so that Evaluator.features does not load it for the engine"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('batch evaluation needs numpy: pip install numpy') from None
+    return numpy
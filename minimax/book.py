@@ -0,0 +1,342 @@
+"""
+Opening book and solved endgames in one sorted file, queried through mmap with a binary search.
+
+The file is a header followed by fixed size entries sorted by the Zobrist hash of their position. An entry also
+stores the position itself, so a hash collision never returns the wrong position.
+
+Header, little endian: magic b'CKBK', version (uint16), entry size (uint16), entry count (uint32), the most pieces
+of a solved endgame (uint32, 0 when the file has none).
+
+Entry, little endian, 28 bytes:
+    key                 uint64 Zobrist hash (minimax.zobrist.hash_board)
+    red, white, kings   uint32 masks of the BitBoard squares
+    white_to_move       uint8
+    kind                uint8, OPENING (value of a deep search) or ENDGAME (exact)
+    move                int16 move key (from_square * 32 + to_square) of the best move, -1 when there is none
+    value               float32 value for white; a solved endgame is +-(WIN_SCORE - plies to the end), 0 a draw
+
+Opening entries come from deep alpha-beta searches of every position a few plies from the start. Endgames are
+solved by retrograde analysis of every position with at most max_pieces pieces: a side without pieces or
+without moves loses, a position that is neither won nor lost is a draw.
+"""
+import mmap
+import os
+import struct
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, product
+
+from checkers.bitboard import BitBoard, SQUARES
+from checkers.constants import RED, WHITE
+from .algorithm import minimax, generate_moves, apply_move
+from .evaluator import make_evaluator
+from .ordering import move_key
+from .transposition import TranspositionTable, NO_MOVE
+from .zobrist import hash_board
+
+MAGIC = b'CKBK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+ENTRY = struct.Struct('<QIIIBBhf')
+KEY = struct.Struct('<Q')
+OPENING, ENDGAME = 1, 2
+'''value of a won position, less one per ply to the end, so a search prefers the fastest win and slowest loss'''
+WIN_SCORE = 1000.0
+'''men never stand on the row where they are crowned'''
+RED_CROWN_ROW = 0x0000000F
+WHITE_CROWN_ROW = 0xF0000000
+
+BookEntry = namedtuple('BookEntry', ['kind', 'move', 'value'])
+
+
+class PositionBook:
+    """Read side of a book file. Only the pages a lookup touches are read from disk."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.view = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, entry_size, self.count, self.max_pieces = HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC or version != VERSION or entry_size != ENTRY.size:
+            self.close()
+            raise ValueError(f'{path} is not a version {VERSION} book file')
+        self.hits = self.misses = 0
+
+    def _key(self, index):
+        return KEY.unpack_from(self.view, HEADER.size + index * ENTRY.size)[0]
+
+    def lookup(self, board, max_player):
+        """
+        Return the BookEntry of a Board or BitBoard position with the side to move, or None.
+        :param board:
+        :param max_player: True when white is to move
+        :return:
+        """
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_board(board)
+        key = hash_board(board, max_player)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        # entries with the same key are next to each other, the stored position tells them apart
+        while low < self.count:
+            entry_key, red, white, kings, white_to_move, kind, move, value = ENTRY.unpack_from(
+                self.view, HEADER.size + low * ENTRY.size)
+            if entry_key != key:
+                break
+            if (red, white, kings, white_to_move) == (board.red, board.white, board.kings, bool(max_player)):
+                self.hits += 1
+                return BookEntry(kind, move, value)
+            low += 1
+        self.misses += 1
+        return None
+
+    def probe(self, board, max_player):
+        """
+        Exact value of a solved endgame for the search, or None. Positions with more pieces than the endgames
+        are not looked up, a finished game is worth +-WIN_SCORE.
+        :param board:
+        :param max_player:
+        :return:
+        """
+        if board.red_left + board.white_left > self.max_pieces:
+            return None
+        winner = board.winner()
+        if winner is not None:
+            return WIN_SCORE if winner == WHITE else -WIN_SCORE
+        entry = self.lookup(board, max_player)
+        return entry.value if entry is not None and entry.kind == ENDGAME else None
+
+    def best_move(self, board, max_player):
+        """
+        Return (value, (piece, move, skip)) of the book move of the position, or None.
+        :param board:
+        :param max_player:
+        :return:
+        """
+        entry = self.lookup(board, max_player)
+        if entry is None or entry.move == NO_MOVE:
+            return None
+        for move in generate_moves(board, WHITE if max_player else RED):
+            if move_key(*move[:2]) == entry.move:
+                return entry.value, move
+        return None
+
+    def close(self):
+        self.view.close()
+        self.file.close()
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f'<PositionBook {self.path} entries={self.count} endgames<={self.max_pieces} ' \
+               f'hits={self.hits} misses={self.misses}>'
+
+
+def write_book(path, entries, max_pieces=0):
+    """
+    Write entries sorted by key. The file is written next to path and renamed, so readers never see half a file.
+    :param path:
+    :param entries: iterable of (red, white, kings, white_to_move, kind, move, value)
+    :param max_pieces: most pieces of the solved endgames among the entries
+    :return: number of entries written
+    """
+    rows = sorted((hash_board(BitBoard(red, white, kings), white_to_move), red, white, kings, white_to_move, kind,
+                   move, value) for red, white, kings, white_to_move, kind, move, value in entries)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, ENTRY.size, len(rows), max_pieces))
+        for row in rows:
+            file.write(ENTRY.pack(*row))
+    os.replace(temporary, path)
+    return len(rows)
+
+
+def opening_positions(plies):
+    """Every distinct (red, white, kings, white_to_move) reachable from the start in at most plies moves"""
+    start = BitBoard.start()
+    seen = {(start.red, start.white, start.kings, False)}
+    frontier = [(start, False)]
+    for _ in range(plies):
+        following = []
+        for board, max_player in frontier:
+            for child in board.children(WHITE if max_player else RED):
+                position = (child.red, child.white, child.kings, not max_player)
+                if position not in seen:
+                    seen.add(position)
+                    following.append((child, not max_player))
+        frontier = following
+    return sorted(seen)
+
+
+def _search_opening(args):
+    """Worker side: deep alpha-beta search of one opening position"""
+    (red, white, kings, white_to_move), depth, weights = args
+    board = BitBoard(red, white, kings)
+    value, best = minimax(board, depth, white_to_move, None, make_evaluator(weights), alpha_beta=True,
+                          table=TranspositionTable(4))
+    move = NO_MOVE
+    for candidate in generate_moves(board, WHITE if white_to_move else RED):
+        child = apply_move(board, *candidate)
+        if best is not None and (child.red, child.white, child.kings) == (best.red, best.white, best.kings):
+            move = move_key(*candidate[:2])
+            break
+    return red, white, kings, white_to_move, OPENING, move, value
+
+
+def build_openings(plies, depth, weights, executor=None):
+    """
+    Search every position up to plies moves from the start to depth.
+    :param plies:
+    :param depth:
+    :param weights: evaluation weights of the searches
+    :param executor: optional process pool
+    :return: list of entries for write_book
+    """
+    jobs = [(position, depth, tuple(weights)) for position in opening_positions(plies)]
+    if executor is None:
+        return [_search_opening(job) for job in jobs]
+    return list(executor.map(_search_opening, jobs, chunksize=8))
+
+
+def endgame_positions(max_pieces):
+    """Every (red, white, kings, white_to_move) with both colours and at most max_pieces pieces"""
+    kinds = ((True, False), (True, True), (False, False), (False, True))  # (red, king)
+    for count in range(2, max_pieces + 1):
+        for squares in combinations(range(SQUARES), count):
+            for chosen in product(kinds, repeat=count):
+                red = white = kings = 0
+                for square, (is_red, king) in zip(squares, chosen):
+                    bit = 1 << square
+                    if is_red:
+                        red |= bit
+                    else:
+                        white |= bit
+                    if king:
+                        kings |= bit
+                if not red or not white or red & ~kings & RED_CROWN_ROW or white & ~kings & WHITE_CROWN_ROW:
+                    continue
+                yield red, white, kings, False
+                yield red, white, kings, True
+
+
+def solve_endgames(max_pieces, log=None):
+    """
+    Retrograde analysis: positions without moves are lost, then every resolved position resolves its
+    predecessors in order of the distance to the end.
+    :param max_pieces:
+    :param log: optional print-like function for progress
+    :return: list of entries for write_book
+    """
+    positions = list(endgame_positions(max_pieces))
+    index = {position: number for number, position in enumerate(positions)}
+    if log is not None:
+        log(f'{len(positions)} endgame positions with at most {max_pieces} pieces')
+
+    # children[i]: (move key, child index), the child is -1 when the move captures the last enemy piece
+    children = []
+    parents = [[] for _ in positions]
+    result = [0] * len(positions)  # 1 the side to move wins, -1 it loses, 0 unresolved (a draw at the end)
+    distance = [0] * len(positions)
+    remaining = [0] * len(positions)
+    for number, (red, white, kings, white_to_move) in enumerate(positions):
+        board = BitBoard(red, white, kings)
+        moves = []
+        for move in generate_moves(board, WHITE if white_to_move else RED):
+            record = board.make_move(*move)
+            child = index.get((board.red, board.white, board.kings, not white_to_move), -1)
+            board.unmake_move(record)
+            moves.append((move_key(*move[:2]), child))
+            if child >= 0:
+                parents[child].append(number)
+        children.append(moves)
+        remaining[number] = len(moves)
+
+    # distance 0 losses before distance 1 wins, so the queue stays ordered by distance
+    queue = deque(number for number, moves in enumerate(children) if not moves)
+    for number in queue:
+        result[number] = -1
+    for number, moves in enumerate(children):
+        if any(child < 0 for _, child in moves):
+            result[number], distance[number] = 1, 1
+            queue.append(number)
+    while queue:
+        number = queue.popleft()
+        for parent in parents[number]:
+            if result[parent]:
+                continue
+            if result[number] < 0:
+                result[parent], distance[parent] = 1, distance[number] + 1
+                queue.append(parent)
+            else:
+                remaining[parent] -= 1
+                if remaining[parent] == 0:
+                    result[parent], distance[parent] = -1, distance[number] + 1
+                    queue.append(parent)
+
+    entries = []
+    for number, (red, white, kings, white_to_move) in enumerate(positions):
+        outcome = result[number]
+        move = _best_endgame_move(children[number], outcome, result, distance)
+        value = outcome * (WIN_SCORE - distance[number]) * (1 if white_to_move else -1)
+        entries.append((red, white, kings, white_to_move, ENDGAME, move, value))
+    if log is not None:
+        log(f'{result.count(1)} won, {result.count(-1)} lost, {result.count(0)} drawn for the side to move')
+    return entries
+
+
+def _best_endgame_move(moves, outcome, result, distance):
+    """The fastest win, the slowest loss or a move that keeps the draw"""
+    best, best_distance = NO_MOVE, None
+    for key, child in moves:
+        if outcome > 0 and (child < 0 or result[child] < 0):
+            child_distance = 0 if child < 0 else distance[child]
+            if best_distance is None or child_distance < best_distance:
+                best, best_distance = key, child_distance
+        elif outcome < 0 and (best_distance is None or distance[child] > best_distance):
+            best, best_distance = key, distance[child]
+        elif outcome == 0 and child >= 0 and result[child] == 0:
+            return key
+    return best
+
+
+def build_book(path, plies=4, depth=6, weights=None, max_pieces=3, workers=None, log=print):
+    """
+    Build a book file with the openings and the solved endgames.
+    :param path:
+    :param plies: opening positions up to this many moves from the start, 0 for none
+    :param depth: search depth of the opening positions
+    :param weights: evaluation weights of the opening searches
+    :param max_pieces: solve every endgame with at most this many pieces, 0 for none
+    :param workers: processes of the opening searches, 0 searches in this process
+    :param log:
+    :return: number of entries written
+    """
+    entries = []
+    if plies > 0:
+        start = time.perf_counter()
+        if workers == 0:
+            entries += build_openings(plies, depth, weights)
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                entries += build_openings(plies, depth, weights, executor)
+        log(f'{len(entries)} opening positions searched to depth {depth} in {time.perf_counter() - start:.1f}s')
+    if max_pieces > 0:
+        start = time.perf_counter()
+        entries += solve_endgames(max_pieces, log)
+        log(f'endgames solved in {time.perf_counter() - start:.1f}s')
+    count = write_book(path, entries, max_pieces)
+    log(f'{count} entries, {os.path.getsize(path) / 1024:.0f}kB written to {path}')
+    return count
@@ -0,0 +1,98 @@
+"""
+Checkpoints of the evaluation weights: one small JSON file per saved epoch, written atomically.
+"""
+import glob
+import json
+import os
+
+PREFIX = 'checkpoint-'
+SUFFIX = '.json'
+
+
+def _to_json(value):
+    """random.getstate() is made of tuples, JSON wants lists"""
+    if isinstance(value, tuple):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def _to_state(value):
+    if isinstance(value, list):
+        return tuple(_to_state(item) for item in value)
+    return value
+
+
+def save_checkpoint(path, weights, epoch, seed=None, optimizer_state=None, rng_state=None):
+    """
+    Write a checkpoint file, through a temporary file so a crash never leaves half a checkpoint.
+    :param path:
+    :param weights: return_weights() of the evaluator
+    :param epoch: last finished epoch
+    :param seed: seed the run was started with
+    :param optimizer_state: dict of the optimizer settings and state
+    :param rng_state: random.getstate() (or random.Random().getstate()) to resume the same random stream
+    :return:
+    """
+    data = {'epoch': epoch, 'weights': [float(weight) for weight in weights], 'seed': seed,
+            'optimizer': optimizer_state or {}, 'rng_state': _to_json(rng_state)}
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path):
+    """
+    Read a checkpoint file, or the latest checkpoint of a directory.
+    :param path:
+    :return: dict with epoch, weights, seed, optimizer and rng_state
+    """
+    if os.path.isdir(path):
+        latest = CheckpointManager(path).latest()
+        if latest is None:
+            raise FileNotFoundError(f'no checkpoint in {path}')
+        path = latest
+    with open(path) as file:
+        data = json.load(file)
+    data['rng_state'] = _to_state(data.get('rng_state'))
+    return data
+
+
+class CheckpointManager:
+    """Saves a checkpoint every few epochs into a directory and keeps the newest ones."""
+
+    def __init__(self, directory, every=1, keep=5):
+        self.directory = directory
+        self.every = every
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, epoch):
+        return os.path.join(self.directory, f'{PREFIX}{epoch:06d}{SUFFIX}')
+
+    def checkpoints(self):
+        return sorted(glob.glob(os.path.join(self.directory, PREFIX + '*' + SUFFIX)))
+
+    def latest(self):
+        checkpoints = self.checkpoints()
+        return checkpoints[-1] if checkpoints else None
+
+    def load_latest(self):
+        """Return the latest checkpoint, or None when there is none"""
+        latest = self.latest()
+        return load_checkpoint(latest) if latest is not None else None
+
+    def save(self, epoch, weights, seed=None, optimizer_state=None, rng_state=None, force=False):
+        """
+        Save the epoch if it is one of every `every` epochs (or force) and drop the oldest checkpoints.
+        :return: path of the checkpoint, or None when the epoch was skipped
+        """
+        if not force and (epoch + 1) % self.every:
+            return None
+        path = self.path(epoch)
+        save_checkpoint(path, weights, epoch, seed, optimizer_state, rng_state)
+        for old in self.checkpoints()[:-self.keep]:
+            os.remove(old)
+        return path
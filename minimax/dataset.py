@@ -0,0 +1,169 @@
+"""
+Append-only binary files of self-play positions.
+
+A file starts with a header (magic, version, record size) followed by chunks. A chunk is a small header
+(magic, record count) and that many fixed size records. Writers only ever append whole chunks, so a crash
+leaves at most one truncated chunk at the end, which readers skip. Readers memory-map the file and walk it
+chunk by chunk, so a file of any size is read with flat memory.
+
+Record, little endian, 44 bytes:
+    red, white, kings   uint32 masks of the BitBoard squares
+    white_to_move       uint8
+    result              int8, 1 white won, -1 red won, 0 draw
+    (2 bytes padding)
+    features            6 float32: red, white, red kings, white kings, threatened red, threatened white
+    value               float32 search value of the position
+"""
+import glob
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from .batch import features
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed by iter_chunks
+    np = None
+
+MAGIC = b'CKDS'
+VERSION = 1
+CHUNK_MAGIC = b'CHNK'
+HEADER = struct.Struct('<4sHH')
+CHUNK_HEADER = struct.Struct('<4sI')
+RECORD = struct.Struct('<IIIBbxx7f')
+RESULTS = {WHITE: 1, RED: -1, None: 0}
+
+Record = namedtuple('Record', ['red', 'white', 'kings', 'white_to_move', 'result', 'features', 'value'])
+
+
+class DatasetWriter:
+    """Streams positions to a dataset file, one chunk at a time."""
+
+    def __init__(self, path, chunk_records=4096):
+        """
+        :param path: file to append to, it is created with a header when it does not exist. A chunk torn by a crash
+            at its end is cut off first, so the new chunks follow the last complete one
+        :param chunk_records: records buffered before a chunk is written
+        """
+        size = _complete_size(path) if os.path.exists(path) else 0
+        self.file = open(path, 'ab')
+        if size < os.path.getsize(path):
+            self.file.truncate(size)
+        if size == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self.chunk_records = chunk_records
+        self.buffer = bytearray()
+        self.count = 0
+        self.written = 0
+
+    def write(self, board, max_player, value, winner):
+        """
+        Add one position.
+        :param board: Board or BitBoard
+        :param max_player: True when white is to move
+        :param value: search value of the position
+        :param winner: WHITE, RED or None for a draw
+        :return:
+        """
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_board(board)
+        self.buffer += RECORD.pack(board.red, board.white, board.kings, bool(max_player), RESULTS[winner],
+                                   *features(board)[1:], value)
+        self.count += 1
+        if self.count >= self.chunk_records:
+            self.flush()
+
+    def write_game(self, positions, winner):
+        """
+        Add every (board, max_player, value) of a finished game.
+        :param positions:
+        :param winner:
+        :return:
+        """
+        for board, max_player, value in positions:
+            self.write(board, max_player, value, winner)
+
+    def flush(self):
+        if self.count:
+            self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, self.count) + self.buffer)
+            self.file.flush()
+            self.written += self.count
+            self.buffer = bytearray()
+            self.count = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _expand(paths):
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        yield from sorted(glob.glob(path)) if glob.has_magic(path) else [path]
+
+
+def _chunks(path):
+    """Yield (mmap, offset, count) of every complete chunk of a file"""
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            magic, version, record_size = HEADER.unpack_from(view, 0)
+            if magic != MAGIC or record_size != RECORD.size:
+                raise ValueError(f'{path} is not a version {VERSION} dataset file')
+            offset = HEADER.size
+            while offset + CHUNK_HEADER.size <= len(view):
+                magic, count = CHUNK_HEADER.unpack_from(view, offset)
+                offset += CHUNK_HEADER.size
+                if magic != CHUNK_MAGIC or offset + count * RECORD.size > len(view):
+                    break  # truncated by a crash while writing
+                yield view, offset, count
+                offset += count * RECORD.size
+
+
+def _complete_size(path):
+    """Bytes of a file up to the end of its last complete chunk, 0 when not even its header is complete"""
+    end = HEADER.size if os.path.getsize(path) >= HEADER.size else 0
+    for _, offset, count in _chunks(path):
+        end = offset + count * RECORD.size
+    return end
+
+
+def iter_records(paths):
+    """
+    Generator of the Records of one or more dataset files (glob patterns are expanded).
+    :param paths:
+    :return:
+    """
+    for path in _expand(paths):
+        for view, offset, count in _chunks(path):
+            for index in range(count):
+                red, white, kings, white_to_move, result, *rest = RECORD.unpack_from(view, offset + index * RECORD.size)
+                yield Record(red, white, kings, bool(white_to_move), result, tuple(rest[:6]), rest[6])
+
+
+def iter_chunks(paths):
+    """
+    Generator of numpy structured arrays, one per chunk, for vectorized training.
+    :param paths:
+    :return:
+    """
+    if np is None:
+        raise ImportError('iter_chunks needs numpy: pip install numpy')
+    dtype = np.dtype([('red', '<u4'), ('white', '<u4'), ('kings', '<u4'), ('white_to_move', 'u1'), ('result', 'i1'),
+                      ('pad', 'V2'), ('features', '<f4', (6,)), ('value', '<f4')])
+    for path in _expand(paths):
+        for view, offset, count in _chunks(path):
+            # copy, so no view into the mmap outlives it
+            yield np.frombuffer(view, dtype=dtype, count=count, offset=offset).copy()
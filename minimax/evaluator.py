@@ -0,0 +1,82 @@
+import random
+
+from . import batch
+from .pst import PieceSquareEvaluator, FEATURES as PST_FEATURES
+
+'''linear: material and threatened pieces (Evaluator), pst: piece-square tables (minimax.pst)'''
+EVALUATORS = ('linear', 'pst')
+
+
+class Evaluator:
+    """
+    Linear evaluation function of the AI player. It holds the weights once for a whole search, so boards only
+    carry the game state. White maximizes, red minimizes.
+    """
+
+    def __init__(self, weights=None):
+        """
+        :param weights: bias, red, white, red king, white king, threatened red and threatened white weights;
+            random when None
+        """
+        '''weights for optimizing the evaluate function'''
+        if weights is None:
+            weights = [random.gauss(0, 1) for _ in range(7)]
+        self.apply_weights(weights)
+
+    def evaluate(self, board):
+        """
+        Evaluation function for AI player!
+        :param board: Board or BitBoard
+        :return:
+        """
+        return self.bias + (self.weight_red * board.red_left) + (self.weight_white * board.white_left) + (
+                self.weight_red_king * board.red_kings) + (self.weight_white_king * board.white_kings) + (
+                       self.weight_threaten_red * board.threaten_reds) + (
+                       self.weight_threaten_white * board.threaten_whites)
+
+    def features(self, board):
+        return batch.features(board)
+
+    def optimize_weights(self, board, loss, lr):
+        """
+        One gradient step of the weights towards the loss on the features of the board.
+        :param board:
+        :param loss: target - evaluation
+        :param lr:
+        :return:
+        """
+        self.bias = self.bias + lr * 1 * loss
+        self.weight_red = self.weight_red + lr * board.red_left * loss
+        self.weight_white = self.weight_white + lr * board.white_left * loss
+        self.weight_red_king = self.weight_red_king + lr * board.red_kings * loss
+        self.weight_white_king = self.weight_white_king + lr * board.white_kings * loss
+        self.weight_threaten_red = self.weight_threaten_red + lr * board.threaten_reds * loss
+        self.weight_threaten_white = self.weight_threaten_white + lr * board.threaten_whites * loss
+
+    def apply_weights(self, weights):
+        (self.bias, self.weight_red, self.weight_white, self.weight_red_king, self.weight_white_king,
+         self.weight_threaten_red, self.weight_threaten_white) = weights
+
+    def return_weights(self):
+        return [self.bias, self.weight_red, self.weight_white, self.weight_red_king, self.weight_white_king,
+                self.weight_threaten_red, self.weight_threaten_white]
+
+    def __repr__(self):
+        return f'<Evaluator {self.return_weights()}>'
+
+
+def make_evaluator(weights=None, kind='linear'):
+    """
+    Evaluator of a weight vector, its length tells which one: the 7 weights of Evaluator or the weights of
+    PieceSquareEvaluator, so checkpoints of either load the same way.
+    :param weights: None for a new evaluator of the kind (random weights for Evaluator, material for the tables)
+    :param kind: one of EVALUATORS; 7 weights with 'pst' start the piece-square tables from their material weights
+    :return:
+    """
+    if kind not in EVALUATORS:
+        raise ValueError(f'unknown evaluator {kind!r}, expected one of {EVALUATORS}')
+    if weights is not None and len(weights) == PST_FEATURES:
+        return PieceSquareEvaluator(weights)
+    if kind == 'pst':
+        return PieceSquareEvaluator() if weights is None else PieceSquareEvaluator.from_linear(weights)
+    return Evaluator(weights)
@@ -0,0 +1,259 @@
+"""
+Monte Carlo tree search (UCT), an anytime alternative to minimax: it can be stopped after any number of
+iterations or at any time and still has a best move, the most visited one.
+
+Every iteration walks down the tree by the UCB1 score, adds one new position and scores it with a playout:
+'random' plays uniformly random moves until the game ends (or PLAYOUT_PLIES), 'eval' plays playout_depth random
+moves and scores the position with the evaluator, much faster and less noisy. Scores are white's share of the win,
+between 0 and 1. The tree is searched on BitBoards with the same move generation and make_move as minimax.
+
+A MonteCarloTree is kept between moves like a transposition table: when the next search starts from a position
+already in the tree (the reply to the last move), its subtree and visit counts are reused. With a process pool,
+every worker grows its own tree from the root for the same budget and their root visit counts are added up
+(root parallelization).
+"""
+import math
+import random
+import time
+
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from .algorithm import generate_moves, apply_move, SearchCancelled
+from .stats import SearchStats
+
+PLAYOUTS = ('random', 'eval')
+EXPLORATION = 1.4
+'''random playouts longer than this are scored like an eval playout (a draw without an evaluator)'''
+PLAYOUT_PLIES = 150
+'''evaluation difference that makes a 73% (1 / (1 + e^-1)) winning chance'''
+EVAL_SCALE = 2.0
+'''iterations between two checks of the clock and the stop event'''
+CHECK_EVERY = 64
+
+
+class Node:
+    """A position of the tree; wins are counted for the player who made the move into it."""
+    __slots__ = ('key', 'move', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, board, max_player, move=None, parent=None, rng=None):
+        self.key = (board.red, board.white, board.kings, max_player)
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = generate_moves(board, WHITE if max_player else RED) if board.winner() is None else []
+        if rng is not None:
+            rng.shuffle(self.untried)
+        self.visits = 0
+        self.wins = 0.0
+
+    @property
+    def max_player(self):
+        return self.key[3]
+
+
+class MonteCarloTree:
+    """UCT search tree, kept between the moves of a game."""
+
+    def __init__(self, exploration=EXPLORATION, playout='eval', playout_depth=2, seed=None):
+        """
+        :param exploration: UCB1 constant, higher tries the less visited moves more often
+        :param playout: 'random' or 'eval', see the module documentation
+        :param playout_depth: random moves of an 'eval' playout
+        :param seed: seed of the move order and the playouts
+        """
+        if playout not in PLAYOUTS:
+            raise ValueError(f'unknown playout {playout!r}, expected one of {PLAYOUTS}')
+        self.exploration = exploration
+        self.playout = playout
+        self.playout_depth = playout_depth
+        self.rng = random.Random(seed)
+        self.root = None
+        '''visits of the root that came from an earlier search'''
+        self.reused = 0
+
+    def clear(self):
+        """Forget the tree, e.g. after the evaluation weights changed"""
+        self.root = None
+
+    def set_root(self, board, max_player):
+        """
+        Make the position the root, reusing the subtree of the current root's child or grandchild that holds it.
+        :param board: BitBoard
+        :param max_player: True when white is to move
+        :return:
+        """
+        # the nodes store a bool, WHITE would never match them
+        max_player = bool(max_player)
+        key = (board.red, board.white, board.kings, max_player)
+        root = self.root
+        found = None
+        if root is not None:
+            if root.key == key:
+                found = root
+            else:
+                found = next((node for child in root.children for node in (child, *child.children) if node.key == key),
+                             None)
+        if found is None:
+            found = Node(board, max_player, rng=self.rng)
+        found.parent = None
+        found.move = None
+        self.root = found
+        self.reused = found.visits
+
+    def run(self, evaluator, iterations=0, move_time_ms=0, stats=None, stop=None):
+        """
+        Grow the tree until the iterations are done or the time is up (whichever limit is set and comes first).
+        :param evaluator: Evaluator of the 'eval' playouts
+        :param iterations: 0 for no limit
+        :param move_time_ms: 0 for no limit
+        :param stats: SearchStats, nodes counts the new tree nodes and leaves the playouts
+        :param stop: threading.Event, SearchCancelled is raised soon after it is set
+        :return: number of iterations run
+        """
+        if not iterations and not move_time_ms:
+            raise ValueError('give MCTS an iteration or a time limit')
+        deadline = time.perf_counter() + move_time_ms / 1000 if move_time_ms else None
+        done = 0
+        while not iterations or done < iterations:
+            if done % CHECK_EVERY == 0:
+                if stop is not None and stop.is_set():
+                    raise SearchCancelled()
+                if deadline is not None and time.perf_counter() >= deadline and done:
+                    break
+            self._iterate(evaluator, stats)
+            done += 1
+        return done
+
+    def _iterate(self, evaluator, stats):
+        node = self.root
+        board = BitBoard(*node.key[:3])
+        # selection: follow the best UCB1 score while every move of the node has a child
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            exploration = self.exploration
+            node = max(node.children,
+                       key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits))
+            board.make_move(*node.move)
+        # expansion
+        if node.untried:
+            move = node.untried.pop()
+            board.make_move(*move)
+            child = Node(board, not node.max_player, move, node, self.rng)
+            node.children.append(child)
+            node = child
+            if stats is not None:
+                stats.nodes += 1
+        # simulation, scored for white
+        result = self._playout(board, node.max_player, evaluator)
+        if stats is not None:
+            stats.leaves += 1
+        # backpropagation: the node's wins belong to the player who moved into it
+        while node is not None:
+            node.visits += 1
+            node.wins += result if not node.max_player else 1 - result
+            node = node.parent
+
+    def _playout(self, board, max_player, evaluator):
+        rng = self.rng
+        plies = self.playout_depth if self.playout == 'eval' else PLAYOUT_PLIES
+        for _ in range(plies):
+            winner = board.winner()
+            if winner is not None:
+                return 1.0 if winner == WHITE else 0.0
+            moves = generate_moves(board, WHITE if max_player else RED)
+            if not moves:
+                return 0.0 if max_player else 1.0
+            board.make_move(*moves[rng.randrange(len(moves))])
+            max_player = not max_player
+        winner = board.winner()
+        if winner is not None:
+            return 1.0 if winner == WHITE else 0.0
+        if evaluator is None:
+            return 0.5
+        return 1 / (1 + math.exp(-max(-50.0, min(50.0, evaluator.evaluate(board) / EVAL_SCALE))))
+
+    def root_moves(self):
+        """(move, visits, wins for the mover) of every root child"""
+        return [(child.move, child.visits, child.wins) for child in self.root.children]
+
+
+def _best(moves, max_player):
+    """Most visited move of (move, visits, wins) and its score for white"""
+    move, visits, wins = max(moves, key=lambda entry: entry[1])
+    share = wins / visits if visits else 0.5
+    return (share if max_player else 1 - share), move
+
+
+def _search_tree(args):
+    """Worker side of the root parallel search: grow a fresh tree and return its root moves"""
+    red, white, kings, max_player, evaluator, settings, seed, iterations, move_time_ms = args
+    tree = MonteCarloTree(*settings, seed=seed)
+    tree.set_root(BitBoard(red, white, kings), max_player)
+    stats = SearchStats()
+    tree.run(evaluator, iterations, move_time_ms, stats)
+    return tree.root_moves(), stats
+
+
+def mcts(position, max_player, game, evaluator, iterations=0, move_time_ms=0, tree=None, executor=None, workers=1,
+         stats=None, book=None, stop=None):
+    """
+    Monte Carlo tree search of the best move, with the interface of minimax.
+    :param position: Board or BitBoard, left unchanged
+    :param max_player: True when white is to move
+    :param game:
+    :param evaluator: Evaluator of the 'eval' playouts
+    :param iterations: iterations of the search (per worker), 0 for no limit
+    :param move_time_ms: time budget, 0 for no limit
+    :param tree: MonteCarloTree kept between moves; a temporary one with the default settings when None
+    :param executor: process pool of the root parallel search; the tree's settings are used, but not its nodes
+    :param workers: number of trees grown in the pool, one per worker
+    :param stats: SearchStats, nodes counts the tree nodes and leaves the playouts
+    :param book: PositionBook consulted before the search
+    :param stop: threading.Event, SearchCancelled is raised soon after it is set (sequential search only)
+    :return: (white's winning share of the best move between 0 and 1, board after the best move)
+    """
+    max_player = bool(max_player)
+    if not isinstance(position, BitBoard):
+        value, best_board = mcts(BitBoard.from_board(position), max_player, game, evaluator, iterations, move_time_ms,
+                                 tree, executor, workers, stats, book, stop)
+        return value, best_board.to_board() if best_board is not None else None
+
+    if stats is None:
+        stats = SearchStats()
+    start = time.perf_counter()
+    if book is not None:
+        hit = book.best_move(position, max_player)
+        if hit is not None:
+            stats.book_hits += 1
+            new_board = apply_move(position, *hit[1], game)
+            stats.seconds += time.perf_counter() - start
+            return hit[0], new_board
+    winner = position.winner()
+    if winner is not None:
+        return (1.0 if winner == WHITE else 0.0), position
+    if not generate_moves(position, WHITE if max_player else RED):
+        return (0.0 if max_player else 1.0), None
+
+    if tree is None:
+        tree = MonteCarloTree()
+    if executor is None:
+        tree.set_root(position, max_player)
+        tree.run(evaluator, iterations, move_time_ms, stats, stop)
+        moves = tree.root_moves()
+    else:
+        settings = (tree.exploration, tree.playout, tree.playout_depth)
+        jobs = [(position.red, position.white, position.kings, max_player, evaluator, settings,
+                 tree.rng.getrandbits(32), iterations, move_time_ms) for _ in range(workers)]
+        totals = {}
+        for root_moves, worker_stats in executor.map(_search_tree, jobs):
+            stats.nodes += worker_stats.nodes
+            stats.leaves += worker_stats.leaves
+            for move, visits, wins in root_moves:
+                entry = totals.setdefault(move, [0, 0.0])
+                entry[0] += visits
+                entry[1] += wins
+        moves = [(move, visits, wins) for move, (visits, wins) in totals.items()]
+    value, best_move = _best(moves, max_player)
+    stats.depth = 1
+    stats.seconds += time.perf_counter() - start
+    return value, apply_move(position, *best_move, game)
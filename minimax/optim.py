@@ -1,3 +1,9 @@
+'''default step of optimizer, applied to the raw features of one position'''
+LR = 0.01
+'''default step of batch_optimizer, whose step is normalized: stable for 0 < lr < 2'''
+BATCH_LR = 0.5
+
+
 def criterion(v_train, v_b0):
     loss = v_train - v_b0
     return loss
@@ -8,3 +14,18 @@ def optimizer(weights, features, loss, lr):
         weights[i] = weights[i] + lr * features[i] * loss
 
     return weights
+
+
+def batch_optimizer(weights, features, losses, lr):
+    """
+    Vectorized version of optimizer for a minibatch: one normalized least mean squares step.
+    The mean gradient is divided by the mean squared norm of the feature rows, so the step stays stable for
+    0 < lr < 2 whatever the scale of the features.
+    :param weights: numpy array of the weights
+    :param features: (n, len(weights)) numpy array
+    :param losses: n numpy array of target - prediction
+    :param lr:
+    :return: the new weights
+    """
+    norm = (features * features).sum(axis=1).mean()
+    return weights + lr * (features.T @ losses) / (len(losses) * max(norm, 1e-12))
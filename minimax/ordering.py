@@ -0,0 +1,73 @@
+from checkers.bitboard import popcount
+from checkers.tables import row_col_to_square
+
+MAX_KILLERS = 2
+
+
+def move_key(piece, move):
+    """
+    Integer key (from_square * 32 + to_square) of a move, the same for a Board, its copies and its BitBoard.
+    :param piece: Piece of a Board or square of a BitBoard
+    :param move: target of the move, (row, col) on a Board
+    :return:
+    """
+    if isinstance(piece, int):
+        return piece * 32 + move
+    return row_col_to_square(piece.row, piece.col) * 32 + row_col_to_square(*move)
+
+
+def capture_count(skip):
+    """Number of pieces captured by a move, skip is a list of pieces or a BitBoard mask."""
+    return popcount(skip) if isinstance(skip, int) else len(skip)
+
+
+class MoveOrderer:
+    """
+    Orders moves for alpha-beta: a given first move (the transposition table move), captures (most pieces first),
+    the killer moves of the ply, then the quiet moves by their history score.
+    """
+
+    def __init__(self):
+        self.killers = {}
+        self.history = {}
+
+    def order(self, moves, ply, first=None):
+        """
+        Sort a list of (piece, move, skip) in place and return it.
+        :param moves:
+        :param ply: distance from the root
+        :param first: key of a move to try before all others, e.g. the transposition table move
+        :return:
+        """
+        killers = self.killers.get(ply, ())
+        history = self.history
+
+        def score(entry):
+            piece, move, skip = entry
+            key = move_key(piece, move)
+            if key == first:
+                return 3, 0, 0
+            if skip:
+                return 2, capture_count(skip), history.get(key, 0)
+            return 1 if key in killers else 0, 0, history.get(key, 0)
+
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    def cutoff(self, entry, depth, ply):
+        """
+        Remember a quiet move that caused a beta cutoff.
+        :param entry: (piece, move, skip)
+        :param depth: remaining depth of the node
+        :param ply:
+        :return:
+        """
+        piece, move, skip = entry
+        if skip:
+            return
+        key = move_key(piece, move)
+        killers = self.killers.setdefault(ply, [])
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[MAX_KILLERS:]
+        self.history[key] = self.history.get(key, 0) + depth * depth
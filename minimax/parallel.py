@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from .algorithm import minimax, apply_move, generate_moves
+from .stats import SearchStats
+
+
+def _search_child(child, depth, max_player, evaluator, alpha_beta, timed=False):
+    """Worker side: search one root move. The child is a BitBoard, so only a few ints and the weights are pickled."""
+    stats = SearchStats(timed)
+    value = minimax(child, depth, max_player, None, evaluator, alpha_beta=alpha_beta, stats=stats)[0]
+    return value, stats
+
+
+def parallel_minimax(position, depth, max_player, game, evaluator, executor=None, workers=None, alpha_beta=False,
+                     stats=None, book=None):
+    """
+    Split the root moves across worker processes and search each one to depth - 1.
+    The value and the chosen move are the same as the sequential plain minimax.
+    :param position: Board or BitBoard, left unchanged
+    :param depth:
+    :param max_player: True when white is to move
+    :param game:
+    :param evaluator: Evaluator that scores the leaves, it is pickled once per root move
+    :param executor: ProcessPoolExecutor to reuse between moves, a temporary one is made when it is None
+    :param workers: size of the temporary pool, defaults to the number of CPUs
+    :param alpha_beta: search every root move with alpha-beta (values stay the same)
+    :param stats: SearchStats that receives the node counts of all workers. Its seconds are the wall time of the
+        search, the time split is summed over the workers
+    :param book: PositionBook consulted before the search, the workers search without it
+    :return: (value, board after the best move)
+    """
+    if depth == 0 or position.winner() is not None:
+        return evaluator.evaluate(position), position
+
+    if book is not None:
+        hit = book.best_move(position, max_player)
+        if hit is not None:
+            if stats is not None:
+                stats.book_hits += 1
+            return hit[0], apply_move(position, *hit[1], game)
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return parallel_minimax(position, depth, max_player, game, evaluator, pool, alpha_beta=alpha_beta,
+                                    stats=stats, book=book)
+
+    start = time.perf_counter()
+    timed = stats is not None and stats.timed
+    root = position if isinstance(position, BitBoard) else BitBoard.from_board(position)
+    moves = generate_moves(root, WHITE if max_player else RED)
+    futures = [executor.submit(_search_child, apply_move(root, *move), depth - 1, not max_player,
+                               evaluator, alpha_beta, timed)
+               for move in moves]
+
+    best_value = float('-inf') if max_player else float('inf')
+    best_move = None
+    for move, future in zip(moves, futures):
+        evaluation, child_stats = future.result()
+        if stats is not None:
+            seconds = stats.seconds
+            stats.merge(child_stats)
+            stats.seconds = seconds
+        if (evaluation >= best_value) if max_player else (evaluation <= best_value):
+            best_value, best_move = evaluation, move
+
+    best_board = None
+    if best_move is not None:
+        best_board = apply_move(root, *best_move)
+        if not isinstance(position, BitBoard):
+            best_board = best_board.to_board()
+    if stats is not None:
+        stats.nodes += 1
+        stats.depth = depth
+        stats.seconds += time.perf_counter() - start
+    return best_value, best_board
@@ -0,0 +1,112 @@
+"""
+Profilers that only run while a search runs: wrap every search in `with profiler:` and the time between the moves
+(drawing, waiting for the player) stays out of the profile.
+
+'cprofile' records every function call with cProfile. 'sample' is a statistical profiler: a background thread
+looks at the stack of the searching thread every interval and counts the functions on it, which slows the search
+down much less than cProfile.
+"""
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILERS = ('cprofile', 'sample')
+
+
+class SearchProfiler:
+    """Accumulates a profile over every search it wraps."""
+
+    def __init__(self, kind='cprofile', interval_ms=1.0):
+        """
+        :param kind: 'cprofile' or 'sample'
+        :param interval_ms: time between two samples of the sampling profiler
+        """
+        if kind not in PROFILERS:
+            raise ValueError(f'unknown profiler {kind!r}, expected one of {PROFILERS}')
+        self.kind = kind
+        self.interval = interval_ms / 1000
+        self.profile = cProfile.Profile() if kind == 'cprofile' else None
+        '''sampling: times a function was on top of the stack, on the stack at all, and every whole stack'''
+        self.own = Counter()
+        self.total = Counter()
+        self.stacks = Counter()
+        self.samples = 0
+        self._thread = None
+        self._target = None
+        self._active = threading.Event()
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        if self.profile is not None:
+            self.profile.enable()
+        else:
+            self._target = threading.get_ident()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name='search-sampler', daemon=True)
+                self._thread.start()
+            self._active.set()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None:
+            self.profile.disable()
+        else:
+            self._active.clear()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self._active.wait()
+            frame = sys._current_frames().get(self._target)
+            if frame is not None and self._active.is_set():
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                self.samples += 1
+                self.own[stack[0]] += 1
+                self.total.update(set(stack))
+                self.stacks[';'.join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def close(self):
+        """Stop the sampling thread"""
+        self._stop.set()
+        self._active.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def report(self, top=20):
+        """
+        Text report of the functions that took the most time.
+        :param top: number of functions
+        :return:
+        """
+        if self.profile is not None:
+            out = io.StringIO()
+            pstats.Stats(self.profile, stream=out).sort_stats('cumulative').print_stats(top)
+            return out.getvalue()
+        lines = [f'{self.samples} samples, every {self.interval * 1000:g}ms', '   own%  total%  function']
+        samples = max(self.samples, 1)
+        for function, count in self.own.most_common(top):
+            lines.append(f'{100 * count / samples:7.1f} {100 * self.total[function] / samples:7.1f}  {function}')
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        """
+        Save the profile: a pstats file for cProfile (open it with pstats or snakeviz), collapsed stacks for the
+        sampling profiler (one 'outer;...;inner count' line per stack, the input of flamegraph tools).
+        :param path:
+        :return:
+        """
+        if self.profile is not None:
+            self.profile.dump_stats(path)
+            return
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
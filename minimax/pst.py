@@ -0,0 +1,186 @@
+"""
+Piece-square evaluation: a value for every kind of piece (red man, red king, white man, white king) on every one of
+the 32 squares, plus the mobility and the men left on the home row of each side. White maximizes, red minimizes.
+
+The table part is summed by the boards themselves: Board.pst_score and BitBoard.pst_score compute it once for a
+table, then move and remove keep it up to date as pieces move, are captured or crowned, and make/unmake_move save
+and restore it. Mobility (simple moves) and the home rows are a fixed number of operations on the piece masks,
+which Board.masks keeps up to date the same way. So a position costs the same whatever the number of pieces, and
+much less than the threatened piece counts of Evaluator, which generate every capture of the position.
+
+Weights, FEATURES of them: bias, the 4 * 32 table values (kind major, kinds in the order of checkers.tables), red
+mobility, white mobility, red home row, white home row. feature_matrix() gives the matching feature rows for
+vectorized training: evaluate(board) is features(board) @ weights.
+"""
+from checkers.bitboard import BitBoard, popcount
+from checkers.tables import SQUARES, UP, DOWN, NEIGHBOURS
+
+'''home rows: red men start on the last row and crown on the first, white the other way round'''
+RED_HOME = 0xF0000000
+WHITE_HOME = 0x0000000F
+ALL_SQUARES = 0xFFFFFFFF
+KINDS = 4
+'''bias, tables, red mobility, white mobility, red home row, white home row'''
+FEATURES = 1 + KINDS * SQUARES + 4
+'''material of the default weights, as DEFAULT_WEIGHTS of minimax.selfplay: a man is worth 1 and a king 1.5'''
+MAN, KING = 1.0, 1.5
+
+
+def _steps():
+    steps = [{} for _ in range(4)]
+    for square in range(SQUARES):
+        for direction, target in enumerate(NEIGHBOURS[square]):
+            if target >= 0:
+                steps[direction][target - square] = steps[direction].get(target - square, 0) | 1 << square
+    return tuple(tuple(step.items()) for step in steps)
+
+
+'''STEPS[direction]: (shift, mask of the squares whose neighbour in the direction is shift squares away), the shift
+depends on the parity of the row'''
+STEPS = _steps()
+
+
+def mobility(movers, empty, directions, count=popcount):
+    """
+    Simple moves (not captures) of some pieces, counted with a few shifts of the masks.
+    :param movers: mask of the pieces
+    :param empty: mask of the empty squares
+    :param directions: UP or DOWN
+    :param count: popcount of a mask, _count for numpy arrays of masks
+    :return:
+    """
+    total = 0
+    for direction in directions:
+        # one step in a direction never takes two pieces to the same square, so the targets of a direction add up
+        targets = 0
+        for shift, mask in STEPS[direction]:
+            moved = movers & mask
+            targets |= moved << shift if shift > 0 else moved >> -shift
+        total += count(targets & empty)
+    return total
+
+
+def table_weights(bias, red_man, red_king, white_man, white_king):
+    """Weights of tables that give every kind of piece the same value on every square"""
+    return [bias] + [value for value in (red_man, red_king, white_man, white_king) for _ in range(SQUARES)] + [0.0] * 4
+
+
+class PieceSquareEvaluator:
+    """
+    Evaluation by piece-square tables with mobility and home row terms, see the module documentation. Like
+    Evaluator, it holds the weights for a whole search and boards only carry the running table sum.
+    """
+
+    def __init__(self, weights=None):
+        """
+        :param weights: the FEATURES weights of return_weights(); material only (a man 1, a king 1.5) when None
+        """
+        if weights is None:
+            weights = table_weights(0.0, -MAN, -KING, MAN, KING)
+        self.apply_weights(weights)
+
+    @classmethod
+    def from_linear(cls, weights):
+        """
+        Start from the material weights of an Evaluator, the threatened piece weights have no counterpart.
+        :param weights: bias, red, white, red king, white king, threatened red and threatened white weights
+        :return:
+        """
+        bias, red, white, red_king, white_king = weights[:5]
+        return cls(table_weights(bias, red, red + red_king, white, white + white_king))
+
+    def evaluate(self, board):
+        """
+        Evaluation function for AI player!
+        :param board: Board or BitBoard
+        :return:
+        """
+        score = self.bias + board.pst_score(self.table)
+        if isinstance(board, BitBoard):
+            red, white, kings = board.red, board.white, board.kings
+        else:
+            red, white, kings = board.masks()
+        empty = ~(red | white) & ALL_SQUARES
+        red_mobility = mobility(red, empty, UP)
+        white_mobility = mobility(white, empty, DOWN)
+        if kings:
+            red_mobility += mobility(red & kings, empty, DOWN)
+            white_mobility += mobility(white & kings, empty, UP)
+        return score + self.weight_red_mobility * red_mobility + self.weight_white_mobility * white_mobility + (
+                self.weight_red_home * popcount(red & ~kings & RED_HOME)) + (
+                       self.weight_white_home * popcount(white & ~kings & WHITE_HOME))
+
+    def features(self, board):
+        return features(board)
+
+    def optimize_weights(self, board, loss, lr):
+        """
+        One gradient step of the weights towards the loss on the features of the board, all weights in one numpy
+        operation.
+        :param board:
+        :param loss: target - evaluation
+        :param lr:
+        :return:
+        """
+        np = _require_numpy()
+        self.apply_weights(np.asarray(self.weights) + lr * loss * features(board))
+
+    def apply_weights(self, weights):
+        weights = [float(weight) for weight in weights]
+        if len(weights) != FEATURES:
+            raise ValueError(f'a piece-square evaluator has {FEATURES} weights, got {len(weights)}')
+        self.weights = weights
+        self.bias = weights[0]
+        # a new tuple every time, so boards summed with the old weights sum again
+        self.table = tuple(tuple(weights[1 + kind * SQUARES:1 + (kind + 1) * SQUARES]) for kind in range(KINDS))
+        (self.weight_red_mobility, self.weight_white_mobility, self.weight_red_home,
+         self.weight_white_home) = weights[1 + KINDS * SQUARES:]
+
+    def return_weights(self):
+        return list(self.weights)
+
+    def __repr__(self):
+        return f'<PieceSquareEvaluator {self.weights}>'
+
+
+def features(board):
+    """Feature row of a Board or BitBoard, PieceSquareEvaluator.evaluate() is the dot product of it with the weights"""
+    if not isinstance(board, BitBoard):
+        board = BitBoard.from_board(board)
+    return feature_matrix([board.red], [board.white], [board.kings])[0]
+
+
+def feature_matrix(red, white, kings):
+    """
+    Feature rows of many positions at once, from their BitBoard masks.
+    :param red: sequence or numpy array of red masks
+    :param white:
+    :param kings:
+    :return: (len(red), FEATURES) matrix
+    """
+    np = _require_numpy()
+    red, white, kings = (np.asarray(mask, dtype=np.uint32).reshape(-1) for mask in (red, white, kings))
+    men = ~kings
+    pieces = np.stack([red & men, red & kings, white & men, white & kings], axis=1).astype('<u4')
+    # little endian masks, unpacked low bit first: column kind * 32 + square
+    squares = np.unpackbits(pieces.view(np.uint8), axis=1, bitorder='little')
+    empty = ~(red | white)
+    terms = np.stack([mobility(red, empty, UP, _count) + mobility(red & kings, empty, DOWN, _count),
+                      mobility(white, empty, DOWN, _count) + mobility(white & kings, empty, UP, _count),
+                      _count(red & men & RED_HOME), _count(white & men & WHITE_HOME)], axis=1)
+    return np.hstack([np.ones((len(red), 1)), squares, terms]).astype(np.float64)
+
+
+def _count(masks):
+    """popcount of every mask of a numpy array"""
+    np = _require_numpy()
+    return np.unpackbits(masks.astype('<u4').reshape(-1, 1).view(np.uint8), axis=1).sum(axis=1)
+
+
+def _require_numpy():
+    """numpy, imported here rather than with the module: evaluate() never needs it, only training does"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('piece-square features need numpy: pip install numpy') from None
+    return numpy
@@ -0,0 +1,128 @@
+import random
+import time
+
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from .algorithm import minimax, iterative_deepening, generate_moves
+from .evaluator import make_evaluator
+from .mcts import mcts, MonteCarloTree
+from .stats import SearchStats
+from .transposition import TranspositionTable
+
+'''material only: white pieces count +1, red pieces -1 and kings half a piece more (bias, red, white, red king,
+white king, threatened red, threatened white)'''
+DEFAULT_WEIGHTS = (0.0, -1.0, 1.0, -0.5, 0.5, 0.0, 0.0)
+MAX_PLIES = 200
+ENGINES = ('minimax', 'mcts')
+
+
+class EngineConfig:
+    """
+    How one player searches: minimax to a depth or for a time budget, or MCTS for a number of iterations or a time
+    budget, with its evaluation weights and search features.
+    """
+
+    def __init__(self, depth=3, weights=DEFAULT_WEIGHTS, alpha_beta=True, move_time_ms=0, tt_mb=0, name=None,
+                 engine='minimax', iterations=1000, playout='eval'):
+        if engine not in ENGINES:
+            raise ValueError(f'unknown engine {engine!r}, expected one of {ENGINES}')
+        self.depth = depth
+        self.evaluator = make_evaluator(weights)
+        self.alpha_beta = alpha_beta
+        self.move_time_ms = move_time_ms
+        self.tt_mb = tt_mb
+        self.engine = engine
+        self.iterations = iterations
+        self.playout = playout
+        self.name = name or (f'mcts-{playout}' if engine == 'mcts' else f'depth{depth}')
+
+    def make_table(self):
+        """Search state kept between the moves of a game: the transposition table, or the MCTS tree"""
+        if self.engine == 'mcts':
+            return MonteCarloTree(playout=self.playout)
+        return TranspositionTable(self.tt_mb) if self.tt_mb > 0 else None
+
+    def search(self, board, max_player, stats=None, table=None):
+        """
+        Search a BitBoard with this engine's weights and return (value, board after the best move).
+        :param board:
+        :param max_player: True when white is to move
+        :param stats:
+        :param table: result of make_table
+        :return:
+        """
+        if self.engine == 'mcts':
+            return mcts(board, max_player, None, self.evaluator, 0 if self.move_time_ms > 0 else self.iterations,
+                        self.move_time_ms, tree=table, stats=stats)
+        if self.move_time_ms > 0:
+            return iterative_deepening(board, max_player, None, self.evaluator, self.move_time_ms, stats=stats,
+                                       table=table)
+        return minimax(board, self.depth, max_player, None, self.evaluator, alpha_beta=self.alpha_beta, stats=stats,
+                       table=table)
+
+    def __repr__(self):
+        return f'<EngineConfig {self.name}>'
+
+
+class GameResult:
+    """Outcome of one self-play game: winner is WHITE, RED or None for a draw."""
+
+    def __init__(self, winner, plies, moves, nodes, seconds, move_stats=None):
+        self.winner = winner
+        self.plies = plies
+        self.moves = moves
+        self.nodes = nodes
+        self.seconds = seconds
+        '''SearchStats.as_dict() of every searched move, with its ply, engine and colour'''
+        self.move_stats = move_stats or []
+
+
+def play_game(white, red, random_plies=0, seed=None, max_plies=MAX_PLIES, on_position=None, move_stats=False):
+    """
+    Play one headless game on a BitBoard. Red moves first, as in Game.
+    A side without pieces or without moves loses, reaching max_plies is a draw.
+    :param white: EngineConfig of the white (maximizing) player
+    :param red: EngineConfig of the red player
+    :param random_plies: number of random opening moves, so repeated games differ
+    :param seed: seed of the random opening moves
+    :param max_plies:
+    :param on_position: called as on_position(board, max_player, value) for every searched position that
+        has a move, before the move is played
+    :param move_stats: keep the timed SearchStats of every searched move in GameResult.move_stats
+    :return: GameResult
+    """
+    rng = random.Random(seed)
+    tables = {WHITE: white.make_table(), RED: red.make_table()}
+    board = BitBoard.start()
+    max_player = False
+    plies = moves = nodes = 0
+    searched = []
+    start = time.perf_counter()
+    winner = board.winner()
+    while winner is None and plies < max_plies:
+        color = WHITE if max_player else RED
+        if plies < random_plies:
+            options = generate_moves(board, color)
+            if not options:
+                winner = RED if max_player else WHITE
+                break
+            board.make_move(*rng.choice(options))
+        else:
+            stats = SearchStats(timed=move_stats)
+            engine = white if max_player else red
+            value, board_after = engine.search(board, max_player, stats, tables[color])
+            nodes += stats.nodes
+            moves += 1
+            if move_stats:
+                searched.append({'ply': plies, 'engine': engine.name, 'color': 'white' if max_player else 'red',
+                                 'value': value, **stats.as_dict()})
+            if board_after is None:
+                winner = RED if max_player else WHITE
+                break
+            if on_position is not None:
+                on_position(board, max_player, value)
+            board = board_after
+        plies += 1
+        max_player = not max_player
+        winner = board.winner()
+    return GameResult(winner, plies, moves, nodes, time.perf_counter() - start, searched)
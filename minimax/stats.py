@@ -0,0 +1,127 @@
+import json
+import math
+
+'''counters that add up when the stats of several searches are merged'''
+COUNTERS = ('nodes', 'leaves', 'cutoffs', 'tt_hits', 'book_hits', 'seconds', 'movegen_seconds', 'make_seconds',
+            'eval_seconds')
+
+
+class SearchStats:
+    """
+    Counters filled in by a search, so different search modes can be compared.
+    With timed=True the search also measures how its time splits between move generation, making, unmaking and
+    copying moves, and evaluation. That costs a few clock reads per node, so it is off by default.
+    """
+
+    def __init__(self, timed=False):
+        self.timed = timed
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = 0
+        self.depth = 0
+        self.book_hits = 0
+        self.tt_hits = 0
+        self.seconds = 0.0
+        self.movegen_seconds = 0.0
+        self.make_seconds = 0.0
+        self.eval_seconds = 0.0
+
+    @property
+    def branching_factor(self):
+        """Mean number of children searched per expanded node"""
+        expanded = self.nodes - self.leaves
+        return (self.nodes - 1) / expanded if expanded > 0 else 0.0
+
+    @property
+    def effective_branching_factor(self):
+        """nodes ** (1 / depth): the branching factor of a uniform tree of the same size"""
+        return self.nodes ** (1 / self.depth) if self.depth > 0 and self.nodes > 0 else 0.0
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def merge(self, other):
+        """Add the counters of another search, e.g. of a worker process"""
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.depth = max(self.depth, other.depth)
+        return self
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in COUNTERS}
+        data.update(depth=self.depth, branching_factor=self.branching_factor,
+                    effective_branching_factor=self.effective_branching_factor,
+                    nodes_per_second=self.nodes_per_second)
+        return data
+
+    def __repr__(self):
+        text = f'<nodes={self.nodes} leaves={self.leaves} cutoffs={self.cutoffs} depth={self.depth} ' \
+               f'book_hits={self.book_hits} tt_hits={self.tt_hits} branching={self.branching_factor:.2f}'
+        if self.timed:
+            text += f' seconds={self.seconds:.3f} movegen={self.movegen_seconds:.3f} ' \
+                    f'make={self.make_seconds:.3f} eval={self.eval_seconds:.3f}'
+        return text + '>'
+
+
+class StatsLog:
+    """Appends the stats of every searched move to a file, one JSON object per line."""
+
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def write(self, stats, **fields):
+        """
+        :param stats: SearchStats of one move
+        :param fields: extra keys of the line, e.g. game, ply, player, value
+        :return:
+        """
+        self.file.write(json.dumps({**fields, **stats.as_dict()}) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def summarize(records, key='player'):
+    """
+    Totals and per move means of JSON lines records, grouped by one of their fields.
+    :param records: iterable of dicts, e.g. json.loads of every line of a StatsLog file
+    :param key:
+    :return: dict of group -> dict of moves, totals of the counters, nodes_per_second and mean branching factor
+    """
+    groups = {}
+    for record in records:
+        group = groups.setdefault(record.get(key), {'moves': 0, 'branching_factor': 0.0,
+                                                    **{name: 0 for name in COUNTERS}})
+        group['moves'] += 1
+        group['branching_factor'] += record.get('branching_factor', 0.0)
+        for name in COUNTERS:
+            group[name] += record.get(name, 0)
+    for group in groups.values():
+        group['branching_factor'] /= group['moves']
+        group['nodes_per_move'] = group['nodes'] / group['moves']
+        group['nodes_per_second'] = group['nodes'] / group['seconds'] if group['seconds'] > 0 else 0.0
+    return groups
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """
+    Nearest rank percentiles, e.g. of request latencies.
+    :param values: iterable of numbers
+    :param points: percentiles between 0 and 100
+    :return: dict of point -> value, and 'max'; empty when there are no values
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    result = {point: ordered[min(len(ordered) - 1, max(0, math.ceil(point / 100 * len(ordered)) - 1))]
+              for point in points}
+    result['max'] = ordered[-1]
+    return result
@@ -0,0 +1,207 @@
+"""
+Batched training of the evaluation weights from self-play: the searched positions of many games are collected
+into numpy arrays of (features, TD(lambda) target) and the weights are fitted on minibatches. The weights are those
+of Evaluator or of the piece-square PieceSquareEvaluator, the features come from the evaluator.
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers.constants import RED, WHITE
+from .batch import FEATURES
+from .evaluator import make_evaluator
+from .pst import feature_matrix, FEATURES as PST_FEATURES
+from .optim import batch_optimizer, BATCH_LR
+from .selfplay import EngineConfig, play_game
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for training
+    np = None
+
+'''target of a won position for white, the same scale main.py uses for the end of a game'''
+WIN_VALUE = 24.0
+
+
+def td_targets(values, outcome, td_lambda):
+    """
+    TD(lambda) returns of a game: the target of a position mixes the search value of the next position with
+    the target of the next position, the last position looks at the outcome.
+    lambda = 1 trains every position on the outcome, lambda = 0 on the next search value only.
+    :param values: search values of the positions, in game order
+    :param outcome: WIN_VALUE, -WIN_VALUE or 0 for a draw
+    :param td_lambda:
+    :return: list of targets
+    """
+    targets = [0.0] * len(values)
+    target = outcome
+    for t in range(len(values) - 1, -1, -1):
+        targets[t] = target
+        target = (1 - td_lambda) * values[t] + td_lambda * target
+    return targets
+
+
+def self_play_samples(args):
+    """
+    Worker side: play one self-play game.
+    :return: (feature rows, targets, [(board, max_player, value)], winner)
+    """
+    weights, depth, random_plies, seed, td_lambda = args
+    engine = EngineConfig(depth=depth, weights=weights)
+    rows, values, positions = [], [], []
+
+    def on_position(board, max_player, value):
+        rows.append(engine.evaluator.features(board))
+        # a search that sees a side run out of moves returns +-inf, that is a won game
+        value = max(-WIN_VALUE, min(WIN_VALUE, value))
+        values.append(value)
+        positions.append((board.copy(), max_player, value))
+
+    result = play_game(engine, engine, random_plies, seed=seed, on_position=on_position)
+    outcome = {WHITE: WIN_VALUE, RED: -WIN_VALUE}.get(result.winner, 0.0)
+    return rows, td_targets(values, outcome, td_lambda), positions, result.winner
+
+
+class BatchTrainer:
+    """Fits the evaluation weights on minibatches of self-play samples."""
+
+    def __init__(self, weights=None, lr=BATCH_LR, td_lambda=0.7, batch_size=256, seed=None, evaluator='linear'):
+        """
+        :param weights: start weights; None starts Evaluator from random weights and the piece-square tables from
+            material, 7 weights with evaluator 'pst' start the tables from their material weights
+        :param evaluator: 'linear' or 'pst', see make_evaluator
+        """
+        if np is None:
+            raise ImportError('batch training needs numpy: pip install numpy')
+        self.rng = random.Random(seed)
+        if weights is None and evaluator == 'linear':
+            weights = [self.rng.gauss(0, 1) for _ in range(FEATURES)]
+        self.weights = np.asarray(make_evaluator(weights, evaluator).return_weights(), dtype=np.float64)
+        self.lr = lr
+        self.td_lambda = td_lambda
+        self.batch_size = batch_size
+        self.samples_per_second = 0.0
+
+    def self_play(self, games, depth=2, random_plies=4, executor=None, writer=None):
+        """
+        Play games with the current weights and return the samples as arrays.
+        :param games:
+        :param depth: search depth of the self-play games
+        :param random_plies: random opening moves of each game
+        :param executor: ProcessPoolExecutor to play the games in parallel, None plays them here
+        :param writer: DatasetWriter that also keeps every position on disk
+        :return: (features matrix, targets vector)
+        """
+        jobs = [(tuple(self.weights), depth, random_plies, self.rng.getrandbits(32), self.td_lambda)
+                for _ in range(games)]
+        results = executor.map(self_play_samples, jobs) if executor is not None else map(self_play_samples, jobs)
+        rows, targets = [], []
+        for game_rows, game_targets, positions, winner in results:
+            rows += game_rows
+            targets += game_targets
+            if writer is not None:
+                writer.write_game(positions, winner)
+        return np.array(rows, dtype=np.float64).reshape(-1, len(self.weights)), np.array(targets, dtype=np.float64)
+
+    def fit(self, x, y, passes=1):
+        """
+        Shuffle the samples and take one batch_optimizer step per minibatch.
+        :param x: features matrix
+        :param y: targets
+        :param passes: times to go over the samples
+        :return: mean squared error after the update
+        """
+        start = time.perf_counter()
+        for _ in range(passes):
+            order = np.random.default_rng(self.rng.getrandbits(32)).permutation(len(y))
+            for begin in range(0, len(y), self.batch_size):
+                batch = order[begin:begin + self.batch_size]
+                losses = y[batch] - x[batch] @ self.weights
+                self.weights = batch_optimizer(self.weights, x[batch], losses, self.lr)
+        seconds = time.perf_counter() - start
+        self.samples_per_second = passes * len(y) / seconds if seconds > 0 else float('inf')
+        return float(np.mean((y - x @ self.weights) ** 2)) if len(y) else 0.0
+
+    def fit_dataset(self, paths, passes=1):
+        """
+        Fit on dataset files written by DatasetWriter, chunk by chunk so memory stays flat.
+        The target of a position is the result of its game (TD(1)).
+        :param paths: files or glob patterns
+        :param passes:
+        :return: number of samples seen
+        """
+        from .dataset import iter_chunks
+
+        seen = 0
+        for _ in range(passes):
+            for chunk in iter_chunks(paths):
+                if len(self.weights) == PST_FEATURES:
+                    x = feature_matrix(chunk['red'], chunk['white'], chunk['kings'])
+                else:
+                    x = np.hstack([np.ones((len(chunk), 1)), chunk['features'].astype(np.float64)])
+                self.fit(x, chunk['result'].astype(np.float64) * WIN_VALUE)
+                seen += len(chunk)
+        return seen
+
+    def get_state(self):
+        """Optimizer settings, for checkpoints"""
+        return {'lr': self.lr, 'td_lambda': self.td_lambda, 'batch_size': self.batch_size}
+
+    def return_weights(self):
+        return [float(weight) for weight in self.weights]
+
+
+def train(epochs, games, depth=2, lr=BATCH_LR, td_lambda=0.7, batch_size=256, passes=1, workers=None, weights=None,
+          seed=None, dataset=None, checkpoints=None, resume=False, log=print, evaluator='linear'):
+    """
+    Alternate self-play and fitting for some epochs and return the trainer.
+    :param epochs:
+    :param games: self-play games per epoch
+    :param depth: search depth of the self-play games
+    :param lr:
+    :param td_lambda:
+    :param batch_size:
+    :param passes: passes over the samples of an epoch
+    :param workers: processes playing the games, 0 plays them in this process
+    :param weights: start weights, random when None
+    :param seed:
+    :param dataset: path of a dataset file the self-play positions are appended to
+    :param checkpoints: CheckpointManager the epochs are saved into
+    :param resume: continue from the latest checkpoint of checkpoints
+    :param log:
+    :param evaluator: 'linear' or 'pst', the weights of a checkpoint or of weights take precedence
+    :return: BatchTrainer
+    """
+    from .dataset import DatasetWriter
+
+    trainer = BatchTrainer(weights, lr, td_lambda, batch_size, seed, evaluator)
+    first_epoch = 0
+    checkpoint = checkpoints.load_latest() if checkpoints is not None and resume else None
+    if checkpoint is not None:
+        trainer.weights = np.asarray(checkpoint['weights'], dtype=np.float64)
+        if checkpoint['rng_state'] is not None:
+            trainer.rng.setstate(checkpoint['rng_state'])
+        first_epoch = checkpoint['epoch'] + 1
+        log(f'Resuming from epoch {first_epoch}')
+    executor = ProcessPoolExecutor(workers or None) if workers != 0 else None
+    writer = DatasetWriter(dataset) if dataset else None
+    try:
+        for epoch in range(first_epoch, epochs):
+            start = time.perf_counter()
+            x, y = trainer.self_play(games, depth, executor=executor, writer=writer)
+            if writer is not None:
+                writer.flush()
+            play_seconds = time.perf_counter() - start
+            error = trainer.fit(x, y, passes)
+            log(f'Epoch : {epoch} samples={len(y)} mse={error:.3f} self-play {len(y) / play_seconds:.0f} samples/s, '
+                f'training {trainer.samples_per_second:.0f} samples/s')
+            log(trainer.return_weights())
+            if checkpoints is not None:
+                checkpoints.save(epoch, trainer.return_weights(), seed, trainer.get_state(), trainer.rng.getstate(),
+                                 force=epoch == epochs - 1)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if writer is not None:
+            writer.close()
+    return trainer
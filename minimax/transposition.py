@@ -0,0 +1,74 @@
+from array import array
+
+EXACT, LOWER, UPPER = 1, 2, 3
+NO_MOVE = -1
+'''bytes per slot: key (8), value (8), best move (2), depth (1), bound type (1)'''
+ENTRY_BYTES = 20
+POLICIES = ('depth', 'always')
+
+
+class TranspositionTable:
+    """
+    Fixed size hash table of search results keyed by the Zobrist hash of a position.
+    The slots live in flat arrays, so the memory use is fixed when the table is created.
+    """
+
+    def __init__(self, max_mb=16, policy='depth'):
+        """
+        :param max_mb: memory budget of the table in megabytes
+        :param policy: 'depth' keeps the deeper of two results for the same slot, 'always' keeps the newest
+        """
+        if policy not in POLICIES:
+            raise ValueError(f'unknown replacement policy {policy!r}, expected one of {POLICIES}')
+        self.size = max(1, int(max_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.policy = policy
+        self.keys = array('Q', bytes(8 * self.size))
+        self.values = array('d', bytes(8 * self.size))
+        self.moves = array('h', [NO_MOVE]) * self.size
+        self.depths = array('b', bytes(self.size))
+        self.flags = array('b', bytes(self.size))
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def probe(self, key):
+        """
+        Return (depth, value, flag, move) stored for the key, or None.
+        :param key:
+        :return:
+        """
+        index = key % self.size
+        if self.flags[index] and self.keys[index] == key:
+            self.hits += 1
+            return self.depths[index], self.values[index], self.flags[index], self.moves[index]
+        if self.flags[index]:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, flag, move=NO_MOVE):
+        """
+        Store a search result, following the replacement policy when the slot is taken.
+        :param key:
+        :param depth: remaining depth the value was searched to
+        :param value:
+        :param flag: EXACT, LOWER (value is a lower bound) or UPPER (value is an upper bound)
+        :param move: key of the best move, see minimax.ordering.move_key
+        :return:
+        """
+        index = key % self.size
+        if self.policy == 'depth' and self.flags[index] and self.keys[index] != key and \
+                self.depths[index] > depth:
+            return
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.values[index] = value
+        self.flags[index] = flag
+        self.moves[index] = move
+        self.stores += 1
+
+    def clear(self):
+        """Forget every entry, e.g. after the evaluation weights change"""
+        self.flags = array('b', bytes(self.size))
+
+    def __repr__(self):
+        return f'<TranspositionTable size={self.size} hits={self.hits} misses={self.misses} ' \
+               f'collisions={self.collisions} stores={self.stores}>'
@@ -0,0 +1,68 @@
+import random
+
+from checkers.bitboard import BitBoard, BACK_RANKS
+from checkers.constants import RED, ROWS
+from checkers.tables import SQUARES, row_col_to_square
+
+'''one random 64 bit key per (piece kind, square); kinds are red man, red king, white man, white king'''
+_rng = random.Random(20201)
+PIECE_KEYS = tuple(tuple(_rng.getrandbits(64) for _ in range(SQUARES)) for _ in range(4))
+WHITE_TO_MOVE = _rng.getrandbits(64)
+
+
+def _kind(is_red, king):
+    return (0 if is_red else 2) + (1 if king else 0)
+
+
+def hash_board(board, max_player):
+    """
+    Zobrist hash of a Board or BitBoard position with the side to move.
+    :param board:
+    :param max_player: True when white is to move
+    :return:
+    """
+    h = WHITE_TO_MOVE if max_player else 0
+    if isinstance(board, BitBoard):
+        for square in range(SQUARES):
+            bit = 1 << square
+            if (board.red | board.white) & bit:
+                h ^= PIECE_KEYS[_kind(board.red & bit, board.kings & bit)][square]
+        return h
+
+    for row in board.board:
+        for piece in row:
+            if piece != 0:
+                h ^= PIECE_KEYS[_kind(piece.color == RED, piece.king)][row_col_to_square(piece.row, piece.col)]
+    return h
+
+
+def move_hash(h, board, piece, move, skip):
+    """
+    Hash of the position after the move, computed from the position before it, with the side to move flipped.
+    :param h: hash before the move
+    :param board: board before the move
+    :param piece: Piece of a Board or square of a BitBoard
+    :param move: target of the move
+    :param skip: captured pieces (list of Piece or BitBoard mask)
+    :return:
+    """
+    h ^= WHITE_TO_MOVE
+    if isinstance(piece, int):
+        bit, target = 1 << piece, move
+        is_red, king = board.red & bit, board.kings & bit
+        h ^= PIECE_KEYS[_kind(is_red, king)][piece]
+        h ^= PIECE_KEYS[_kind(is_red, king or BACK_RANKS >> target & 1)][target]
+        while skip:
+            low = skip & -skip
+            square = low.bit_length() - 1
+            h ^= PIECE_KEYS[_kind(board.red & low, board.kings & low)][square]
+            skip ^= low
+        return h
+
+    is_red = piece.color == RED
+    row, col = move
+    h ^= PIECE_KEYS[_kind(is_red, piece.king)][row_col_to_square(piece.row, piece.col)]
+    h ^= PIECE_KEYS[_kind(is_red, piece.king or row == 0 or row == ROWS - 1)][row_col_to_square(row, col)]
+    for captured in skip:
+        h ^= PIECE_KEYS[_kind(captured.color == RED, captured.king)][row_col_to_square(captured.row, captured.col)]
+    return h
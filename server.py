@@ -0,0 +1,272 @@
+"""
+Headless game server: many person against ai games in one process, played over a local socket.
+
+Every request and response is one line of JSON. The person plays red and moves first, as in main.py person2ai; the
+ai answers in the response to each move. The ai searches of all sessions share one bounded process pool; when more
+searches wait for it than --max_pending the move is answered with the error 'busy' and the board is left unchanged,
+so the client can retry it later.
+
+    {"op": "new", "move_time_ms": 100}                  -> {"ok": true, "session": 1, "board": [...], ...}
+    {"op": "moves", "session": 1}                       -> {"ok": true, "moves": [{"from": [5, 0], "to": [4, 1]}, ...]}
+    {"op": "move", "session": 1, "from": [5, 0], "to": [4, 1]}   -> the board after the ai's answer
+    {"op": "state", "session": 1}, {"op": "close", "session": 1}, {"op": "stats"}
+
+A request may carry an "id", which is copied into its response. A session belongs to its connection and is closed
+with it. The board is 8 strings of 8 squares: '.' empty, 'r'/'w' men and 'R'/'W' kings.
+
+    python server.py --port 8765 --workers 4
+    python loadgen.py --port 8765 --sessions 1 4 16 64
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers.bitboard import BitBoard
+from checkers.constants import ROWS, COLS, RED, WHITE, COLOR_NAMES
+from checkers.game import Game
+from minimax.algorithm import generate_moves
+from minimax.selfplay import EngineConfig, DEFAULT_WEIGHTS
+from minimax.stats import SearchStats, percentiles
+
+'''latencies kept per request kind for the percentiles'''
+LATENCY_WINDOW = 10000
+OPS = ('new', 'moves', 'move', 'state', 'close', 'stats')
+SYMBOLS = {(RED, False): 'r', (RED, True): 'R', (WHITE, False): 'w', (WHITE, True): 'W'}
+
+
+class RequestError(Exception):
+    """A request the server refuses; its message is the 'error' of the response."""
+
+
+def search_move(engine, red, white, kings):
+    """
+    Worker side: the ai (white) move of a position sent as BitBoard masks, so only a few ints are pickled.
+    :return: (value, masks of the position after the move, nodes searched)
+    """
+    stats = SearchStats()
+    value, board = engine.search(BitBoard(red, white, kings), True, stats)
+    return value, (board.red, board.white, board.kings), stats.nodes
+
+
+def winner(game):
+    """A side without pieces loses, and so does the side to move when it has no move"""
+    result = game.winner()
+    if result is None and not generate_moves(game.board, game.turn):
+        result = RED if game.turn == WHITE else WHITE
+    return result
+
+
+def parse_square(value):
+    """(row, col) of the [row, col] of a request"""
+    if not isinstance(value, list) or len(value) != 2:
+        raise RequestError(f'a square is [row, col], got {value!r}')
+    return int(value[0]), int(value[1])
+
+
+def board_rows(board):
+    return [''.join('.' if piece == 0 else SYMBOLS[piece.color, piece.king] for piece in row) for row in board.board]
+
+
+class Session:
+    """One person against the ai: a Game without a window and the ai's engine."""
+
+    def __init__(self, session_id, engine):
+        self.id = session_id
+        self.game = Game(None)
+        self.engine = engine
+        self.moves = 0
+
+    def state(self):
+        result = winner(self.game)
+        return {'session': self.id, 'board': board_rows(self.game.board), 'turn': COLOR_NAMES[self.game.turn],
+                'winner': COLOR_NAMES[result] if result is not None else None, 'moves': self.moves}
+
+
+class GameServer:
+    """Holds the sessions, hands the ai searches to the process pool and measures the request latencies."""
+
+    def __init__(self, executor, opt):
+        self.executor = executor
+        self.opt = opt
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        self.peak_sessions = 0
+        self.pending = 0
+        self.rejected = 0
+        self.searches = 0
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.search_latencies = deque(maxlen=LATENCY_WINDOW)
+
+    async def handle(self, reader, writer):
+        """One connection: its requests are answered in order, so a client waits for its answer before the next"""
+        owned = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # longer than --max_request_bytes: the rest of the line can not be skipped, so the connection ends
+                    writer.write(json.dumps({'ok': False, 'error': 'request too large'}).encode() + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                start = time.perf_counter()
+                request = op = None
+                try:
+                    request = json.loads(line)
+                    op = request.get('op')
+                    response = {'ok': True, **await self.dispatch(op, request, owned)}
+                except RequestError as error:
+                    response = {'ok': False, 'error': str(error)}
+                except (ValueError, TypeError, KeyError, AttributeError) as error:
+                    response = {'ok': False, 'error': f'bad request: {error}'}
+                if isinstance(request, dict) and 'id' in request:
+                    response['id'] = request['id']
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+                if op in OPS:
+                    self.latencies[op].append((time.perf_counter() - start) * 1000)
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned:
+                self.sessions.pop(session_id, None)
+            writer.close()
+
+    async def dispatch(self, op, request, owned):
+        if op == 'stats':
+            return self.stats()
+        if op == 'new':
+            return self.new_session(request, owned)
+        if op not in OPS:
+            raise RequestError(f'unknown op {op!r}')
+        session_id = request['session']
+        if session_id not in owned:
+            raise RequestError('unknown session')
+        session = self.sessions[session_id]
+        if op == 'state':
+            return session.state()
+        if op == 'close':
+            owned.discard(session_id)
+            del self.sessions[session_id]
+            return {'session': session_id}
+        if op == 'moves':
+            game = session.game
+            if game.turn != RED or winner(game) is not None:
+                return {'moves': []}
+            return {'moves': [{'from': [piece.row, piece.col], 'to': list(move), 'captures': len(skip)}
+                              for piece, move, skip in generate_moves(game.board, RED)]}
+        return await self.move(session, request['from'], request['to'])
+
+    def new_session(self, request, owned):
+        opt = self.opt
+        if len(self.sessions) >= opt.max_sessions:
+            raise RequestError('full')
+        move_time_ms = max(0, min(int(request.get('move_time_ms', opt.move_time_ms)), opt.max_move_time_ms))
+        depth = max(1, min(int(request.get('depth', opt.depth)), opt.max_depth))
+        engine = EngineConfig(depth, opt.weights, move_time_ms=move_time_ms)
+        session = Session(next(self.session_ids), engine)
+        self.sessions[session.id] = session
+        owned.add(session.id)
+        self.peak_sessions = max(self.peak_sessions, len(self.sessions))
+        return session.state()
+
+    async def move(self, session, source, target):
+        """Play the person's move and the ai's answer"""
+        game = session.game
+        if winner(game) is not None:
+            raise RequestError('game over')
+        if game.turn != RED:
+            raise RequestError('not your turn')
+        row, col = parse_square(source)
+        target = parse_square(target)
+        piece = game.board.get_piece(row, col) if 0 <= row < ROWS and 0 <= col < COLS else 0
+        if piece == 0 or piece.color != RED or target not in game.board.get_valid_moves(piece):
+            raise RequestError('illegal move')
+        # refused before the move is played, so a busy answer leaves the game as it was
+        if self.pending >= self.opt.max_pending:
+            self.rejected += 1
+            raise RequestError('busy')
+
+        game.selected = None
+        game.select(row, col)
+        game.select(*target)
+        session.moves += 1
+        if winner(game) is not None:
+            return session.state()
+
+        position = BitBoard.from_board(game.board)
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            value, masks, nodes = await asyncio.get_running_loop().run_in_executor(
+                self.executor, search_move, session.engine, position.red, position.white, position.kings)
+        finally:
+            self.pending -= 1
+        search_ms = (time.perf_counter() - start) * 1000
+        self.searches += 1
+        self.search_latencies.append(search_ms)
+        game.ai_move(BitBoard(*masks).to_board())
+        session.moves += 1
+        return {**session.state(), 'value': value, 'nodes': nodes, 'search_ms': search_ms}
+
+    def stats(self):
+        """
+        Sessions, queue and latency percentiles in milliseconds of every kind of request. search_ms runs from
+        handing a search to the pool to its result, so it includes the wait in the pool's queue.
+        """
+        return {'sessions': len(self.sessions), 'peak_sessions': self.peak_sessions, 'pending': self.pending,
+                'max_pending': self.opt.max_pending, 'rejected': self.rejected, 'searches': self.searches,
+                'search_ms': percentiles(self.search_latencies),
+                'latency_ms': {op: {'count': len(values), **percentiles(values)}
+                               for op, values in self.latencies.items()}}
+
+    def report(self):
+        latency = percentiles(self.latencies['move'])
+        return f"sessions={len(self.sessions)} peak={self.peak_sessions} pending={self.pending} " \
+               f"rejected={self.rejected} searches={self.searches} move p50={latency.get(50, 0):.1f}ms " \
+               f"p90={latency.get(90, 0):.1f}ms p99={latency.get(99, 0):.1f}ms"
+
+
+async def serve(opt):
+    with ProcessPoolExecutor(opt.workers or None) as executor:
+        game_server = GameServer(executor, opt)
+        server = await asyncio.start_server(game_server.handle, opt.host, opt.port, limit=opt.max_request_bytes)
+        print(f'listening on {opt.host}:{opt.port}', flush=True)
+        try:
+            async with server:
+                while True:
+                    await asyncio.sleep(opt.report_every if opt.report_every > 0 else 3600)
+                    if opt.report_every > 0:
+                        print(game_server.report(), file=sys.stderr, flush=True)
+        finally:
+            print(json.dumps(game_server.stats()), flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='serve many person against ai games over a local JSON socket')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=0, help='search processes, 0 uses every cpu')
+    parser.add_argument('--max_pending', type=int, default=64,
+                        help='ai searches waiting for or running in the pool before moves are refused as busy')
+    parser.add_argument('--max_sessions', type=int, default=10000)
+    parser.add_argument('--move_time_ms', type=int, default=100,
+                        help='default time budget of an ai move, 0 searches to a fixed --depth')
+    parser.add_argument('--max_move_time_ms', type=int, default=2000, help='the most a session may ask for')
+    parser.add_argument('--depth', type=int, default=4, help='default depth of sessions without a time budget')
+    parser.add_argument('--max_depth', type=int, default=6, help='the deepest fixed depth a session may ask for')
+    parser.add_argument('--weights', type=float, nargs=7, default=list(DEFAULT_WEIGHTS),
+                        help='evaluation weights of the ai')
+    parser.add_argument('--report_every', type=float, default=10, help='seconds between two reports, 0 for none')
+    parser.add_argument('--max_request_bytes', type=int, default=2 ** 16)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,22 @@
+import os
+
+from checkers.bitboard import BitBoard
+from checkers.constants import WHITE
+from minimax.dataset import DatasetWriter, iter_records
+
+
+def write(path, count, value):
+    with DatasetWriter(path, chunk_records=10) as writer:
+        for _ in range(count):
+            writer.write(BitBoard.start(), False, value, WHITE)
+
+
+def test_append_after_a_torn_chunk(tmp_path):
+    path = str(tmp_path / 'games.ckds')
+    write(path, 25, 1.0)
+    # a crash in the middle of writing the last chunk
+    with open(path, 'r+b') as file:
+        file.truncate(os.path.getsize(path) - 5)
+    write(path, 30, 2.0)
+    values = [record.value for record in iter_records(path)]
+    assert values == [1.0] * 20 + [2.0] * 30
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from checkers.board import Board
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from checkers.tables import SQUARES
+from minimax.algorithm import generate_moves
+
+
+def snapshot(board):
+    """Everything make_move may change: the pieces (and masks), the counters, the cached threats and the table sum"""
+    if isinstance(board, BitBoard):
+        pieces = (board.red, board.white, board.kings)
+    else:
+        pieces = (tuple((piece.row, piece.col, piece.color, piece.king, (row, col))
+                        for row, line in enumerate(board.board) for col, piece in enumerate(line) if piece != 0),
+                  board._masks)
+    return (pieces, board.red_left, board.white_left, board.red_kings, board.white_kings, board._threaten_reds,
+            board._threaten_whites, board._threats_stale, board._pst, board._pst_score)
+
+
+@pytest.mark.parametrize('backend', [Board, BitBoard], ids=['board', 'bitboard'])
+def test_unmake_restores_the_position(backend):
+    rng = random.Random(0)
+    for _ in range(20):
+        board = Board() if backend is Board else BitBoard.start()
+        table = tuple(tuple(rng.uniform(-1, 1) for _ in range(SQUARES)) for _ in range(4))
+        board.pst_score(table)
+        if backend is Board:
+            board.masks()
+        max_player, played = False, []
+        for _ in range(rng.randint(1, 80)):
+            moves = generate_moves(board, WHITE if max_player else RED)
+            if not moves or board.winner() is not None:
+                break
+            if rng.random() < 0.5:
+                # cached threat counts are part of what unmake_move restores
+                board.threaten_reds
+            before = snapshot(board)
+            played.append((before, board.make_move(*rng.choice(moves))))
+            max_player = not max_player
+        for before, record in reversed(played):
+            board.unmake_move(record)
+            assert snapshot(board) == before
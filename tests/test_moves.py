@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from checkers.board import Board
+from checkers.bitboard import BitBoard
+from checkers.constants import ROWS, COLS, RED, WHITE
+from checkers.piece import Piece
+from checkers.tables import SQUARES, square_to_row_col, row_col_to_square
+from benchmarks.move_tables import check, random_position, played_position
+
+
+def position(*pieces):
+    """Board holding only the (row, col, color) pieces, and the piece at the first of them"""
+    board = Board()
+    board.board = [[0] * COLS for _ in range(ROWS)]
+    for row, col, color in pieces:
+        board.board[row][col] = Piece(row, col, color)
+    return board, board.get_piece(*pieces[0][:2])
+
+
+def valid_moves(board, piece, bitboard):
+    """get_valid_moves of either backend as {(row, col): set of captured (row, col)}"""
+    if not bitboard:
+        return {target: {(captured.row, captured.col) for captured in skip}
+                for target, skip in board.get_valid_moves(piece).items()}
+    moves = BitBoard.from_board(board).get_valid_moves(row_col_to_square(piece.row, piece.col))
+    return {square_to_row_col(target): {square_to_row_col(square) for square in range(SQUARES) if skip >> square & 1}
+            for target, skip in moves.items()}
+
+
+def test_table_generator_matches_the_legacy_generator():
+    rng = random.Random(0)
+    check([random_position(rng) if i % 2 else played_position(rng) for i in range(1000)])
+
+
+@pytest.mark.parametrize('bitboard', [False, True], ids=['board', 'bitboard'])
+def test_captures_are_not_forced(bitboard):
+    board, piece = position((5, 2, RED), (4, 3, WHITE))
+    assert valid_moves(board, piece, bitboard) == {(4, 1): set(), (3, 4): {(4, 3)}}
+
+
+@pytest.mark.parametrize('bitboard', [False, True], ids=['board', 'bitboard'])
+def test_a_chain_records_its_last_two_captures(bitboard):
+    board, piece = position((7, 0, RED), (6, 1, WHITE), (4, 3, WHITE), (2, 5, WHITE))
+    moves = valid_moves(board, piece, bitboard)
+    assert moves[(5, 2)] == {(6, 1)}
+    assert moves[(3, 4)] == {(6, 1), (4, 3)}
+    assert moves[(1, 6)] == {(4, 3), (2, 5)}
+
+
+@pytest.mark.parametrize('bitboard', [False, True], ids=['board', 'bitboard'])
+def test_an_upward_chain_does_not_land_on_the_first_row(bitboard):
+    board, piece = position((4, 1, RED), (3, 2, WHITE), (1, 4, WHITE))
+    assert valid_moves(board, piece, bitboard) == {(3, 0): set(), (2, 3): {(3, 2)}}
+    # a single jump may land there
+    board, piece = position((2, 3, RED), (1, 4, WHITE))
+    assert valid_moves(board, piece, bitboard) == {(1, 2): set(), (0, 5): {(1, 4)}}
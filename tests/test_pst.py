@@ -0,0 +1,28 @@
+import random
+
+import pytest
+
+from checkers.board import Board
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from minimax.algorithm import generate_moves
+from minimax.pst import PieceSquareEvaluator, FEATURES
+
+
+def test_board_keeps_masks_and_table_sum_up_to_date():
+    rng = random.Random(0)
+    evaluator = PieceSquareEvaluator([rng.gauss(0, 1) for _ in range(FEATURES)])
+    for _ in range(20):
+        board, max_player, records = Board(), False, []
+        for _ in range(100):
+            assert board.masks() == board.scan_masks()
+            # a fresh bitboard sums the tables and counts the mobility from scratch
+            assert evaluator.evaluate(board) == pytest.approx(evaluator.evaluate(BitBoard(*board.scan_masks())))
+            moves = generate_moves(board, WHITE if max_player else RED)
+            if not moves or board.winner() is not None:
+                break
+            if records and rng.random() < 0.3:
+                board.unmake_move(records.pop())
+            else:
+                records.append(board.make_move(*rng.choice(moves)))
+            max_player = not max_player
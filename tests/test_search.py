@@ -0,0 +1,19 @@
+import pytest
+
+from checkers.bitboard import BitBoard
+from minimax import minimax
+from minimax.transposition import TranspositionTable
+from benchmarks.search_nodes import fixed_positions, EVALUATOR
+
+DEPTH = 3
+
+
+@pytest.mark.parametrize('bitboard', [False, True], ids=['board', 'bitboard'])
+@pytest.mark.parametrize('tt_mb', [0, 1], ids=['no_table', 'table'])
+def test_alpha_beta_value_equals_minimax(bitboard, tt_mb):
+    for board, max_player in fixed_positions(12, seed=0):
+        position = BitBoard.from_board(board) if bitboard else board
+        table = TranspositionTable(tt_mb) if tt_mb else None
+        expected = minimax(position, DEPTH, max_player, None, EVALUATOR)[0]
+        value = minimax(position, DEPTH, max_player, None, EVALUATOR, alpha_beta=True, table=table)[0]
+        assert value == pytest.approx(expected, abs=1e-9)
@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from checkers.board import Board
+from checkers.bitboard import BitBoard
+from checkers.constants import RED, WHITE
+from minimax.algorithm import generate_moves
+from minimax.zobrist import hash_board, move_hash
+
+
+@pytest.mark.parametrize('backend', [Board, BitBoard], ids=['board', 'bitboard'])
+def test_move_hash_matches_a_full_hash(backend):
+    rng = random.Random(0)
+    for _ in range(20):
+        board = Board() if backend is Board else BitBoard.start()
+        max_player = False
+        for _ in range(rng.randint(1, 80)):
+            moves = generate_moves(board, WHITE if max_player else RED)
+            if not moves or board.winner() is not None:
+                break
+            h = hash_board(board, max_player)
+            # every move, including captures and crowning ones, and unmake gives the hash back
+            for move in moves:
+                expected = move_hash(h, board, *move)
+                record = board.make_move(*move)
+                assert hash_board(board, not max_player) == expected
+                board.unmake_move(record)
+                assert hash_board(board, max_player) == h
+            board.make_move(*rng.choice(moves))
+            max_player = not max_player
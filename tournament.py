@@ -0,0 +1,107 @@
+import argparse
+import json
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers.constants import WHITE
+from minimax.selfplay import EngineConfig, play_game, DEFAULT_WEIGHTS, MAX_PLIES, ENGINES
+from minimax.mcts import PLAYOUTS
+from minimax.stats import summarize
+from minimax.checkpoint import load_checkpoint
+
+
+def engine_from_args(opt, prefix):
+    """Build the EngineConfig of player a or b from the --a_* / --b_* arguments"""
+    checkpoint = getattr(opt, prefix + '_load_weights')
+    weights = load_checkpoint(checkpoint)['weights'] if checkpoint else getattr(opt, prefix + '_weights')
+    return EngineConfig(depth=getattr(opt, prefix + '_depth'), weights=weights,
+                        alpha_beta=not getattr(opt, prefix + '_no_alpha_beta'),
+                        move_time_ms=getattr(opt, prefix + '_move_time_ms'), tt_mb=getattr(opt, prefix + '_tt_mb'),
+                        name=prefix, engine=getattr(opt, prefix + '_engine'),
+                        iterations=getattr(opt, prefix + '_iterations'), playout=getattr(opt, prefix + '_playout'))
+
+
+def play_pair_game(args):
+    """Worker side: play game number index, player a takes white in the even games"""
+    engine_a, engine_b, index, opt = args
+    a_is_white = index % 2 == 0
+    white, red = (engine_a, engine_b) if a_is_white else (engine_b, engine_a)
+    result = play_game(white, red, opt.random_plies, seed=opt.seed + index // 2, max_plies=opt.max_plies,
+                       move_stats=opt.stats_jsonl is not None)
+    if result.winner is None:
+        score = 0.5
+    else:
+        score = 1.0 if (result.winner == WHITE) == a_is_white else 0.0
+    return score, result
+
+
+def elo_difference(score):
+    """Elo difference of a over b that makes the expected score equal the observed one"""
+    if score <= 0:
+        return float('-inf')
+    if score >= 1:
+        return float('inf')
+    return -400 * math.log10(1 / score - 1)
+
+
+def main(opt):
+    engine_a, engine_b = engine_from_args(opt, 'a'), engine_from_args(opt, 'b')
+    jobs = [(engine_a, engine_b, index, opt) for index in range(opt.games)]
+    wins = draws = losses = nodes = moves = plies = 0
+    stats_file = open(opt.stats_jsonl, 'a') if opt.stats_jsonl else None
+    records = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(opt.workers or None) as executor:
+        for index, (score, result) in enumerate(executor.map(play_pair_game, jobs)):
+            for record in result.move_stats:
+                record = {'game': index, **record}
+                stats_file.write(json.dumps(record) + '\n')
+                records.append(record)
+            wins += score == 1
+            draws += score == 0.5
+            losses += score == 0
+            nodes += result.nodes
+            moves += result.moves
+            plies += result.plies
+    seconds = time.perf_counter() - start
+
+    score = (wins + 0.5 * draws) / opt.games
+    print(f'a vs b: +{wins} ={draws} -{losses} score={score:.3f} elo={elo_difference(score):+.1f}')
+    print(f'{opt.games / seconds:.2f} games/s, {plies / opt.games:.1f} plies/game, '
+          f'{nodes / max(moves, 1):.0f} nodes/move')
+    if stats_file is not None:
+        stats_file.close()
+        for engine, total in sorted(summarize(records, 'engine').items()):
+            print(f'{engine}: {total["nodes_per_move"]:.0f} nodes/move, {total["nodes_per_second"]:.0f} nodes/s, '
+                  f'branching {total["branching_factor"]:.2f}, time split movegen {total["movegen_seconds"]:.2f}s '
+                  f'make {total["make_seconds"]:.2f}s eval {total["eval_seconds"]:.2f}s of {total["seconds"]:.2f}s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='play a match between two engine configurations without a window')
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=0, help='game processes, 0 uses every cpu')
+    parser.add_argument('--random_plies', type=int, default=4, help='random opening moves of each game')
+    parser.add_argument('--max_plies', type=int, default=MAX_PLIES, help='longer games are draws')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stats_jsonl', type=str, default=None,
+                        help='append the timed search stats of every move to this file, one JSON object per line')
+    for player in ('a', 'b'):
+        parser.add_argument(f'--{player}_depth', type=int, default=3)
+        parser.add_argument(f'--{player}_weights', type=float, nargs=7, default=list(DEFAULT_WEIGHTS),
+                            help='bias, red, white, red king, white king, threatened red, threatened white')
+        parser.add_argument(f'--{player}_load_weights', type=str, default=None,
+                            help='take the weights from this checkpoint (file or directory), e.g. trained '
+                                 'piece-square tables')
+        parser.add_argument(f'--{player}_no_alpha_beta', action='store_true', help='plain minimax search')
+        parser.add_argument(f'--{player}_move_time_ms', type=int, default=0,
+                            help='iterative deepening time budget instead of a fixed depth')
+        parser.add_argument(f'--{player}_tt_mb', type=float, default=0, help='transposition table size')
+        parser.add_argument(f'--{player}_engine', type=str, default='minimax', choices=ENGINES)
+        parser.add_argument(f'--{player}_iterations', type=int, default=1000,
+                            help='mcts iterations per move when there is no time budget')
+        parser.add_argument(f'--{player}_playout', type=str, default='eval', choices=PLAYOUTS, help='mcts playouts')
+
+    main(parser.parse_args())